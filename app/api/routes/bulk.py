@@ -1,8 +1,8 @@
-import pandas as pd
 import asyncio
 import io
+import os
 import uuid
-from typing import Dict
+from typing import Dict, TYPE_CHECKING
 from fastapi import (
     APIRouter,
     UploadFile,
@@ -12,39 +12,46 @@ from fastapi import (
     HTTPException,
 )
 from fastapi.websockets import WebSocketDisconnect
-from app.services.search_service import SwiggySearchService
-from app.services.extract_service import SwiggyExtractService
+from app.services.search_service import get_search_service
+from app.services.extract_service import EXTRACTOR_VERSION, get_extract_service
+from app.services.worker_pool import BulkWorkerPool
+from app.services.job_queue import get_job_queue
+from app.services.circuit_breaker import search_circuit
+from app.services.bulk_results import RowResult, ResultTable, ExtractionResult
+from app.services.menu_fingerprints import menu_fingerprints
+from app.queue_worker import run_rows_on_queue
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter()
 
-# In-memory store for active jobs (in production, use Redis/DB)
-# Structure: job_id -> { "status": str, "total": int, "processed": int, "results": DataFrame, "queue": asyncio.Queue }
+# In-memory store for active jobs. Rows can be shared with other scraper nodes
+# by setting BULK_QUEUE_URL (see app/services/job_queue.py)
+# Structure: job_id -> { "status": str, "total": int, "processed": int, "results": ResultTable, "queue": asyncio.Queue }
 jobs: Dict[str, dict] = {}
 
-search_service = SwiggySearchService()
-extract_service = SwiggyExtractService()
+# Rows processed concurrently per process (each row drives its own browser)
+ROW_CONCURRENCY = 5
 
+# Times a row is re-queued while the search circuit is open before it fails
+MAX_REQUEUES = 10
 
-async def process_row(row, job_id: str):
+# Set BULK_WORKER_PROCESSES > 1 to spread rows across local worker processes,
+# each with its own event loop and browsers; this process only aggregates.
+BULK_WORKER_PROCESSES = int(os.environ.get("BULK_WORKER_PROCESSES", "1"))
+_worker_pool = None
+
+
+async def process_row(result: RowResult, job_id: str):
     """
     Process a single row: Search -> Extract -> Update Result
     """
-    name = row.get("Restaurant Name", "")
-    location = row.get("Location", "")
-
-    # Initialize result with original data
-    result = row.copy()
-    result["status_text"] = "Processing"
-    result["swiggy_id"] = "NA"
-    result["promos"] = ""
-    result["promo_codes"] = ""  # Kept for UI
-    result["promos"] = ""
-    result["promo_codes"] = ""  # Kept for UI
-    result["offer_items_formatted"] = ""
-    result["rating"] = ""
-    result["total_ratings"] = ""
-    result["99_store_items"] = ""
-    result["offer_items"] = {}
+    name = result.name
+    location = result.location
+
+    # Start from a clean slate (rows can be re-queued)
+    result.reset()
 
     # Notify start
     job = jobs.get(job_id)
@@ -56,11 +63,11 @@ async def process_row(row, job_id: str):
         await job["queue"].put(
             {
                 "type": "update",
-                "data": {"id": str(row.name), "status": "Searching", "name": name},
+                "data": {"id": result.row_id, "status": "Searching", "name": name},
             }
         )
 
-        search_result = await search_service.find_restaurant_url(name, location)
+        search_result = await get_search_service().find_restaurant_url(name, location)
 
         # Handle dict response (new format) or legacy string
         search_result_obj = search_result
@@ -69,6 +76,24 @@ async def process_row(row, job_id: str):
         not_found = False
         error_msg = None
 
+        if isinstance(search_result_obj, dict) and search_result_obj.get("retry"):
+            # Search backend is throttling us; hand the row back to be re-queued
+            result.requeue = True
+            result.error = search_result_obj.get("error")
+            if search_result_obj.get("searched", True):
+                result.requeues += 1
+            await job["queue"].put(
+                {
+                    "type": "update",
+                    "data": {
+                        "id": result.row_id,
+                        "status": "Waiting",
+                        "error": result.error,
+                    },
+                }
+            )
+            return result
+
         if isinstance(search_result_obj, dict):
             url = str(search_result_obj.get("url", ""))
             is_dineout = bool(search_result_obj.get("dineout_only", False))
@@ -108,36 +133,36 @@ async def process_row(row, job_id: str):
                 if match:
                     swiggy_id = match.group(1)
 
-            result["swiggy_id"] = swiggy_id
-            result["swiggy_url"] = potential_url or ""
+            result.swiggy_id = swiggy_id
+            result.swiggy_url = potential_url or ""
 
-            result["status"] = "Not Found"
-            result["not_found"] = True
-            result["error"] = error_msg or "Restaurant not found"
-            result["status_text"] = "Not on Swiggy"
+            result.status = "Not Found"
+            result.not_found = True
+            result.error = error_msg or "Restaurant not found"
+            result.status_text = "Not on Swiggy"
             await job["queue"].put(
                 {
                     "type": "update",
                     "data": {
-                        "id": str(row.name),
+                        "id": result.row_id,
                         "status": "Failed",
-                        "error": result["error"],
+                        "error": result.error,
                     },
                 }
             )
             return result
 
-        result["swiggy_url"] = url
-        result["dineout_only"] = is_dineout
+        result.swiggy_url = url
+        result.dineout_only = is_dineout
 
         # Skip extraction if dineout only
         if is_dineout:
-            result["status"] = "Completed"
+            result.status = "Completed"
             await job["queue"].put(
                 {
                     "type": "update",
                     "data": {
-                        "id": str(row.name),
+                        "id": result.row_id,
                         "status": "Completed",
                         "status_text": "Only Dineout",
                         "swiggy_id": "NA",
@@ -152,10 +177,27 @@ async def process_row(row, job_id: str):
         await job["queue"].put(
             {
                 "type": "update",
-                "data": {"id": str(row.name), "status": "Extracting", "url": url},
+                "data": {"id": result.row_id, "status": "Extracting", "url": url},
             }
         )
 
+        # Extract ID from URL
+        # Expected format: ...-rest12345 or ...-12345
+        import re
+
+        swiggy_id = "NA"
+        match = re.search(r"(\d+)$", url)
+        if match:
+            swiggy_id = match.group(1)
+
+        # Last scrape of this restaurant; same payload fingerprint -> reuse it
+        known = (
+            menu_fingerprints.get(swiggy_id, EXTRACTOR_VERSION)
+            if swiggy_id != "NA"
+            else None
+        )
+        known_fingerprint = known["fingerprint"] if known else None
+
         # Retry logic: Try up to 3 times if data is missing
         max_retries = 3
         data = {}
@@ -167,7 +209,7 @@ async def process_row(row, job_id: str):
                     {
                         "type": "update",
                         "data": {
-                            "id": str(row.name),
+                            "id": result.row_id,
                             "status": f"Extracting (try {attempt + 1}/{max_retries})",
                             "url": url,
                         },
@@ -175,11 +217,12 @@ async def process_row(row, job_id: str):
                 )
                 await asyncio.sleep(2)  # Backoff
 
-            data = await extract_service.extract_data(url)
+            data = await get_extract_service().extract_data(url, known_fingerprint)
 
             # Check if we have useful data
             has_data = (
-                data.get("rating")
+                data.get("unchanged")
+                or data.get("rating")
                 or data.get("promo_codes")
                 or data.get("99_store_items")
             )
@@ -197,63 +240,42 @@ async def process_row(row, job_id: str):
         # If loop finishes without data, we use whatever we got (likely empty or error)
 
         if "error" in data:
-            result["status"] = "Partial Error"
-            result["error"] = data["error"]
+            result.status = "Partial Error"
+            result.error = data["error"]
             if "not found" in data["error"].lower():
-                result["status"] = "Not Found"
-                result["not_found"] = True
-                result["status_text"] = "Not on Swiggy"
+                result.status = "Not Found"
+                result.not_found = True
+                result.status_text = "Not on Swiggy"
         else:
-            # Extract ID from URL
-            # Expected format: ...-rest12345 or ...-12345
-            import re
-
-            swiggy_id = "NA"
-            match = re.search(r"(\d+)$", url)
-            if match:
-                swiggy_id = match.group(1)
-
-            result["swiggy_id"] = swiggy_id
-            result["status_text"] = "On Swiggy"
-
-            result["status"] = "Completed"
-            # Join with newlines for Excel
-            result["promo_codes"] = ", ".join(
-                data.get("promo_codes", [])
-            )  # Kept for UI
-            result["promos"] = "\n".join(data.get("promo_codes", []))
-
-            # Formatted offer string for Excel
-            offer_str_parts = []
-            offer_items_data = data.get("offer_items", {})
-            for cat, items in offer_items_data.items():
-                items_str = ", ".join(items)
-                offer_str_parts.append(f"{cat}: {items_str}")
-
-            result["offer_items_formatted"] = "\n".join(offer_str_parts)
-            result["offer_items"] = " | ".join(offer_str_parts)
-
-            result["rating"] = data.get("rating", "")
-            result["total_ratings"] = data.get("total_ratings", "")
-            result["99_store_items"] = "\n".join(data.get("99_store_items", []))
-
-        # Prepare update data for frontend (keep it simple for UI)
-        # We send the full result dict to the UI, so the dynamic keys will be there too if we want
-        # But strictly for UI "items" state, we might just need the standard fields + offer_items dict
+            result.swiggy_id = swiggy_id
+            result.status_text = "On Swiggy"
+
+            result.status = "Completed"
+            result.fingerprint = data.get("fingerprint", "")
+            if data.get("unchanged"):
+                # Menu/offers/ratings identical to the last run; skip extraction
+                result.unchanged = True
+                result.extraction = ExtractionResult(**known["extraction"])
+            else:
+                # Keep the structured data; Excel/UI strings are rendered on demand
+                result.extraction = ExtractionResult.from_data(data)
+                if swiggy_id != "NA":
+                    menu_fingerprints.put(
+                        swiggy_id,
+                        result.fingerprint,
+                        result.extraction.to_dict(),
+                        EXTRACTOR_VERSION,
+                    )
 
         # update_data needs to be serializable and useful for the table
         update_data = {
-            "id": str(row.name),
+            "id": result.row_id,
             "status": "Completed",
-            "rating": result["rating"],
-            "total_ratings": result["total_ratings"],
-            "promo_codes": result["promo_codes"],
-            "items_99": result["99_store_items"],
-            "offer_items_display": result["offer_items"],  # This is the summary string
-            "offer_items": data.get("offer_items", {}),
-            "status_text": result.get("status_text", "Processing"),
-            "swiggy_id": result.get("swiggy_id", "NA"),
-            "swiggy_url": result["swiggy_url"],
+            **result.extraction.to_ui(),
+            "status_text": result.status_text,
+            "swiggy_id": result.swiggy_id,
+            "swiggy_url": result.swiggy_url,
+            "unchanged": result.unchanged,
         }
 
         await job["queue"].put(
@@ -264,50 +286,133 @@ async def process_row(row, job_id: str):
         )
 
     except Exception as e:
-        result["status"] = "Error"
-        result["error"] = str(e)
+        result.status = "Error"
+        result.error = str(e)
+        await job["queue"].put(
+            {
+                "type": "update",
+                "data": {"id": result.row_id, "status": "Error", "error": str(e)},
+            }
+        )
+
+    return result
+
+
+def requeues_exhausted(result: RowResult) -> bool:
+    """
+    True once a re-queued row has hit a captcha on more than MAX_REQUEUES
+    searches. Attempts the open circuit rejected without searching don't
+    count, so rows queued behind a long outage are not failed for it.
+    """
+    return result.requeues > MAX_REQUEUES
+
+
+async def give_up_requeue(result: RowResult, job_id: str):
+    # Report it like any other captcha miss
+    result.requeue = False
+    result.status = "Not Found"
+    result.not_found = True
+    result.status_text = "Not on Swiggy"
+    job = jobs.get(job_id)
+    if job:
         await job["queue"].put(
             {
                 "type": "update",
-                "data": {"id": str(row.name), "status": "Error", "error": str(e)},
+                "data": {
+                    "id": result.row_id,
+                    "status": "Failed",
+                    "error": result.error,
+                },
             }
         )
 
+
+async def process_row_with_requeue(
+    result: RowResult, job_id: str, semaphore=None, slot_held=False
+):
+    """
+    Run process_row, re-queuing the row while the search circuit is open
+    instead of failing it. The semaphore slot is held only while the row
+    runs and is released while it waits for the cooldown; slot_held means
+    the caller already acquired it for the first attempt.
+    """
+    while True:
+        if semaphore is not None and not slot_held:
+            await semaphore.acquire()
+        try:
+            await process_row(result, job_id)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+            slot_held = False
+
+        if not result.requeue or requeues_exhausted(result):
+            break
+        await search_circuit.wait_until_ready()
+
+    if result.requeue:
+        await give_up_requeue(result, job_id)
     return result
 
 
-async def run_bulk_job(job_id: str, df: pd.DataFrame):
+async def run_bulk_job(job_id: str, df: "pd.DataFrame"):
     job = jobs[job_id]
-    semaphore = asyncio.Semaphore(5)  # Concurrency limit
 
-    async def sem_task(row):
-        async with semaphore:
-            return await process_row(row, job_id)
+    # One compact RowResult per row; the index is the row id used by the UI
+    rows = [
+        RowResult(str(idx), name, location)
+        for idx, name, location in zip(
+            df.index, df["Restaurant Name"], df["Location"]
+        )
+    ]
 
-    tasks = []
-    # Convert rows to dicts but keep index for ID
-    for idx, row in df.iterrows():
-        row_with_id = row.to_dict()
-        row_with_id["name"] = idx  # Use index as ID
-        # Pass the Series object to allow .name access or construct a dict
-        # Better: construct a dict with index attached
-        row_series = row.copy()
-        row_series.name = idx
-        tasks.append(sem_task(row_series))
-
-    results = await asyncio.gather(*tasks)
-
-    # Save results
-    job["results"] = pd.DataFrame(results)
+    job_queue = get_job_queue()
+    if job_queue is not None:
+        results = await run_rows_on_queue(
+            job_queue, job_id, rows, job["queue"], ROW_CONCURRENCY
+        )
+    elif BULK_WORKER_PROCESSES > 1:
+        results = await get_worker_pool().run_rows(job_id, rows, job["queue"])
+    else:
+        semaphore = asyncio.Semaphore(ROW_CONCURRENCY)
+        results = await asyncio.gather(
+            *(process_row_with_requeue(row, job_id, semaphore) for row in rows)
+        )
+
+    # Save results column-wise; a DataFrame is only built on download
+    job["results"] = ResultTable.from_rows(results)
     job["status"] = "completed"
     await job["queue"].put({"type": "complete"})
 
 
+def get_worker_pool() -> BulkWorkerPool:
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = BulkWorkerPool(BULK_WORKER_PROCESSES, ROW_CONCURRENCY)
+    return _worker_pool
+
+
+def shutdown_worker_pool():
+    """
+    Stop the worker processes, if any were started (called on app shutdown).
+    """
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown()
+        _worker_pool = None
+
+
 @router.post("/upload")
-async def upload_csv(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_csv(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    deltas_only: bool = False,
+):
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Invalid file type")
 
+    import pandas as pd
+
     contents = await file.read()
     try:
         df = pd.read_csv(io.BytesIO(contents))
@@ -331,6 +436,8 @@ async def upload_csv(background_tasks: BackgroundTasks, file: UploadFile = File(
         "total": len(df),
         "results": None,
         "queue": asyncio.Queue(),
+        # Download only rows whose menu/offers/ratings changed since last run
+        "deltas_only": deltas_only,
     }
 
     # Start background task
@@ -378,63 +485,7 @@ async def download_results(job_id: str):
         raise HTTPException(status_code=400, detail="Job not ready or found")
 
     # Prepare final DataFrame for Excel export
-    final_df = job["results"].copy()
-
-    # Handle missing columns if job failed early
-    for col in ["status_text", "swiggy_id", "promos", "offer_items_formatted"]:
-        if col not in final_df.columns:
-            final_df[col] = ""
-
-    # Map status_text for Not Found items if not already set correctly in process_row error flow
-    # (In process_row we only set it for success/dineout, need to ensure error cases have it)
-    def get_status(row):
-        if row.get("status_text"):
-            return row.get("status_text")
-        if row.get("not_found"):
-            return "Not on Swiggy"
-        return "Not on Swiggy"  # Default fallback for errors
-
-    # Just ensure the column exists and populate if empty
-    final_df["status_text"] = final_df.apply(
-        lambda x: x["status_text"]
-        if x.get("status_text")
-        else ("Not on Swiggy" if x.get("not_found") else "Error"),
-        axis=1,
-    )
-
-    # Rename columns to match requirements
-    final_df = final_df.rename(
-        columns={
-            "Restaurant Name": "Restaurant Name",
-            "Location": "Location",
-            "swiggy_id": "Swiggy Restaurant ID",
-            "status_text": "Status",
-            "promos": "Promos",
-            "offer_items_formatted": "Offer Items",
-            "rating": "Rating",
-            "total_ratings": "Total Ratings",
-            "99_store_items": "99 Store Items",
-            "dineout_only": "Dineout Only",
-        }
-    )
-    print(final_df.columns)
-
-    # Select only required columns
-    cols_to_keep = [
-        "Restaurant Name",
-        "Location",
-        "Swiggy Restaurant ID",
-        "Status",
-        "Promos",
-        "Offer Items",
-        "Rating",
-        "Total Ratings",
-        "99 Store Items",
-    ]
-    # Filter only existing columns to be safe
-    cols_to_keep = [c for c in cols_to_keep if c in final_df.columns]
-
-    final_df = final_df[cols_to_keep]
+    final_df = job["results"].to_export_dataframe(job.get("deltas_only", False))
 
     stream = io.BytesIO()
     # Use xlsxwriter or default (openpyxl)
@@ -10,10 +10,9 @@ sys.path.append(
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from app.services.extract_service import SwiggyExtractService
+from app.services.extract_service import get_extract_service
 
 router = APIRouter()
-extract_service = SwiggyExtractService()
 
 
 class ExtractRequest(BaseModel):
@@ -30,7 +29,7 @@ class ExtractResponse(BaseModel):
 
 @router.post("/extract", response_model=ExtractResponse)
 async def extract_data(request: ExtractRequest):
-    result = await extract_service.extract_data(request.url)
+    result = await get_extract_service().extract_data(request.url)
 
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from app.services.rate_limiter import rate_limiter
+from app.services.fingerprint import fingerprint_rotator
+from app.services.circuit_breaker import search_circuit
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Per-host request rates/throttling and fingerprint block rates for this process.
+    """
+    return {
+        "rate_limits": rate_limiter.stats(),
+        "fingerprints": fingerprint_rotator.stats(),
+        "search_circuit": search_circuit.stats(),
+    }
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Dict
+from fastapi import APIRouter, UploadFile, File, WebSocket, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.websockets import WebSocketDisconnect
+from app.services.ocr_service import get_ocr_service
+
+router = APIRouter()
+
+# In-memory store for OCR jobs
+# Structure: job_id -> { "status": str, "filename": str, "pages": list, "queue": asyncio.Queue }
+ocr_jobs: Dict[str, dict] = {}
+
+
+def spool_upload(job_id: str, file: UploadFile) -> str:
+    """
+    Copy an upload to its own temp directory, under its own name (which the
+    page names are derived from); Poppler renders from a path.
+    """
+    pdf_path = os.path.join(
+        tempfile.mkdtemp(prefix=f"ocr_{job_id}_"), os.path.basename(file.filename)
+    )
+    file.file.seek(0)
+    with open(pdf_path, "wb") as f:
+        shutil.copyfileobj(file.file, f)
+    return pdf_path
+
+
+def discard_upload(pdf_path: str):
+    os.remove(pdf_path)
+    os.rmdir(os.path.dirname(pdf_path))
+
+
+@router.post("/upload")
+async def upload_pdf(file: UploadFile = File(...)):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Invalid file type")
+
+    job_id = str(uuid.uuid4())
+
+    # Disk I/O off the event loop
+    pdf_path = await run_in_threadpool(spool_upload, job_id, file)
+
+    job = {
+        "status": "queued",
+        "filename": file.filename,
+        "pages": [],
+        "error": None,
+        "queue": asyncio.Queue(),
+    }
+
+    service = get_ocr_service()
+    try:
+        service.submit(job, pdf_path)
+    except asyncio.QueueFull:
+        await run_in_threadpool(discard_upload, pdf_path)
+        raise HTTPException(
+            status_code=503,
+            detail="OCR queue is full, try again later",
+            headers={"Retry-After": "30"},
+        )
+
+    ocr_jobs[job_id] = job
+    return {"job_id": job_id, "status": "queued", "queued": service.queued()}
+
+
+async def websocket_endpoint(websocket: WebSocket, job_id: str):
+    await websocket.accept()
+
+    job = ocr_jobs.get(job_id)
+    if not job:
+        await websocket.close(code=4004, reason="Job not found")
+        return
+
+    try:
+        while True:
+            # Wait for message from queue
+            msg = await job["queue"].get()
+            await websocket.send_json(msg)
+
+            if msg["type"] in ("complete", "error"):
+                break
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/results/{job_id}")
+async def get_results(job_id: str):
+    """
+    Pages finished so far (all of them once status is "completed").
+    """
+    job = ocr_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job_id,
+        "filename": job["filename"],
+        "status": job["status"],
+        "error": job["error"],
+        "pages": job["pages"],
+    }
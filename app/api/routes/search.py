@@ -10,10 +10,10 @@ sys.path.append(
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.search_service import SwiggySearchService
+from app.services.search_service import get_search_service
+from app.services.circuit_breaker import search_circuit
 
 router = APIRouter()
-search_service = SwiggySearchService()
 
 
 class SearchRequest(BaseModel):
@@ -30,9 +30,19 @@ class SearchResponse(BaseModel):
 
 @router.post("/search", response_model=SearchResponse)
 async def search_restaurant(request: SearchRequest):
-    result = await search_service.find_restaurant_url(request.name, request.location)
+    result = await get_search_service().find_restaurant_url(
+        request.name, request.location
+    )
 
     # Check if result is a dict (new format) or str (legacy fallback, though we updated service)
+    if isinstance(result, dict) and result.get("retry"):
+        # Search backend is throttling us; tell the client when to come back
+        raise HTTPException(
+            status_code=503,
+            detail=result.get("error") or "Search temporarily unavailable",
+            headers={"Retry-After": str(int(search_circuit.retry_after()) or 60)},
+        )
+
     if isinstance(result, dict):
         response = SearchResponse()
         response.url = result.get("url")
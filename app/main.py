@@ -5,11 +5,20 @@ import os
 # This handles both running as module (python -m app.main) and running script directly (python app/main.py)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import search, extract, bulk
+from app.api.routes import search, extract, bulk, metrics, ocr
 
-app = FastAPI(title="Swiggy Scraper API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Bulk worker processes don't outlive the API
+    bulk.shutdown_worker_pool()
+
+
+app = FastAPI(title="Swiggy Scraper API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,9 +31,12 @@ app.add_middleware(
 app.include_router(search.router, prefix="/api/v1", tags=["Search"])
 app.include_router(extract.router, prefix="/api/v1", tags=["Extract"])
 app.include_router(bulk.router, prefix="/api/v1/bulk", tags=["Bulk"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
+app.include_router(ocr.router, prefix="/api/v1/ocr", tags=["OCR"])
 
 # Websocket route directly on app to avoid router prefix issues
 app.add_api_websocket_route("/api/v1/bulk/ws/{job_id}", bulk.websocket_endpoint)
+app.add_api_websocket_route("/api/v1/ocr/ws/{job_id}", ocr.websocket_endpoint)
 
 
 @app.get("/")
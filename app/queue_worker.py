@@ -0,0 +1,177 @@
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+from typing import Dict, List
+
+from app.services.job_queue import RedisJobQueue
+from app.services.bulk_results import RowResult
+from app.services.circuit_breaker import search_circuit
+
+# A lease must outlive a full search + extraction with retries
+VISIBILITY_TIMEOUT = 600
+POLL_INTERVAL = 1.0
+
+
+async def _call(queue, method: str, *args):
+    # Redis calls block on the network; keep them off the event loop
+    fn = getattr(queue, method)
+    if queue.is_local:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+class _QueuePublisher:
+    """
+    Stands in for a job's asyncio.Queue on a scraper node and publishes UI
+    updates back through the shared queue.
+    """
+
+    def __init__(self, queue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    async def put(self, msg: dict):
+        await _call(self.queue, "publish", self.job_id, msg)
+
+
+async def run_node(
+    queue,
+    row_concurrency: int = 5,
+    visibility_timeout: float = VISIBILITY_TIMEOUT,
+    stop_event: asyncio.Event = None,
+):
+    """
+    Pull rows from the shared queue and process them until stop_event is set.
+    Each row is acked only after process_row returns, so a crashed node's rows
+    are picked up again once their lease expires (at-least-once). Rows the
+    search circuit turns away are released back to the queue with a delay of
+    the remaining cooldown rather than waited on while leased.
+
+    bulk.jobs entries this node creates for rows of other processes' jobs are
+    dropped again when its last row of that job finishes.
+    """
+    from app.api.routes import bulk
+
+    rows_per_job: Dict[str, int] = {}
+    created = set()
+
+    async def handle(job_id: str, item_id: str, payload: dict):
+        row = RowResult.from_dict(payload)
+        try:
+            await bulk.process_row(row, job_id)
+        except Exception as e:
+            row.status = "Error"
+            row.error = str(e)
+
+        if row.requeue:
+            if not bulk.requeues_exhausted(row):
+                # Hand the lease back for the cooldown instead of holding
+                # it (and this slot) while the circuit is open
+                delay = max(POLL_INTERVAL, search_circuit.retry_after())
+                await _call(queue, "release", job_id, item_id, row.to_dict(), delay)
+                return
+            await bulk.give_up_requeue(row, job_id)
+        await _call(queue, "ack", job_id, item_id, row.to_dict())
+
+    async def node_slot():
+        while not (stop_event and stop_event.is_set()):
+            item = await _call(queue, "reserve", visibility_timeout)
+            if item is None:
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+
+            job_id, item_id, payload = item
+            if job_id not in bulk.jobs:
+                bulk.jobs[job_id] = {
+                    "status": "processing",
+                    "queue": _QueuePublisher(queue, job_id),
+                }
+                created.add(job_id)
+            rows_per_job[job_id] = rows_per_job.get(job_id, 0) + 1
+
+            try:
+                await handle(job_id, item_id, payload)
+            finally:
+                rows_per_job[job_id] -= 1
+                if not rows_per_job[job_id]:
+                    # Last row of the job on this node; a released row that
+                    # comes back later gets a fresh entry
+                    del rows_per_job[job_id]
+                    if job_id in created:
+                        created.discard(job_id)
+                        bulk.jobs.pop(job_id, None)
+
+    await asyncio.gather(*(node_slot() for _ in range(row_concurrency)))
+
+
+async def run_rows_on_queue(
+    queue, job_id: str, rows: List, ws_queue: asyncio.Queue, row_concurrency: int = 5
+) -> List[RowResult]:
+    """
+    API side of a queued job: enqueue rows, relay progress from whichever
+    nodes pick them up, and return the results in input order.
+    """
+    payloads = [row.to_dict() for row in rows]
+    item_ids = await _call(queue, "push", job_id, payloads)
+
+    # The in-process backend has no external nodes, so pull rows here
+    stop_event = asyncio.Event()
+    local_node = None
+    if queue.is_local:
+        local_node = asyncio.create_task(
+            run_node(queue, row_concurrency, stop_event=stop_event)
+        )
+
+    try:
+        while True:
+            for msg in await _call(queue, "pop_events", job_id):
+                await ws_queue.put(msg)
+
+            completed, total = await _call(queue, "progress", job_id)
+            if completed >= total:
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+
+        for msg in await _call(queue, "pop_events", job_id):
+            await ws_queue.put(msg)
+
+        results = await _call(queue, "results", job_id)
+        return [RowResult.from_dict(results[item_id]) for item_id in item_ids]
+    finally:
+        stop_event.set()
+        if local_node:
+            await local_node
+        await _call(queue, "delete", job_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scraper node: process bulk-job rows from a shared queue"
+    )
+    parser.add_argument(
+        "--queue",
+        "-q",
+        type=str,
+        default=os.environ.get("BULK_QUEUE_URL", ""),
+        help="Redis URL of the shared queue (defaults to $BULK_QUEUE_URL)",
+    )
+    parser.add_argument(
+        "--concurrency", "-c", type=int, default=5, help="Rows processed at once"
+    )
+    args = parser.parse_args()
+
+    if not args.queue.startswith(("redis://", "rediss://", "unix://")):
+        parser.error("A Redis queue URL is required (e.g. redis://localhost:6379/0)")
+
+    queue = RedisJobQueue(args.queue)
+    print(f"Scraper node pulling from {args.queue} ({args.concurrency} slots)...")
+    asyncio.run(run_node(queue, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
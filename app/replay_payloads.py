@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add the project root directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import csv
+import json
+import time
+
+from app.services.extract_service import SwiggyExtractService
+from app.services.payload_archive import PayloadArchive
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("PAYLOAD_ARCHIVE_DIR") or "data/payload_archive"
+
+OUTPUT_COLUMNS = [
+    "restaurant_id",
+    "url",
+    "captured_at",
+    "promo_codes",
+    "99_store_items",
+    "offer_items",
+    "rating",
+    "total_ratings",
+    "fingerprint",
+]
+
+
+def replay(archive: PayloadArchive, output_file: str, latest_only: bool = False) -> int:
+    """
+    Re-run the extractors over every archived payload and write one CSV row
+    per payload (or per restaurant with latest_only). No network access.
+    """
+    service = SwiggyExtractService()
+    records = archive.records()
+    if latest_only:
+        latest = {}
+        for record in records:
+            key = record.get("restaurant_id") or record.get("url")
+            if key not in latest or record["captured_at"] >= latest[key]["captured_at"]:
+                latest[key] = record
+        records = latest.values()
+
+    count = 0
+    with open(output_file, mode="w", encoding="utf-8", newline="") as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+        for record in records:
+            data = service.extract_payload(record["payload"])
+            writer.writerow(
+                {
+                    "restaurant_id": record.get("restaurant_id", ""),
+                    "url": record.get("url", ""),
+                    "captured_at": record.get("captured_at", ""),
+                    "promo_codes": json.dumps(data["promo_codes"], ensure_ascii=False),
+                    "99_store_items": json.dumps(
+                        data["99_store_items"], ensure_ascii=False
+                    ),
+                    "offer_items": json.dumps(data["offer_items"], ensure_ascii=False),
+                    "rating": data["rating"],
+                    "total_ratings": data["total_ratings"],
+                    "fingerprint": data["fingerprint"],
+                }
+            )
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-run the extractors over archived DAPI payloads"
+    )
+    parser.add_argument(
+        "--archive",
+        "-a",
+        type=str,
+        default=DEFAULT_ARCHIVE_DIR,
+        help="Archive directory (defaults to $PAYLOAD_ARCHIVE_DIR)",
+    )
+    parser.add_argument(
+        "--output", "-o", type=str, default="replayed.csv", help="Output CSV"
+    )
+    parser.add_argument(
+        "--latest",
+        action="store_true",
+        help="Only replay the most recent payload of each restaurant",
+    )
+    args = parser.parse_args()
+
+    archive = PayloadArchive(args.archive)
+    if not archive.archive_files():
+        parser.error(f"No archived payloads found in {args.archive}")
+
+    start = time.perf_counter()
+    count = replay(archive, args.output, args.latest)
+    print(
+        f"Replayed {count} payloads in {time.perf_counter() - start:.1f}s. "
+        f"Saved to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
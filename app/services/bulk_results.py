@@ -0,0 +1,247 @@
+from typing import Dict, Iterable, List
+
+
+class ExtractionResult:
+    """
+    Structured data extracted for one restaurant. The lists/dict are stored
+    once; the Excel and UI string forms are rendered only when exported/sent.
+    """
+
+    __slots__ = ("promo_codes", "items_99", "offer_items", "rating", "total_ratings")
+
+    def __init__(
+        self, promo_codes=None, items_99=None, offer_items=None, rating="", total_ratings=""
+    ):
+        self.promo_codes = promo_codes or []
+        self.items_99 = items_99 or []
+        self.offer_items = offer_items or {}
+        self.rating = rating
+        self.total_ratings = total_ratings
+
+    @classmethod
+    def from_data(cls, data: dict) -> "ExtractionResult":
+        """
+        Build from SwiggyExtractService.extract_data() output.
+        """
+        return cls(
+            promo_codes=data.get("promo_codes", []),
+            items_99=data.get("99_store_items", []),
+            offer_items=data.get("offer_items", {}),
+            rating=data.get("rating", ""),
+            total_ratings=data.get("total_ratings", ""),
+        )
+
+    def _offer_parts(self) -> List[str]:
+        return [f"{cat}: {', '.join(items)}" for cat, items in self.offer_items.items()]
+
+    # Excel forms (one entry per line)
+    @property
+    def promos_text(self) -> str:
+        return "\n".join(self.promo_codes)
+
+    @property
+    def offer_items_text(self) -> str:
+        return "\n".join(self._offer_parts())
+
+    @property
+    def items_99_text(self) -> str:
+        return "\n".join(self.items_99)
+
+    # UI forms
+    @property
+    def promo_codes_summary(self) -> str:
+        return ", ".join(self.promo_codes)
+
+    @property
+    def offer_items_summary(self) -> str:
+        return " | ".join(self._offer_parts())
+
+    def to_ui(self) -> dict:
+        """
+        Fields the bulk table shows, without duplicating the structured lists.
+        """
+        return {
+            "rating": self.rating,
+            "total_ratings": self.total_ratings,
+            "promo_codes": self.promo_codes_summary,
+            "items_99": self.items_99,
+            "offer_items": self.offer_items,
+        }
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+EMPTY_EXTRACTION = ExtractionResult()
+
+
+class RowResult:
+    """
+    Result of one bulk-job row. Uses __slots__ so a large job holds one small
+    fixed-size object per row instead of a pandas Series copy.
+    """
+
+    __slots__ = (
+        "row_id",
+        "name",
+        "location",
+        "status",
+        "status_text",
+        "swiggy_id",
+        "swiggy_url",
+        "dineout_only",
+        "not_found",
+        "error",
+        "extraction",
+        "fingerprint",
+        "unchanged",
+        "requeue",
+        "requeues",
+    )
+
+    # Attribute -> export column (same names the job DataFrame always had)
+    COLUMNS = {
+        "name": "Restaurant Name",
+        "location": "Location",
+        "status": "status",
+        "status_text": "status_text",
+        "swiggy_id": "swiggy_id",
+        "swiggy_url": "swiggy_url",
+        "dineout_only": "dineout_only",
+        "not_found": "not_found",
+        "error": "error",
+        "fingerprint": "fingerprint",
+        "unchanged": "unchanged",
+    }
+
+    # Export column -> ExtractionResult attribute/property, rendered on export
+    EXTRACTION_COLUMNS = {
+        "promos": "promos_text",
+        "promo_codes": "promo_codes_summary",
+        "offer_items_formatted": "offer_items_text",
+        "offer_items": "offer_items_summary",
+        "rating": "rating",
+        "total_ratings": "total_ratings",
+        "99_store_items": "items_99_text",
+    }
+
+    def __init__(self, row_id: str, name="", location=""):
+        self.row_id = row_id
+        self.name = name
+        self.location = location
+        # Searches that hit a captcha; survives reset() across attempts
+        self.requeues = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Clear everything but the input, e.g. before a re-queued attempt.
+        """
+        self.status = ""
+        self.status_text = "Processing"
+        self.swiggy_id = "NA"
+        self.swiggy_url = ""
+        self.dineout_only = False
+        self.not_found = False
+        self.error = None
+        self.extraction = EMPTY_EXTRACTION
+        self.fingerprint = ""
+        self.unchanged = False
+        self.requeue = False
+
+    def to_dict(self) -> dict:
+        data = {slot: getattr(self, slot) for slot in self.__slots__}
+        data["extraction"] = self.extraction.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RowResult":
+        result = cls(data["row_id"])
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(result, slot, data[slot])
+        if isinstance(result.extraction, dict):
+            result.extraction = ExtractionResult(**result.extraction)
+        return result
+
+
+# Result column -> header of the downloaded Excel sheet, in sheet order
+EXPORT_COLUMNS = {
+    "Restaurant Name": "Restaurant Name",
+    "Location": "Location",
+    "swiggy_id": "Swiggy Restaurant ID",
+    "status_text": "Status",
+    "promos": "Promos",
+    "offer_items_formatted": "Offer Items",
+    "rating": "Rating",
+    "total_ratings": "Total Ratings",
+    "99_store_items": "99 Store Items",
+}
+
+
+class ResultTable:
+    """
+    Column-oriented store for finished rows: one list per export column.
+    Only turned into a DataFrame when the results are downloaded.
+    """
+
+    def __init__(self):
+        self.row_ids: List[str] = []
+        self.columns: Dict[str, list] = {
+            column: [] for column in RowResult.COLUMNS.values()
+        }
+        self.extractions: List[ExtractionResult] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[RowResult]) -> "ResultTable":
+        table = cls()
+        for row in rows:
+            table.append(row)
+        return table
+
+    def append(self, row: RowResult):
+        self.row_ids.append(row.row_id)
+        for attr, column in RowResult.COLUMNS.items():
+            self.columns[column].append(getattr(row, attr))
+        self.extractions.append(row.extraction)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def to_dataframe(self, columns=None):
+        """
+        Build a DataFrame of the given result columns (default: all of them).
+        Extraction columns are rendered only if requested.
+        """
+        import pandas as pd
+
+        if columns is None:
+            columns = list(self.columns) + list(RowResult.EXTRACTION_COLUMNS)
+
+        data = {}
+        for column in columns:
+            if column in self.columns:
+                data[column] = self.columns[column]
+            elif column in RowResult.EXTRACTION_COLUMNS:
+                attr = RowResult.EXTRACTION_COLUMNS[column]
+                data[column] = [getattr(e, attr) for e in self.extractions]
+        return pd.DataFrame(data, index=self.row_ids)
+
+    def to_export_dataframe(self, deltas_only: bool = False):
+        """
+        The downloadable sheet: EXPORT_COLUMNS renamed to their headers, with
+        a status for rows that never got one. Column-wise only, no per-row
+        Python calls, so it stays fast for very large jobs.
+        """
+        df = self.to_dataframe(list(EXPORT_COLUMNS) + ["not_found", "unchanged"])
+        if deltas_only:
+            df = df[~df["unchanged"].astype(bool)]
+
+        # Rows that errored before a status was set
+        status = df["status_text"].fillna("")
+        fallback = df["not_found"].astype(bool).map(
+            {True: "Not on Swiggy", False: "Error"}
+        )
+        df["status_text"] = status.where(status != "", fallback)
+
+        return df[list(EXPORT_COLUMNS)].rename(columns=EXPORT_COLUMNS)
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold captchas/blocks within window_seconds and
+    rejects traffic for cooldown_seconds. After the cooldown a single probe
+    request is let through (half-open): success closes the circuit, another
+    failure re-opens it for a full cooldown.
+
+    on_open(breaker), if set, is called whenever this breaker opens on its
+    own failures, e.g. to relay the trip to other processes via trip().
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        window_seconds: float = 60,
+        cooldown_seconds: float = 300,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._failures = deque()
+        self.times_opened = 0
+        self.rejected = 0
+        self.on_open = None
+
+    def _refresh(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        True if a request may go out now. In half-open state only the first
+        caller gets through until its outcome is recorded.
+        """
+        self._refresh()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def is_ready(self) -> bool:
+        """
+        Like allow() but without taking the half-open probe slot.
+        """
+        self._refresh()
+        return self.state == self.CLOSED or (
+            self.state == self.HALF_OPEN and not self.probe_in_flight
+        )
+
+    def retry_after(self) -> float:
+        self._refresh()
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.probe_in_flight = False
+        self._failures.clear()
+
+    def release_probe(self):
+        """
+        The request ended without telling us anything (e.g. a network error);
+        let the next caller probe instead.
+        """
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN:
+            self._open(now)
+            return
+
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window_seconds:
+            self._failures.popleft()
+        if self.state == self.CLOSED and len(self._failures) >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.probe_in_flight = False
+        self._failures.clear()
+        self.times_opened += 1
+        print(f"Circuit '{self.name}' opened for {self.cooldown_seconds}s")
+        if self.on_open:
+            self.on_open(self)
+
+    def trip(self, retry_after: float):
+        """
+        Open for retry_after seconds because the same backend tripped a
+        breaker elsewhere (another worker process). Does not call on_open.
+        """
+        if self.state == self.OPEN and self.retry_after() >= retry_after:
+            return
+        self.state = self.OPEN
+        self.opened_at = time.monotonic() - (self.cooldown_seconds - retry_after)
+        self.probe_in_flight = False
+        self._failures.clear()
+        print(f"Circuit '{self.name}' opened for {retry_after:.0f}s by another worker")
+
+    async def wait_until_ready(self, poll_interval: float = 1.0):
+        """
+        Sleep through the cooldown (and any in-flight half-open probe).
+        """
+        while not self.is_ready():
+            await asyncio.sleep(max(poll_interval, self.retry_after()))
+
+    def stats(self) -> dict:
+        retry_after = self.retry_after()
+        return {
+            "state": self.state,
+            "retry_after_s": round(retry_after, 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+# Search backends; DuckDuckGo is the only one the search phase uses today
+search_circuit = CircuitBreaker("duckduckgo.com")
@@ -1,7 +1,32 @@
-from playwright.async_api import async_playwright
 import asyncio
 import ast
+import hashlib
+import json
 import re
+from functools import lru_cache
+from app.services.session_manager import session_manager
+from app.services.fingerprint import BLOCK_STATUSES, fingerprint_rotator
+from app.services.rate_limiter import rate_limiter
+from app.services.payload_archive import payload_archive
+
+
+# Words that say nothing about which restaurant a page is for: stopwords,
+# common restaurant-name words and the words of Swiggy's own page titles
+# ("Order Food Online from India's Best Food Delivery Service | Swiggy")
+GENERIC_NAME_WORDS = {
+    "and", "the", "for", "from", "with", "near", "india", "indias",
+    "best", "food", "foods", "kitchen", "cafe", "restaurant", "restaurants",
+    "hotel", "bar", "house", "order", "online", "delivery", "service",
+    "swiggy", "dineout", "instamart", "book", "table",
+}
+
+
+def _words(text):
+    return [word for word in re.split(r"[^a-z0-9]+", text.lower()) if word]
+
+# Bump whenever an extractor or ExtractionResult changes, so extractions
+# stored with menu fingerprints are recomputed instead of reused
+EXTRACTOR_VERSION = 1
 
 
 class SwiggyExtractService:
@@ -19,6 +44,57 @@ class SwiggyExtractService:
 
         return True
 
+    def is_not_found_html(self, html: str) -> bool:
+        """
+        Check server-rendered HTML for Swiggy's 'Not Found' indicators.
+        """
+        if not html:
+            return True
+
+        title_match = re.search(r"<title[^>]*>(.*?)</title>", html, re.I | re.S)
+        if title_match:
+            title_lower = title_match.group(1).strip().lower()
+            if title_lower in ["page not found", "movie not found"]:
+                return True
+
+        if "Sorry! This should not have happened" in html:
+            return True
+
+        return False
+
+    def dineout_html_status(self, html: str, restaurant_id: str = "", name: str = ""):
+        """
+        Classify a server-rendered dineout page. Swiggy soft-404s with HTTP 200,
+        so the absence of not-found markers proves nothing on its own.
+
+        Returns:
+            False if the page carries a not-found marker, True only with a
+            positive marker for this restaurant (its ID in the embedded page
+            data, or its name in the title), None if the HTML is just the app
+            shell and the page has to be rendered to tell.
+        """
+        if self.is_not_found_html(html):
+            return False
+
+        if restaurant_id and re.search(
+            rf'"(?:id|restaurantId|resId)"\s*:\s*"?{re.escape(restaurant_id)}\b', html
+        ):
+            return True
+
+        # The title names the restaurant only if every distinctive word of the
+        # name is in it; generic words also fill Swiggy's shell title
+        title_match = re.search(r"<title[^>]*>(.*?)</title>", html, re.I | re.S)
+        title_words = set(_words(title_match.group(1))) if title_match else set()
+        tokens = [
+            token
+            for token in _words(name or "")
+            if len(token) > 2 and token not in GENERIC_NAME_WORDS
+        ]
+        if tokens and all(token in title_words for token in tokens):
+            return True
+
+        return None
+
     def extract_offers(self, response_data):
         try:
             offers = []
@@ -151,6 +227,46 @@ class SwiggyExtractService:
         except Exception:
             return {"avgRatingString": "", "totalRatingsString": ""}
 
+    def extract_availability(self, response_data) -> dict:
+        """
+        Work out whether the restaurant exists for delivery from a DAPI menu payload.
+        The menu payload carries a Restaurant card only when the outlet page is live.
+        """
+        availability = {"restaurant_found": False, "restaurant_id": ""}
+        try:
+            if not response_data:
+                return availability
+
+            # A non-zero status code is Swiggy's "Uh-oh!" page in JSON form
+            if isinstance(response_data, dict) and response_data.get("statusCode", 0):
+                return availability
+
+            def find_restaurant_recursive(data):
+                if isinstance(data, dict):
+                    if (
+                        data.get("@type")
+                        == "type.googleapis.com/swiggy.presentation.food.v2.Restaurant"
+                    ):
+                        info = data.get("info", {})
+                        if info.get("id") or info.get("name"):
+                            availability["restaurant_found"] = True
+                            availability["restaurant_id"] = str(info.get("id", ""))
+                            return True
+
+                    for k, v in data.items():
+                        if find_restaurant_recursive(v):
+                            return True
+                elif isinstance(data, list):
+                    for item in data:
+                        if find_restaurant_recursive(item):
+                            return True
+                return False
+
+            find_restaurant_recursive(response_data)
+            return availability
+        except Exception:
+            return {"restaurant_found": False, "restaurant_id": ""}
+
     def extract_offer_items(self, response_data) -> dict:
         try:
             offer_items = {}
@@ -205,11 +321,79 @@ class SwiggyExtractService:
         except Exception:
             return {}
 
-    async def extract_data(self, url: str) -> dict:
+    def payload_fingerprint(self, response_data) -> str:
+        """
+        Content hash of the parts of a DAPI payload the extractors read: Dish
+        cards, offers and the Restaurant card's ratings, under the current
+        EXTRACTOR_VERSION. Tracking ids, widget layout and other volatile
+        fields do not change it. Returns "" when there is no payload.
+        """
+        if not response_data:
+            return ""
+
+        dishes, offers, ratings = [], [], []
+
+        def collect(data):
+            if isinstance(data, dict):
+                card_type = data.get("@type")
+                if card_type == "type.googleapis.com/swiggy.presentation.food.v2.Dish":
+                    dishes.append(data.get("info", {}))
+                elif (
+                    card_type
+                    == "type.googleapis.com/swiggy.presentation.food.v2.Restaurant"
+                ):
+                    info = data.get("info", {})
+                    ratings.append(
+                        [info.get("avgRatingString"), info.get("totalRatingsString")]
+                    )
+                for k, v in data.items():
+                    if k == "offers":
+                        offers.append(v)
+                    collect(v)
+            elif isinstance(data, list):
+                for item in data:
+                    collect(item)
+
+        collect(response_data)
+
+        # Same dish can appear in several sections; order is not content
+        canonical = [
+            EXTRACTOR_VERSION,
+            sorted({json.dumps(d, sort_keys=True, default=str) for d in dishes}),
+            sorted({json.dumps(o, sort_keys=True, default=str) for o in offers}),
+            ratings[:1],
+        ]
+        return hashlib.sha256(
+            json.dumps(canonical, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    def extract_payload(self, response_data, fingerprint: str = None) -> dict:
+        """
+        Run every extractor over one captured DAPI payload. Used for live
+        scrapes and for replaying archived payloads.
+        """
+        ratings = self.extract_ratings(response_data)
+        return {
+            "promo_codes": self.extract_offers(response_data),
+            "99_store_items": self.extract_99_items(response_data),
+            "offer_items": self.extract_offer_items(response_data),
+            "rating": ratings.get("avgRatingString", ""),
+            "total_ratings": ratings.get("totalRatingsString", ""),
+            "fingerprint": fingerprint or self.payload_fingerprint(response_data),
+        }
+
+    async def extract_data(self, url: str, known_fingerprint: str = None) -> dict:
+        """
+        Scrape and extract one restaurant. If the payload's fingerprint equals
+        known_fingerprint, extraction is skipped and {"unchanged": True,
+        "fingerprint": ...} is returned instead.
+        """
         if not self.is_swiggy_restaurant_url(url):
             return {"error": "Invalid Swiggy URL"}
 
-        transaction_state = {"current_response": None}
+        from playwright.async_api import async_playwright
+
+        transaction_state = {"current_response": None, "blocked": False}
 
         async def handle_response(response):
             if response.request.resource_type in [
@@ -220,6 +404,8 @@ class SwiggyExtractService:
             ]:
                 return
 
+            if "swiggy.com" in response.url and response.status in BLOCK_STATUSES:
+                transaction_state["blocked"] = True
             if "swiggy.com/dapi/" in response.url and response.status == 200:
                 try:
                     # response.json() is async in async_playwright
@@ -234,20 +420,17 @@ class SwiggyExtractService:
                     args=["--disable-blink-features=AutomationControlled"],
                 )
 
-                context = await browser.new_context(
-                    user_agent=(
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0.0.0 Safari/537.36"
-                    ),
-                    locale="en-IN",
-                    timezone_id="Asia/Kolkata",
-                    viewport={"width": 1366, "height": 768},
+                profile = fingerprint_rotator.acquire()
+                context, state_path = await session_manager.new_context(
+                    browser,
+                    profile_id=profile["id"],
+                    **fingerprint_rotator.context_options(profile),
                 )
 
                 page = await context.new_page()
                 page.on("response", handle_response)
 
+                await rate_limiter.acquire(url)
                 await page.goto(url, wait_until="networkidle", timeout=60000)
                 await asyncio.sleep(4)  # Increased for stability under load
 
@@ -268,22 +451,36 @@ class SwiggyExtractService:
                     await browser.close()
                     return {"error": "Restaurant not found (Extraction Phase)"}
 
+                # Only an explicit block counts against the profile
+                fingerprint_rotator.report(
+                    profile, blocked=transaction_state["blocked"]
+                )
+                if transaction_state["current_response"]:
+                    await session_manager.save(context, state_path, profile["id"])
+
                 await browser.close()
 
-            offers = self.extract_offers(transaction_state["current_response"])
-            items_99 = self.extract_99_items(transaction_state["current_response"])
-            offer_items = self.extract_offer_items(
-                transaction_state["current_response"]
-            )
-            ratings = self.extract_ratings(transaction_state["current_response"])
+            if payload_archive.enabled:
+                # Compression + file I/O stay off the event loop
+                await asyncio.to_thread(
+                    payload_archive.write, url, transaction_state["current_response"]
+                )
+
+            fingerprint = self.payload_fingerprint(transaction_state["current_response"])
+            if known_fingerprint and fingerprint == known_fingerprint:
+                return {"unchanged": True, "fingerprint": fingerprint}
 
-            return {
-                "promo_codes": offers,
-                "99_store_items": items_99,
-                "offer_items": offer_items,
-                "rating": ratings.get("avgRatingString", ""),
-                "total_ratings": ratings.get("totalRatingsString", ""),
-            }
+            return self.extract_payload(
+                transaction_state["current_response"], fingerprint
+            )
 
         except Exception as e:
             return {"error": str(e)}
+
+
+@lru_cache(maxsize=None)
+def get_extract_service() -> SwiggyExtractService:
+    """
+    Shared service instance, created on first use.
+    """
+    return SwiggyExtractService()
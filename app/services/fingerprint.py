@@ -0,0 +1,152 @@
+import csv
+import hashlib
+import os
+import random
+from typing import Optional
+
+
+# HTTP statuses a blocked client gets instead of the page
+BLOCK_STATUSES = (403, 429)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class FingerprintRotator:
+    """
+    Hands out browser fingerprint profiles (user-agent, viewport, locale) built
+    from data/user_agents.tsv and tracks how often each one gets blocked.
+
+    A profile is always the same combination for a given user-agent. Only
+    desktop user-agents are used: mobile emulation gets DuckDuckGo's and
+    Swiggy's mobile layouts, which the scrapers' selectors are not written
+    for. Profiles whose block/captcha rate goes above max_block_rate are
+    retired.
+    """
+
+    _current_dir = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_DATA_PATH = os.path.join(_current_dir, "../../data/user_agents.tsv")
+
+    DESKTOP_VIEWPORTS = [
+        {"width": 1366, "height": 768},
+        {"width": 1440, "height": 900},
+        {"width": 1536, "height": 864},
+        {"width": 1920, "height": 1080},
+    ]
+    LOCALES = ["en-IN", "en-GB", "en-US"]
+
+    def __init__(
+        self,
+        data_path: str = DEFAULT_DATA_PATH,
+        min_samples: int = 10,
+        max_block_rate: float = 0.3,
+    ):
+        self.data_path = data_path
+        self.min_samples = min_samples
+        self.max_block_rate = max_block_rate
+        self._profiles = None
+
+    @property
+    def profiles(self) -> list:
+        # Loaded on first use so importing the services stays cheap
+        if self._profiles is None:
+            self._profiles = [
+                self._build_profile(ua) for ua in self._load_user_agents()
+            ]
+        return self._profiles
+
+    def _load_user_agents(self) -> list:
+        user_agents = []
+        try:
+            with open(self.data_path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f, delimiter="\t"):
+                    ua = (row.get("User Agents") or "").strip()
+                    if self._is_mobile(ua):
+                        continue
+                    if ua and ua not in user_agents:
+                        user_agents.append(ua)
+        except FileNotFoundError:
+            print(f"Warning: {self.data_path} not found, using default user-agent.")
+
+        return user_agents or [DEFAULT_USER_AGENT]
+
+    @staticmethod
+    def _is_mobile(user_agent: str) -> bool:
+        return any(m in user_agent for m in ("Mobile", "Android", "iPhone", "iPad"))
+
+    def _build_profile(self, user_agent: str) -> dict:
+        # Derive viewport/locale from the UA itself so the pairing is stable
+        digest = hashlib.md5(user_agent.encode("utf-8")).hexdigest()
+        seed = int(digest, 16)
+        viewports = self.DESKTOP_VIEWPORTS
+
+        return {
+            # Keys the profile's saved browser sessions
+            "id": digest[:12],
+            "user_agent": user_agent,
+            "viewport": viewports[seed % len(viewports)],
+            "locale": self.LOCALES[(seed // len(viewports)) % len(self.LOCALES)],
+            "timezone_id": "Asia/Kolkata",
+            "uses": 0,
+            "blocks": 0,
+            "retired": False,
+        }
+
+    def acquire(self) -> dict:
+        """
+        Pick a healthy profile, favouring the least used ones.
+        """
+        healthy = [p for p in self.profiles if not p["retired"]]
+        if not healthy:
+            # Everything got retired; give all profiles a fresh start
+            for p in self.profiles:
+                p["uses"], p["blocks"], p["retired"] = 0, 0, False
+            healthy = self.profiles
+
+        least_used = min(p["uses"] for p in healthy)
+        profile = random.choice([p for p in healthy if p["uses"] == least_used])
+        profile["uses"] += 1
+        return profile
+
+    def context_options(self, profile: Optional[dict] = None) -> dict:
+        """
+        Keyword arguments for browser.new_context() for the given profile.
+        """
+        profile = profile or self.acquire()
+        return {
+            "user_agent": profile["user_agent"],
+            "viewport": profile["viewport"],
+            "locale": profile["locale"],
+            "timezone_id": profile["timezone_id"],
+        }
+
+    def report(self, profile: dict, blocked: bool):
+        """
+        Record the outcome of a visit made with this profile.
+        """
+        if blocked:
+            profile["blocks"] += 1
+
+        if profile["uses"] >= self.min_samples:
+            if profile["blocks"] / profile["uses"] > self.max_block_rate:
+                profile["retired"] = True
+                print(f"Retiring fingerprint profile: {profile['user_agent']}")
+
+    def stats(self) -> list:
+        return [
+            {
+                "user_agent": p["user_agent"],
+                "uses": p["uses"],
+                "blocks": p["blocks"],
+                "block_rate": round(p["blocks"] / p["uses"], 3) if p["uses"] else 0.0,
+                "retired": p["retired"],
+            }
+            for p in (self._profiles or [])
+        ]
+
+
+# Shared so block rates are tracked across search and extraction
+fingerprint_rotator = FingerprintRotator()
@@ -0,0 +1,283 @@
+import json
+import os
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class InMemoryJobQueue:
+    """
+    Single-process job queue with visibility timeouts.
+
+    Reserved items become visible again if they are not acked before their
+    deadline, so every row is processed at least once even if a worker dies.
+    Results are keyed by item id, so a duplicate ack just overwrites them.
+    """
+
+    is_local = True
+
+    def __init__(self):
+        self._pending = deque()  # (job_id, item_id)
+        self._inflight: Dict[Tuple[str, str], float] = {}  # -> deadline
+        self._payloads: Dict[str, Dict[str, dict]] = {}
+        self._results: Dict[str, Dict[str, dict]] = {}
+        self._events: Dict[str, List[dict]] = {}
+
+    def push(self, job_id: str, payloads: List[dict]) -> List[str]:
+        item_ids = []
+        job_payloads = self._payloads.setdefault(job_id, {})
+        self._results.setdefault(job_id, {})
+        for payload in payloads:
+            item_id = uuid.uuid4().hex
+            job_payloads[item_id] = payload
+            self._pending.append((job_id, item_id))
+            item_ids.append(item_id)
+        return item_ids
+
+    def reserve(self, visibility_timeout: float) -> Optional[Tuple[str, str, dict]]:
+        self.requeue_expired()
+        while self._pending:
+            job_id, item_id = self._pending.popleft()
+            if item_id in self._results.get(job_id, {}):
+                continue  # Already acked by another worker
+            self._inflight[(job_id, item_id)] = time.time() + visibility_timeout
+            return job_id, item_id, self._payloads[job_id][item_id]
+        return None
+
+    def ack(self, job_id: str, item_id: str, result: dict):
+        self._inflight.pop((job_id, item_id), None)
+        if job_id in self._results:
+            self._results[job_id][item_id] = result
+
+    def release(self, job_id: str, item_id: str, payload: dict, delay: float = 0):
+        """
+        Hand a reserved item back unprocessed (with an updated payload); it is
+        reserved again after delay seconds.
+        """
+        if (job_id, item_id) not in self._inflight or job_id not in self._payloads:
+            return
+        self._payloads[job_id][item_id] = payload
+        self._inflight[(job_id, item_id)] = time.time() + delay
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        expired = [key for key, deadline in self._inflight.items() if deadline <= now]
+        for key in expired:
+            del self._inflight[key]
+            self._pending.append(key)
+        return len(expired)
+
+    def progress(self, job_id: str) -> Tuple[int, int]:
+        """
+        Returns (completed, total) for a job.
+        """
+        return len(self._results.get(job_id, {})), len(self._payloads.get(job_id, {}))
+
+    def results(self, job_id: str) -> Dict[str, dict]:
+        return dict(self._results.get(job_id, {}))
+
+    def publish(self, job_id: str, msg: dict):
+        if job_id in self._payloads:
+            self._events.setdefault(job_id, []).append(msg)
+
+    def pop_events(self, job_id: str) -> List[dict]:
+        return self._events.pop(job_id, [])
+
+    def delete(self, job_id: str):
+        for store in (self._payloads, self._results, self._events):
+            store.pop(job_id, None)
+
+
+class RedisJobQueue:
+    """
+    Job queue shared by several scraper nodes through Redis (or any server
+    speaking the Redis protocol with Lua scripting, e.g. KeyDB/Valkey).
+
+    Keys (all under `prefix`):
+      pending               LIST  "job_id:item_id" waiting to be reserved
+      inflight              ZSET  "job_id:item_id" scored by visibility deadline
+      payload:{job_id}      HASH  item_id -> JSON row
+      results:{job_id}      HASH  item_id -> JSON result
+      events:{job_id}       LIST  JSON progress messages for the API process
+
+    Acks and progress messages for a job whose payload hash is gone (deleted
+    by the API) are dropped, so late nodes can't recreate its keys.
+    """
+
+    is_local = False
+
+    # Move expired in-flight items back to pending, then reserve one atomically
+    _RESERVE_SCRIPT = """
+    local pending, inflight = KEYS[1], KEYS[2]
+    local now, deadline = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local expired = redis.call('ZRANGEBYSCORE', inflight, '-inf', now)
+    for _, member in ipairs(expired) do
+        redis.call('ZREM', inflight, member)
+        redis.call('RPUSH', pending, member)
+    end
+    local member = redis.call('LPOP', pending)
+    if not member then
+        return false
+    end
+    redis.call('ZADD', inflight, deadline, member)
+    return member
+    """
+
+    # Store a result only while the job still exists; always end the lease
+    _ACK_SCRIPT = """
+    local payload, results, inflight = KEYS[1], KEYS[2], KEYS[3]
+    local item_id, result, member = ARGV[1], ARGV[2], ARGV[3]
+    redis.call('ZREM', inflight, member)
+    if redis.call('HEXISTS', payload, item_id) == 0 then
+        return 0
+    end
+    redis.call('HSET', results, item_id, result)
+    return 1
+    """
+
+    # Append a progress message only while the job still exists
+    _PUBLISH_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    return redis.call('RPUSH', KEYS[2], ARGV[1])
+    """
+
+    def __init__(self, url: str, prefix: str = "swiggy:bulk"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "RedisJobQueue requires the 'redis' package (pip install redis)"
+            )
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._reserve = self.client.register_script(self._RESERVE_SCRIPT)
+        self._ack = self.client.register_script(self._ACK_SCRIPT)
+        self._publish = self.client.register_script(self._PUBLISH_SCRIPT)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def push(self, job_id: str, payloads: List[dict]) -> List[str]:
+        item_ids = [uuid.uuid4().hex for _ in payloads]
+        if not item_ids:
+            return []
+
+        pipe = self.client.pipeline()
+        pipe.hset(
+            self._key("payload", job_id),
+            mapping={
+                item_id: json.dumps(payload)
+                for item_id, payload in zip(item_ids, payloads)
+            },
+        )
+        pipe.rpush(self._key("pending"), *(f"{job_id}:{i}" for i in item_ids))
+        pipe.execute()
+        return item_ids
+
+    def reserve(self, visibility_timeout: float) -> Optional[Tuple[str, str, dict]]:
+        while True:
+            now = time.time()
+            member = self._reserve(
+                keys=[self._key("pending"), self._key("inflight")],
+                args=[now, now + visibility_timeout],
+            )
+            if not member:
+                return None
+
+            job_id, item_id = member.rsplit(":", 1)
+            if self.client.hexists(self._key("results", job_id), item_id):
+                # Already acked by another node after its lease expired
+                self.client.zrem(self._key("inflight"), member)
+                continue
+
+            payload = self.client.hget(self._key("payload", job_id), item_id)
+            if payload is None:
+                # Job was deleted while the item was queued
+                self.client.zrem(self._key("inflight"), member)
+                continue
+            return job_id, item_id, json.loads(payload)
+
+    def ack(self, job_id: str, item_id: str, result: dict):
+        self._ack(
+            keys=[
+                self._key("payload", job_id),
+                self._key("results", job_id),
+                self._key("inflight"),
+            ],
+            args=[item_id, json.dumps(result), f"{job_id}:{item_id}"],
+        )
+
+    def release(self, job_id: str, item_id: str, payload: dict, delay: float = 0):
+        """
+        Hand a reserved item back unprocessed; reserve() picks it up again
+        once the shortened lease runs out after delay seconds.
+        """
+        if not self.client.hexists(self._key("payload", job_id), item_id):
+            return  # Job deleted meanwhile
+        pipe = self.client.pipeline()
+        pipe.hset(self._key("payload", job_id), item_id, json.dumps(payload))
+        pipe.zadd(
+            self._key("inflight"),
+            {f"{job_id}:{item_id}": time.time() + delay},
+            xx=True,
+        )
+        pipe.execute()
+
+    def requeue_expired(self) -> int:
+        # Expired leases are reclaimed atomically inside reserve()
+        return 0
+
+    def progress(self, job_id: str) -> Tuple[int, int]:
+        pipe = self.client.pipeline()
+        pipe.hlen(self._key("results", job_id))
+        pipe.hlen(self._key("payload", job_id))
+        completed, total = pipe.execute()
+        return completed, total
+
+    def results(self, job_id: str) -> Dict[str, dict]:
+        raw = self.client.hgetall(self._key("results", job_id))
+        return {item_id: json.loads(value) for item_id, value in raw.items()}
+
+    def publish(self, job_id: str, msg: dict):
+        self._publish(
+            keys=[self._key("payload", job_id), self._key("events", job_id)],
+            args=[json.dumps(msg)],
+        )
+
+    def pop_events(self, job_id: str) -> List[dict]:
+        pipe = self.client.pipeline()
+        pipe.lrange(self._key("events", job_id), 0, -1)
+        pipe.delete(self._key("events", job_id))
+        raw, _ = pipe.execute()
+        return [json.loads(msg) for msg in raw]
+
+    def delete(self, job_id: str):
+        self.client.delete(
+            self._key("payload", job_id),
+            self._key("results", job_id),
+            self._key("events", job_id),
+        )
+
+
+_job_queue = None
+
+
+def get_job_queue():
+    """
+    Shared queue selected by BULK_QUEUE_URL:
+      redis://host:6379/0  -> RedisJobQueue (rows pulled by scraper nodes)
+      memory://            -> InMemoryJobQueue (rows pulled by this process)
+    Returns None when unset, i.e. bulk jobs run without a queue.
+    """
+    global _job_queue
+    if _job_queue is None:
+        url = os.environ.get("BULK_QUEUE_URL", "")
+        if url.startswith("memory://"):
+            _job_queue = InMemoryJobQueue()
+        elif url:
+            _job_queue = RedisJobQueue(url)
+    return _job_queue
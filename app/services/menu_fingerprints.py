@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import time
+import uuid
+from typing import Optional
+
+
+class MenuFingerprintStore:
+    """
+    Last known DAPI content fingerprint per restaurant, stored together with
+    the extraction it produced.
+
+    One small JSON file per restaurant ID, written atomically, so worker
+    processes and queue nodes sharing the data directory never clobber each
+    other. When a re-scrape yields the same fingerprint, the stored
+    extraction is reused instead of running the extractors again. Records
+    carry the extractor version that produced them; a record from another
+    version is treated as missing.
+    """
+
+    _current_dir = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_STORE_DIR = os.path.join(_current_dir, "../../data/menu_fingerprints")
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = os.path.abspath(store_dir)
+
+    def _path(self, restaurant_id: str) -> Optional[str]:
+        # IDs come from URLs; anything but a plain ID has no stable key
+        if not restaurant_id or not re.fullmatch(r"\w+", str(restaurant_id)):
+            return None
+        return os.path.join(self.store_dir, f"{restaurant_id}.json")
+
+    def get(self, restaurant_id: str, extractor_version: int) -> Optional[dict]:
+        """
+        Returns {"fingerprint", "extraction", "extractor_version",
+        "updated_at"}, or None if there is no record for extractor_version.
+        """
+        path = self._path(restaurant_id)
+        if not path:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading menu fingerprint {path}: {e}")
+            return None
+        if record.get("extractor_version") != extractor_version:
+            return None  # Extracted by other code; run the extractors again
+        return record
+
+    def put(
+        self,
+        restaurant_id: str,
+        fingerprint: str,
+        extraction: dict,
+        extractor_version: int,
+    ):
+        path = self._path(restaurant_id)
+        if not path or not fingerprint:
+            return
+
+        record = {
+            "fingerprint": fingerprint,
+            "extraction": extraction,
+            "extractor_version": extractor_version,
+            "updated_at": time.time(),
+        }
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving menu fingerprint {path}: {e}")
+
+
+# Shared so every bulk job (and worker process) sees the same history
+menu_fingerprints = MenuFingerprintStore()
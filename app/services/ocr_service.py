@@ -0,0 +1,170 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+# The OCR pipeline lives in ocr/src and imports its modules as siblings
+_current_dir = os.path.dirname(os.path.abspath(__file__))
+OCR_SRC_DIR = os.path.abspath(os.path.join(_current_dir, "../../ocr/src"))
+
+
+class OCRService:
+    """
+    Runs OCR jobs inside the API process so the detector and recognizer stay
+    loaded between documents (see ocr/src/registry.py).
+
+    Uploaded documents wait in a bounded queue; `workers` documents are
+    processed at a time on a thread pool (the models release the GIL), and
+    each finished page is pushed to the job's message queue for the websocket.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_queued: int = 16,
+        model_path: Optional[str] = None,
+        backend: str = "torch",
+        threads: Optional[int] = None,
+        batch_size: int = 16,
+        cache_dir: Optional[str] = None,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.model_path = model_path
+        self.backend = backend
+        self.threads = threads
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self._pending: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks = []
+        self._pipelines = []
+        self._pipelines_lock = threading.Lock()
+
+    def queued(self) -> int:
+        return self._pending.qsize() if self._pending else 0
+
+    def _start(self):
+        if self._pending is not None:
+            return
+        self._pending = asyncio.Queue(maxsize=self.max_queued)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="ocr"
+        )
+        self._tasks = [
+            asyncio.create_task(self._worker(slot)) for slot in range(self.workers)
+        ]
+
+    def submit(self, job: dict, pdf_path: str):
+        """
+        Queue a document. pdf_path is a spooled upload and is deleted (with its
+        directory, if empty) once processed. Raises asyncio.QueueFull when the
+        queue is at capacity.
+        """
+        self._start()
+        self._pending.put_nowait((job, pdf_path))
+
+    def _pipeline(self, slot: int):
+        """
+        (process_document, detector, recognizer) for one worker slot. Imports
+        the OCR stack on first use only, so the API starts without it.
+        """
+        with self._pipelines_lock:
+            while len(self._pipelines) <= slot:
+                if OCR_SRC_DIR not in sys.path:
+                    sys.path.append(OCR_SRC_DIR)
+                from pipeline import process_document
+                from detector import FieldDetector
+                from recognizer import TextRecognizer
+
+                index = len(self._pipelines)
+                self._pipelines.append(
+                    (
+                        process_document,
+                        FieldDetector(
+                            self.model_path,
+                            self.backend,
+                            self.threads,
+                            replica=index,
+                            cache_dir=self.cache_dir,
+                        ),
+                        TextRecognizer(
+                            backend=self.backend,
+                            threads=self.threads,
+                            cache_dir=self.cache_dir,
+                        ),
+                    )
+                )
+            return self._pipelines[slot]
+
+    def _run(self, slot: int, pdf_path: str, on_page):
+        """
+        OCR one document. Raises (and the job is reported as an error) if the
+        PDF can't be read or any of its pages fails to render, rather than
+        completing with pages missing.
+        """
+        process_document, detector, recognizer = self._pipeline(slot)
+        results = process_document(
+            pdf_path,
+            detector,
+            recognizer,
+            output_dir=os.path.dirname(pdf_path),
+            batch_size=self.batch_size,
+            on_page=on_page,
+        )
+        if not results:
+            raise RuntimeError("No pages could be rendered from the PDF")
+        return results
+
+    async def _worker(self, slot: int):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, pdf_path = await self._pending.get()
+            job["status"] = "processing"
+            await job["queue"].put({"type": "status", "status": "processing"})
+
+            def on_page(page_data, job=job):
+                # Called from the worker thread
+                loop.call_soon_threadsafe(self._page_done, job, page_data)
+
+            try:
+                await loop.run_in_executor(
+                    self._executor, self._run, slot, pdf_path, on_page
+                )
+                job["status"] = "completed"
+                await job["queue"].put({"type": "complete"})
+            except Exception as e:
+                job["status"] = "error"
+                job["error"] = str(e)
+                await job["queue"].put({"type": "error", "error": str(e)})
+            finally:
+                try:
+                    os.remove(pdf_path)
+                    os.rmdir(os.path.dirname(pdf_path))  # only if left empty
+                except OSError:
+                    pass
+                self._pending.task_done()
+
+    @staticmethod
+    def _page_done(job: dict, page_data: dict):
+        job["pages"].append(page_data)
+        job["queue"].put_nowait({"type": "page", "data": page_data})
+
+
+@lru_cache(maxsize=None)
+def get_ocr_service() -> OCRService:
+    """
+    Shared service, configured from the environment on first use.
+    """
+    threads = os.environ.get("OCR_THREADS")
+    return OCRService(
+        workers=int(os.environ.get("OCR_WORKERS", "1")),
+        max_queued=int(os.environ.get("OCR_MAX_QUEUED", "16")),
+        model_path=os.environ.get("OCR_MODEL") or None,
+        backend=os.environ.get("OCR_BACKEND", "torch"),
+        threads=int(threads) if threads else None,
+        cache_dir=os.environ.get("OCR_CACHE_DIR") or None,
+    )
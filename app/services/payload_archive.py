@@ -0,0 +1,123 @@
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
+from typing import Iterator, Optional
+
+
+def _zstd():
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+class PayloadArchive:
+    """
+    Optional archive of raw DAPI payloads, so new fields can be extracted
+    later by replaying the archive instead of re-scraping.
+
+    Records are JSON lines ({"restaurant_id", "url", "captured_at",
+    "payload"}), each written as its own zstd frame (or gzip member when the
+    'zstandard' package is not installed). Both formats read back fine as a
+    concatenation, so files are simply appended to. Each process writes its
+    own daily file, so worker processes never interleave writes; within a
+    process, writes (which run on worker threads) are serialized by a lock.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None):
+        self.archive_dir = os.path.abspath(archive_dir) if archive_dir else None
+        self.written = 0
+        self._compressor = None
+        # The zstd compressor and the file append are not thread-safe
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.archive_dir is not None
+
+    def _path(self) -> str:
+        extension = "zst" if _zstd() else "gz"
+        day = time.strftime("%Y%m%d")
+        return os.path.join(
+            self.archive_dir, f"payloads-{day}-{os.getpid()}.jsonl.{extension}"
+        )
+
+    def _compress(self, data: bytes) -> bytes:
+        zstandard = _zstd()
+        if zstandard is None:
+            return gzip.compress(data)
+        if self._compressor is None:
+            self._compressor = zstandard.ZstdCompressor(level=10)
+        return self._compressor.compress(data)
+
+    def write(self, url: str, payload) -> bool:
+        """
+        Append one payload. No-op unless the archive is enabled.
+        """
+        if not self.enabled or not payload:
+            return False
+
+        match = re.search(r"(\d+)/?(?:\?.*)?$", url or "")
+        record = {
+            "restaurant_id": match.group(1) if match else "",
+            "url": url,
+            "captured_at": time.time(),
+            "payload": payload,
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            with self._lock:
+                with open(self._path(), "ab") as f:
+                    f.write(self._compress(line))
+                self.written += 1
+            return True
+        except Exception as e:
+            print(f"Error archiving payload for {url}: {e}")
+            return False
+
+    def archive_files(self) -> list:
+        if not self.archive_dir or not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(
+            os.path.join(self.archive_dir, name)
+            for name in os.listdir(self.archive_dir)
+            if name.endswith((".jsonl.zst", ".jsonl.gz"))
+        )
+
+    @staticmethod
+    def read_file(path: str) -> Iterator[dict]:
+        """
+        Yield the records of one archive file.
+        """
+        if path.endswith(".zst"):
+            zstandard = _zstd()
+            if zstandard is None:
+                raise RuntimeError(
+                    f"Reading {path} requires the 'zstandard' package (pip install zstandard)"
+                )
+            raw = open(path, "rb")
+            stream = zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True, closefd=True
+            )
+        else:
+            stream = gzip.open(path, "rb")
+
+        with io.TextIOWrapper(stream, encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    def records(self) -> Iterator[dict]:
+        for path in self.archive_files():
+            yield from self.read_file(path)
+
+
+# Enabled by setting PAYLOAD_ARCHIVE_DIR (e.g. data/payload_archive)
+payload_archive = PayloadArchive(os.environ.get("PAYLOAD_ARCHIVE_DIR") or None)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+# host suffix -> (requests per second, burst size)
+DEFAULT_LIMITS = {
+    "duckduckgo.com": (0.5, 2),
+    "swiggy.com": (2.0, 5),
+}
+
+
+class TokenBucket:
+    """
+    Token bucket that lets callers go into debt instead of spinning: each
+    acquire() reserves a token and sleeps until that token would have been
+    refilled, so waiters are released one by one at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self) -> float:
+        wait = self._reserve()
+        self.requests += 1
+        if wait > 0:
+            self.throttled += 1
+            self.total_wait += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_sync(self) -> float:
+        """
+        acquire() for synchronous callers (e.g. sync Playwright scripts).
+        """
+        wait = self._reserve()
+        self.requests += 1
+        if wait > 0:
+            self.throttled += 1
+            self.total_wait += wait
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "total_wait_s": round(self.total_wait, 2),
+            "queued": max(0, int(-self.tokens)),
+        }
+
+
+class HostRateLimiter:
+    """
+    Per-host token buckets shared by search, validation and extraction.
+
+    Limits come from DEFAULT_LIMITS and can be overridden with RATE_LIMITS,
+    e.g. RATE_LIMITS="duckduckgo.com=0.5:2,swiggy.com=2:5". Hosts without a
+    configured limit are not throttled.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        if limits is None:
+            limits = dict(DEFAULT_LIMITS)
+            limits.update(self._parse_limits(os.environ.get("RATE_LIMITS", "")))
+        self.buckets = {
+            host: TokenBucket(rate, burst) for host, (rate, burst) in limits.items()
+        }
+
+    @staticmethod
+    def _parse_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+        limits = {}
+        for entry in filter(None, (e.strip() for e in spec.split(","))):
+            try:
+                host, value = entry.split("=")
+                rate, burst = value.split(":")
+                rate, burst = float(rate), int(burst)
+                # A zero rate never refills and a burst below 1 never yields
+                if not rate > 0 or burst < 1:
+                    raise ValueError(entry)
+                limits[host.strip()] = (rate, burst)
+            except ValueError:
+                print(f"Ignoring invalid RATE_LIMITS entry: {entry}")
+        return limits
+
+    def split(self, parts: int) -> "HostRateLimiter":
+        """
+        Limiter with 1/parts of every host's rate and burst (a burst of at
+        least 1), for one of `parts` processes sharing this budget.
+        """
+        return HostRateLimiter(
+            {
+                host: (bucket.rate / parts, max(1.0, bucket.burst / parts))
+                for host, bucket in self.buckets.items()
+            }
+        )
+
+    def bucket_for(self, url: str) -> Optional[TokenBucket]:
+        host = urlparse(url).hostname or url
+        for suffix, bucket in self.buckets.items():
+            if host == suffix or host.endswith("." + suffix):
+                return bucket
+        return None
+
+    async def acquire(self, url: str) -> float:
+        """
+        Wait for a request slot to the URL's host. Returns seconds waited.
+        """
+        bucket = self.bucket_for(url)
+        if bucket is None:
+            return 0.0
+        return await bucket.acquire()
+
+    def acquire_sync(self, url: str) -> float:
+        bucket = self.bucket_for(url)
+        if bucket is None:
+            return 0.0
+        return bucket.acquire_sync()
+
+    def stats(self) -> dict:
+        return {host: bucket.stats() for host, bucket in self.buckets.items()}
+
+
+# Shared so every service draws from the same per-host budget
+rate_limiter = HostRateLimiter()
@@ -1,21 +1,16 @@
-from playwright.async_api import async_playwright
-from playwright_stealth.stealth import Stealth
 import asyncio
 import difflib
 import re
+from functools import lru_cache
 from pprint import pprint
+from app.services.extract_service import get_extract_service
+from app.services.session_manager import session_manager
+from app.services.fingerprint import BLOCK_STATUSES, fingerprint_rotator
+from app.services.rate_limiter import rate_limiter
+from app.services.circuit_breaker import search_circuit
 
 
 class SwiggySearchService:
-    import pandas as pd
-    import os
-
-    # List of realistic user-agents (update periodically)
-    _current_dir = os.path.dirname(os.path.abspath(__file__))
-    _data_path = os.path.join(_current_dir, "../../data/user_agents.tsv")
-
-    user_agents = pd.read_csv(_data_path, sep="\t")["User Agents"].tolist()
-
     async def handle_response(self, response) -> str:
         if response.request.resource_type in [
             "image",
@@ -72,11 +67,19 @@ class SwiggySearchService:
             return False
 
     async def find_restaurant_url(self, restaurant_name: str, location: str) -> dict:
+        # Playwright is only needed once a search actually runs
+        from playwright.async_api import async_playwright
+        from playwright_stealth.stealth import Stealth
+
         result = {
             "url": None,
             "dineout_only": False,
             "not_found": False,
             "error": None,
+            # True when the row should be re-queued rather than failed
+            "retry": False,
+            # False when the open circuit rejected the row without searching
+            "searched": True,
         }
         not_found_count = 0
 
@@ -84,6 +87,16 @@ class SwiggySearchService:
         candidate_url_str = None
 
         # --- PHASE 1: SEARCH (Using Stealth for DDG) ---
+        if not search_circuit.allow():
+            result["not_found"] = True
+            result["retry"] = True
+            result["searched"] = False
+            result["error"] = (
+                "Search paused after repeated captchas "
+                f"(retry in {search_circuit.retry_after():.0f}s)"
+            )
+            return result
+
         try:
             async with Stealth().use_async(async_playwright()) as p:
                 browser = await p.chromium.launch(
@@ -96,17 +109,20 @@ class SwiggySearchService:
                     ],
                 )
 
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1366, "height": 768},
-                    locale="en-IN",
-                    timezone_id="Asia/Kolkata",
+                # User-agent, viewport and locale come from the rotation engine
+                profile = fingerprint_rotator.acquire()
+                context, state_path = await session_manager.new_context(
+                    browser,
+                    profile_id=profile["id"],
+                    **fingerprint_rotator.context_options(profile),
                 )
 
                 try:
                     page = await context.new_page()
                     # page.on("response", self.handle_response) # Not needed for search phase really
 
+                    # One token per search (homepage + query submit)
+                    await rate_limiter.acquire("https://duckduckgo.com/")
                     await page.goto("https://duckduckgo.com/")
 
                     # Search Logic
@@ -132,14 +148,23 @@ class SwiggySearchService:
                     print("Links found:", len(links))
                     pprint(links)
                     if links:
+                        search_circuit.record_success()
+                        fingerprint_rotator.report(profile, blocked=False)
+                        await session_manager.save(context, state_path, profile["id"])
                         candidate_url_str = await self._process_links_and_get_url(
                             links, location, restaurant_name
                         )
                     else:
                         if await self._is_captcha_page(page):
+                            # Blocked session, don't hand it out again
+                            fingerprint_rotator.report(profile, blocked=True)
+                            session_manager.discard(state_path)
+                            search_circuit.record_failure()
                             result["error"] = "Captcha detected during search"
                             result["not_found"] = True
+                            result["retry"] = True
                             return result
+                        search_circuit.record_success()
                         result["not_found"] = True
                         result["error"] = "No search results found"
                         return result
@@ -148,6 +173,7 @@ class SwiggySearchService:
                     await browser.close()
 
         except Exception as e:
+            search_circuit.release_probe()
             result["error"] = f"Search Phase Error: {str(e)}"
             result["not_found"] = True
             return result
@@ -161,6 +187,19 @@ class SwiggySearchService:
         print(f"Candidate URL found: {candidate_url_str}")
 
         # --- PHASE 2: VALIDATION (Using Standard Playwright for Swiggy) ---
+        # The restaurant page fires a DAPI menu call; its payload tells us whether
+        # the outlet is live for delivery without waiting on the rendered page.
+        validation_state = {"menu_payloads": [], "blocked": False}
+
+        async def handle_menu_response(response):
+            if "swiggy.com" in response.url and response.status in BLOCK_STATUSES:
+                validation_state["blocked"] = True
+            if "swiggy.com/dapi/menu" in response.url and response.status == 200:
+                try:
+                    validation_state["menu_payloads"].append(await response.json())
+                except Exception:
+                    pass
+
         try:
             async with async_playwright() as p:
                 # Standard Launch (matching extract_service)
@@ -174,16 +213,19 @@ class SwiggySearchService:
                     ],
                 )
 
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1366, "height": 768},
-                    locale="en-IN",
-                    timezone_id="Asia/Kolkata",
+                # User-agent, viewport and locale come from the rotation engine
+                profile = fingerprint_rotator.acquire()
+                context, state_path = await session_manager.new_context(
+                    browser,
+                    profile_id=profile["id"],
+                    **fingerprint_rotator.context_options(profile),
                 )
                 try:
                     page = await context.new_page()
+                    page.on("response", handle_menu_response)
 
                     # Check Main URL
+                    await rate_limiter.acquire(candidate_url_str)
                     try:
                         await page.goto(
                             candidate_url_str, wait_until="networkidle", timeout=60000
@@ -191,32 +233,40 @@ class SwiggySearchService:
                     except Exception as e:
                         print(f"Navigation error: {e}")
 
-                    await asyncio.sleep(3)
-                    while not_found_count < 2:
-                        not_found_result = await self._is_not_found(page)
-                        if not not_found_result:
+                    # A missing menu payload alone may just be a missing
+                    # restaurant; only an explicit block counts against the profile
+                    blocked = validation_state["blocked"]
+                    if not blocked:
+                        blocked = await self._is_captcha_page(page)
+                    fingerprint_rotator.report(profile, blocked=blocked)
+
+                    if validation_state["menu_payloads"]:
+                        await session_manager.save(context, state_path, profile["id"])
+                        if self._is_delivery_available(validation_state["menu_payloads"]):
                             result["url"] = page.url
                             result["not_found"] = False
                             return result
-                        not_found_count += 1
-                        await page.reload()
-
-                    # Check Dineout
+                    else:
+                        # No menu payload captured, fall back to the rendered page
+                        await asyncio.sleep(3)
+                        while not_found_count < 2:
+                            not_found_result = await self._is_not_found(page)
+                            if not not_found_result:
+                                result["url"] = page.url
+                                result["not_found"] = False
+                                return result
+                            not_found_count += 1
+                            await rate_limiter.acquire(candidate_url_str)
+                            await page.reload()
+
+                    # Check Dineout with a single request instead of a second page load
                     base_url = candidate_url_str.rstrip("/")
                     dineout_url = f"{base_url}/dineout"
 
-                    try:
-                        await page.goto(
-                            dineout_url, wait_until="networkidle", timeout=60000
-                        )
-                    except Exception:
-                        pass
-
-                    await asyncio.sleep(3)
-
-                    not_found_dineout = await self._is_not_found(page)
-                    if not not_found_dineout:
-                        result["url"] = page.url
+                    if await self._probe_dineout(
+                        context, page, dineout_url, restaurant_name
+                    ):
+                        result["url"] = dineout_url
                         result["dineout_only"] = True
                         result["not_found"] = False
                         return result
@@ -235,6 +285,50 @@ class SwiggySearchService:
             result["not_found"] = True
             return result
 
+    def _is_delivery_available(self, menu_payloads) -> bool:
+        """
+        True if any captured DAPI menu payload carries the restaurant's metadata.
+        """
+        for payload in menu_payloads:
+            if get_extract_service().extract_availability(payload)["restaurant_found"]:
+                return True
+        return False
+
+    async def _probe_dineout(
+        self, context, page, dineout_url: str, restaurant_name: str
+    ) -> bool:
+        """
+        Fetch the dineout page over the context's request API (shares cookies,
+        skips rendering) and look for this restaurant in the server-rendered
+        HTML. If the HTML is only the app shell, render the page and check it
+        for not-found indicators instead.
+        """
+        match = re.search(r"(\d+)/dineout$", dineout_url)
+        restaurant_id = match.group(1) if match else ""
+
+        status = None
+        try:
+            await rate_limiter.acquire(dineout_url)
+            response = await context.request.get(dineout_url, timeout=15000)
+            if response.status != 200:
+                return False
+            status = get_extract_service().dineout_html_status(
+                await response.text(), restaurant_id, restaurant_name
+            )
+        except Exception:
+            pass
+        if status is not None:
+            return status
+
+        # Inconclusive: rendered-page check
+        try:
+            await rate_limiter.acquire(dineout_url)
+            await page.goto(dineout_url, wait_until="networkidle", timeout=60000)
+        except Exception:
+            pass
+        await asyncio.sleep(3)
+        return not await self._is_not_found(page)
+
     async def _process_links_and_get_url(self, links, location, restaurant_name) -> str:
         """
         Helper to select the best URL from search results.
@@ -370,3 +464,11 @@ class SwiggySearchService:
             return False
         except Exception:
             return False
+
+
+@lru_cache(maxsize=None)
+def get_search_service() -> SwiggySearchService:
+    """
+    Shared service instance, created on first use.
+    """
+    return SwiggySearchService()
@@ -0,0 +1,172 @@
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+
+class BrowserSessionManager:
+    """
+    Rotating set of warmed Playwright storage states (cookies + localStorage).
+
+    Contexts created through the manager start with the cookies of a previous
+    successful visit, so Swiggy and DuckDuckGo skip their first-visit bootstrap
+    requests and are less likely to show a captcha. Cookies about to expire
+    (often short-lived tracking/CSRF cookies) are left out when a state is
+    loaded; states that are too old, have no cookies left, or got blocked are
+    dropped and re-warmed on the next successful visit.
+
+    States are kept per fingerprint profile (profile_id), so cookies saved
+    under one user-agent are never replayed under another.
+    """
+
+    _current_dir = os.path.dirname(os.path.abspath(__file__))
+    DEFAULT_STATE_DIR = os.path.join(_current_dir, "../../data/sessions")
+
+    def __init__(
+        self,
+        state_dir: str = DEFAULT_STATE_DIR,
+        max_sessions: int = 4,
+        max_age_seconds: int = 6 * 60 * 60,
+        min_cookie_ttl_seconds: int = 15 * 60,
+    ):
+        self.state_dir = os.path.abspath(state_dir)
+        self.max_sessions = max_sessions
+        self.max_age_seconds = max_age_seconds
+        self.min_cookie_ttl_seconds = min_cookie_ttl_seconds
+        self._rotation = itertools.count()
+        # Serializes the max_sessions check with the write of a new slot
+        self._save_lock = threading.Lock()
+
+    def _profile_dir(self, profile_id: Optional[str] = None) -> str:
+        if not profile_id:
+            return self.state_dir
+        return os.path.join(self.state_dir, profile_id)
+
+    def _state_paths(self, profile_id: Optional[str] = None) -> list:
+        profile_dir = self._profile_dir(profile_id)
+        if not os.path.isdir(profile_dir):
+            return []
+        return sorted(
+            os.path.join(profile_dir, name)
+            for name in os.listdir(profile_dir)
+            if name.endswith(".json")
+        )
+
+    def load_state(self, state_path: str) -> Optional[dict]:
+        """
+        The saved storage state without cookies that expire within
+        min_cookie_ttl_seconds, or None if the state is too old, unreadable,
+        or has no cookies left.
+        """
+        try:
+            if time.time() - os.path.getmtime(state_path) > self.max_age_seconds:
+                return None
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception:
+            return None
+
+        deadline = time.time() + self.min_cookie_ttl_seconds
+        # -1 marks a session cookie, which lives as long as the context
+        cookies = [
+            cookie
+            for cookie in state.get("cookies", [])
+            if cookie.get("expires", -1) == -1 or cookie["expires"] >= deadline
+        ]
+        if not cookies:
+            return None
+        state["cookies"] = cookies
+        return state
+
+    def is_fresh(self, state_path: str) -> bool:
+        return self.load_state(state_path) is not None
+
+    def next_state(self, profile_id: Optional[str] = None) -> Optional[str]:
+        """
+        Round-robin over fresh states, deleting stale ones along the way.
+        Returns None when no warmed state is available (cold start).
+        """
+        fresh = []
+        for path in self._state_paths(profile_id):
+            if self.is_fresh(path):
+                fresh.append(path)
+            else:
+                self.discard(path)
+
+        if not fresh:
+            return None
+        return fresh[next(self._rotation) % len(fresh)]
+
+    async def new_context(
+        self, browser, profile_id: Optional[str] = None, **context_kwargs
+    ):
+        """
+        Create a context seeded with the next warmed state of the profile.
+        Returns (context, state_path); state_path is None for a cold context.
+        """
+        state_path = self.next_state(profile_id)
+        state = self.load_state(state_path) if state_path else None
+        if state:
+            try:
+                context = await browser.new_context(
+                    storage_state=state, **context_kwargs
+                )
+                return context, state_path
+            except Exception as e:
+                print(f"Error loading storage state {state_path}: {e}")
+                self.discard(state_path)
+
+        context = await browser.new_context(**context_kwargs)
+        return context, None
+
+    async def save(
+        self,
+        context,
+        state_path: Optional[str] = None,
+        profile_id: Optional[str] = None,
+    ):
+        """
+        Persist the context's cookies after a successful (non-blocked) visit.
+        Cold contexts fill a new slot of the profile while fewer than
+        max_sessions exist.
+        """
+        try:
+            state = await context.storage_state()
+        except Exception as e:
+            print(f"Error saving storage state: {e}")
+            return
+
+        # No awaits below, so concurrent rows can't both take the last slot
+        with self._save_lock:
+            if state_path is None:
+                if len(self._state_paths(profile_id)) >= self.max_sessions:
+                    return
+                profile_dir = self._profile_dir(profile_id)
+                os.makedirs(profile_dir, exist_ok=True)
+                state_path = os.path.join(profile_dir, f"{uuid.uuid4().hex}.json")
+
+            try:
+                tmp_path = f"{state_path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, state_path)
+            except Exception as e:
+                print(f"Error saving storage state: {e}")
+
+    def discard(self, state_path: Optional[str]):
+        """
+        Drop a state that is stale or got blocked so it is not handed out again.
+        """
+        if not state_path:
+            return
+        try:
+            os.remove(state_path)
+        except FileNotFoundError:
+            pass
+
+
+# Shared across services so search and extraction rotate through the same states
+session_manager = BrowserSessionManager()
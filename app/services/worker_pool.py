@@ -0,0 +1,338 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import deque
+from typing import Dict, List
+
+
+class _EventForwarder:
+    """
+    Stands in for a job's asyncio.Queue inside a worker process and forwards
+    UI updates to the API process.
+    """
+
+    def __init__(self, event_queue, job_id: str):
+        self.event_queue = event_queue
+        self.job_id = job_id
+
+    async def put(self, msg: dict):
+        self.event_queue.put({"job_id": self.job_id, "kind": "event", "msg": msg})
+
+
+def _worker_main(
+    worker_id: int,
+    task_queue,
+    control_queue,
+    event_queue,
+    row_concurrency: int,
+    processes: int,
+):
+    """
+    Entry point of a worker process: one event loop, its own browsers.
+    """
+    asyncio.run(
+        _worker_loop(
+            worker_id,
+            task_queue,
+            control_queue,
+            event_queue,
+            row_concurrency,
+            processes,
+        )
+    )
+
+
+def _share_limits(worker_id: int, control_queue, event_queue, processes: int):
+    """
+    Make this worker's rate limiter and circuit breakers behave as one budget
+    with the other workers: each gets 1/processes of every host's rate and
+    burst, and a breaker that opens here is relayed (through the API process)
+    to every other worker.
+    """
+    from app.services.circuit_breaker import search_circuit
+    from app.services.rate_limiter import rate_limiter
+
+    if processes > 1:
+        rate_limiter.buckets = rate_limiter.split(processes).buckets
+
+    loop = asyncio.get_running_loop()
+    circuits = {search_circuit.name: search_circuit}
+
+    def relay_open(breaker):
+        event_queue.put(
+            {
+                "kind": "circuit",
+                "worker": worker_id,
+                "name": breaker.name,
+                "retry_after": breaker.retry_after(),
+            }
+        )
+
+    def read_control():
+        while True:
+            msg = control_queue.get()
+            if msg is None:
+                break
+            try:
+                loop.call_soon_threadsafe(
+                    circuits[msg["name"]].trip, msg["retry_after"]
+                )
+            except RuntimeError:
+                break  # Worker loop already closed
+
+    for breaker in circuits.values():
+        breaker.on_open = relay_open
+    threading.Thread(target=read_control, daemon=True).start()
+
+
+async def _worker_loop(
+    worker_id: int,
+    task_queue,
+    control_queue,
+    event_queue,
+    row_concurrency: int,
+    processes: int,
+):
+    # Imported here so the worker gets its own service singletons
+    from app.api.routes import bulk
+
+    _share_limits(worker_id, control_queue, event_queue, processes)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(row_concurrency)
+    running = set()
+    rows_per_job: Dict[str, int] = {}
+
+    async def run_row(job_id, position, row):
+        # The slot taken below is handed over, so it is free during cooldowns
+        try:
+            await bulk.process_row_with_requeue(
+                row, job_id, semaphore, slot_held=True
+            )
+        except Exception as e:
+            row.status = "Error"
+            row.error = str(e)
+        finally:
+            rows_per_job[job_id] -= 1
+            if not rows_per_job[job_id]:
+                # Last row of the job on this worker
+                del rows_per_job[job_id]
+                bulk.jobs.pop(job_id, None)
+        event_queue.put(
+            {
+                "job_id": job_id,
+                "kind": "result",
+                "worker": worker_id,
+                "position": position,
+                "row": row,
+            }
+        )
+
+    while True:
+        await semaphore.acquire()
+        item = await loop.run_in_executor(None, task_queue.get)
+        if item is None:
+            semaphore.release()
+            break
+
+        job_id, position, row = item
+        if job_id not in bulk.jobs:
+            bulk.jobs[job_id] = {
+                "status": "processing",
+                "queue": _EventForwarder(event_queue, job_id),
+            }
+        rows_per_job[job_id] = rows_per_job.get(job_id, 0) + 1
+
+        task = asyncio.create_task(run_row(job_id, position, row))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    if running:
+        await asyncio.gather(*running)
+
+
+class BulkWorkerPool:
+    """
+    Spreads bulk-job rows across local worker processes.
+
+    Each worker has its own task queue and runs process_row on its own event
+    loop with up to row_concurrency rows in flight. The API process hands out
+    at most 2 * row_concurrency rows per worker, relays websocket updates and
+    collects the finished rows. Workers are checked every MONITOR_INTERVAL
+    seconds; if one dies (OOM, browser crash) the rows it held are failed and
+    a replacement is started, so the job still completes.
+
+    Together the workers stay within RATE_LIMITS (each gets 1/processes of
+    every host's budget), and a circuit breaker opening in one worker is
+    relayed to the others so they all pause.
+    """
+
+    MONITOR_INTERVAL = 1.0
+
+    def __init__(self, processes: int, row_concurrency: int = 5):
+        self.processes = processes
+        self.row_concurrency = row_concurrency
+        self._ctx = multiprocessing.get_context("spawn")
+        self._event_queue = None
+        # {"process": Process, "tasks": Queue, "control": Queue,
+        #  "assigned": {(job_id, position): row}}
+        self._workers: List[dict] = []
+        self._backlog = deque()  # (job_id, position, row) not handed out yet
+        self._reader = None
+        self._monitor = None
+        self._loop = None
+        # job_id -> {"results": list, "remaining": int, "done": Future, "queue": asyncio.Queue}
+        self._pending: Dict[str, dict] = {}
+
+    def _spawn(self, worker_id: int) -> dict:
+        tasks = self._ctx.Queue()
+        control = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                tasks,
+                control,
+                self._event_queue,
+                self.row_concurrency,
+                self.processes,
+            ),
+            daemon=True,
+        )
+        process.start()
+        return {"process": process, "tasks": tasks, "control": control, "assigned": {}}
+
+    def start(self):
+        if self._workers:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._event_queue = self._ctx.Queue()
+        self._workers = [self._spawn(i) for i in range(self.processes)]
+
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+        self._reader.start()
+        self._monitor = self._loop.create_task(self._watch_workers())
+
+    def _read_events(self):
+        # Blocking reads stay off the event loop; dispatch happens on the loop
+        while True:
+            event = self._event_queue.get()
+            if event is None:
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch, event)
+            except RuntimeError:
+                # Event loop already closed (API process shutting down)
+                break
+
+    def _feed(self):
+        # Bounded per worker, so a dead worker's rows are exactly known
+        while self._backlog:
+            worker = min(self._workers, key=lambda w: len(w["assigned"]))
+            if len(worker["assigned"]) >= self.row_concurrency * 2:
+                return
+            job_id, position, row = self._backlog.popleft()
+            worker["assigned"][(job_id, position)] = row
+            worker["tasks"].put((job_id, position, row))
+
+    def _dispatch(self, event: dict):
+        if event["kind"] == "circuit":
+            # Pause every other worker for the rest of the cooldown
+            for worker_id, worker in enumerate(self._workers):
+                if worker_id != event["worker"]:
+                    worker["control"].put(
+                        {"name": event["name"], "retry_after": event["retry_after"]}
+                    )
+            return
+
+        if event["kind"] == "result":
+            assigned = self._workers[event["worker"]]["assigned"]
+            if assigned.pop((event["job_id"], event["position"]), None) is None:
+                return  # Already failed when its worker was found dead
+            self._feed()
+            self._finish_row(event["job_id"], event["position"], event["row"])
+            return
+
+        pending = self._pending.get(event["job_id"])
+        if pending:
+            pending["queue"].put_nowait(event["msg"])
+
+    def _finish_row(self, job_id: str, position: int, row):
+        pending = self._pending.get(job_id)
+        if not pending:
+            return
+        pending["results"][position] = row
+        pending["remaining"] -= 1
+        if pending["remaining"] == 0:
+            del self._pending[job_id]
+            pending["done"].set_result(pending["results"])
+
+    async def _watch_workers(self):
+        while True:
+            await asyncio.sleep(self.MONITOR_INTERVAL)
+            for worker_id, worker in enumerate(self._workers):
+                process = worker["process"]
+                if process.is_alive():
+                    continue
+
+                lost = worker["assigned"]
+                print(
+                    f"Bulk worker {process.pid} exited (code {process.exitcode}); "
+                    f"failing its {len(lost)} rows and starting a replacement"
+                )
+                self._workers[worker_id] = self._spawn(worker_id)
+                for (job_id, position), row in lost.items():
+                    row.status = "Error"
+                    row.error = f"Worker process exited (code {process.exitcode})"
+                    pending = self._pending.get(job_id)
+                    if pending:
+                        pending["queue"].put_nowait(
+                            {
+                                "type": "update",
+                                "data": {
+                                    "id": row.row_id,
+                                    "status": "Error",
+                                    "error": row.error,
+                                },
+                            }
+                        )
+                    self._finish_row(job_id, position, row)
+            self._feed()
+
+    async def run_rows(self, job_id: str, rows: List, queue: asyncio.Queue) -> List:
+        """
+        Process rows in the worker processes and return results in input order.
+        Progress messages are relayed to the job's websocket queue.
+        """
+        self.start()
+        if not rows:
+            return []
+
+        done = self._loop.create_future()
+        self._pending[job_id] = {
+            "results": [None] * len(rows),
+            "remaining": len(rows),
+            "done": done,
+            "queue": queue,
+        }
+        self._backlog.extend(
+            (job_id, position, row) for position, row in enumerate(rows)
+        )
+        self._feed()
+
+        return await done
+
+    def shutdown(self):
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        for worker in self._workers:
+            worker["tasks"].put(None)
+            worker["control"].put(None)
+        for worker in self._workers:
+            worker["process"].join(timeout=30)
+        if self._reader:
+            self._event_queue.put(None)
+            self._reader.join(timeout=5)
+            self._reader = None
+        self._workers = []
@@ -0,0 +1,109 @@
+"""
+Benchmark: per-row memory and job-completion cost of bulk-job results.
+
+Compares the old representation (a copied pandas Series per row, turned into
+a DataFrame from a list of Series) with RowResult + ResultTable.
+
+    python bench_bulk_results.py [rows]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from app.services.bulk_results import ExtractionResult, RowResult, ResultTable
+
+
+def make_input(rows):
+    return pd.DataFrame(
+        {
+            "Restaurant Name": [f"Restaurant {i}" for i in range(rows)],
+            "Location": [f"Area {i % 50}" for i in range(rows)],
+        }
+    )
+
+
+EXTRACTED = {
+    "promo_codes": ["50% OFF | WELCOME50", "Flat 100 OFF"],
+    "99_store_items": ["Item | original price: 99.0 | final price: 99.0"],
+    "offer_items": {"Flat 50% Off": ["Pizza", "Pasta"]},
+    "rating": "4.4",
+    "total_ratings": "15K+ ratings",
+}
+
+
+def fill_status(result_setter):
+    result_setter("status", "Completed")
+    result_setter("status_text", "On Swiggy")
+    result_setter("swiggy_id", "123456")
+    result_setter("swiggy_url", "https://www.swiggy.com/restaurants/x-123456")
+
+
+def fill(result_setter):
+    fill_status(result_setter)
+    result_setter("promo_codes", "50% OFF | WELCOME50, Flat 100 OFF")
+    result_setter("promos", "50% OFF | WELCOME50\nFlat 100 OFF")
+    result_setter("offer_items_formatted", "Flat 50% Off: Pizza, Pasta")
+    result_setter("offer_items", "Flat 50% Off: Pizza, Pasta")
+    result_setter("rating", "4.4")
+    result_setter("total_ratings", "15K+ ratings")
+
+
+def old_representation(df):
+    results = []
+    for idx, row in df.iterrows():
+        result = row.copy()
+        result.name = idx
+        for key in ["status_text", "swiggy_id", "promos", "promo_codes"]:
+            result[key] = ""
+        fill(result.__setitem__)
+        result["99_store_items"] = "Item | original price: 99.0 | final price: 99.0"
+        results.append(result)
+    return results, lambda: pd.DataFrame(results)
+
+
+def new_representation(df):
+    results = []
+    for idx, name, location in zip(df.index, df["Restaurant Name"], df["Location"]):
+        result = RowResult(str(idx), name, location)
+        fill_status(lambda key, value: setattr(result, key, value))
+        result.extraction = ExtractionResult.from_data(EXTRACTED)
+        results.append(result)
+    return results, lambda: ResultTable.from_rows(results)
+
+
+def measure(label, build, df):
+    # Timing pass without tracemalloc (it slows pandas down heavily)
+    start = time.perf_counter()
+    results, complete = build(df)
+    built = time.perf_counter()
+    complete()
+    done = time.perf_counter()
+    del results, complete
+
+    # Memory pass: bytes still held once every row has finished
+    tracemalloc.start()
+    results, complete = build(df)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows = len(df)
+    print(
+        f"{label:<28} rows: {(built - start) * 1000:8.1f} ms  "
+        f"completion: {(done - built) * 1000:8.1f} ms  "
+        f"memory/row: {held / rows:8.0f} B"
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    df = make_input(rows)
+    print(f"Bulk-job results for {rows} rows")
+    measure("Series copy + DataFrame", old_representation, df)
+    measure("RowResult + ResultTable", new_representation, df)
+
+
+if __name__ == "__main__":
+    main()
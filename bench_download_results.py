@@ -0,0 +1,105 @@
+"""
+Benchmark: result normalization in download_results for large bulk jobs.
+
+Compares the old row-wise DataFrame.apply status mapping (plus column fill,
+rename and selection on the full frame) with ResultTable.to_export_dataframe().
+The Excel write itself is not timed; it is the same for both.
+
+    python bench_download_results.py [rows]
+"""
+
+import sys
+import time
+
+from app.services.bulk_results import ExtractionResult, RowResult, ResultTable
+
+EXTRACTED = ExtractionResult(
+    promo_codes=["50% OFF | WELCOME50", "Flat 100 OFF"],
+    items_99=["Item | original price: 99.0 | final price: 99.0"],
+    offer_items={"Flat 50% Off": ["Pizza", "Pasta"]},
+    rating="4.4",
+    total_ratings="15K+ ratings",
+)
+
+
+def make_table(rows):
+    table = ResultTable()
+    for i in range(rows):
+        row = RowResult(str(i), f"Restaurant {i}", f"Area {i % 50}")
+        if i % 10 == 0:
+            # Errored before any status was set
+            row.status_text = ""
+            row.status = "Error"
+        elif i % 3 == 0:
+            row.status_text = "Not on Swiggy"
+            row.not_found = True
+        else:
+            row.status_text = "On Swiggy"
+            row.swiggy_id = str(100000 + i)
+            row.extraction = EXTRACTED
+        table.append(row)
+    return table
+
+
+def old_export(table):
+    final_df = table.to_dataframe()
+
+    for col in ["status_text", "swiggy_id", "promos", "offer_items_formatted"]:
+        if col not in final_df.columns:
+            final_df[col] = ""
+
+    final_df["status_text"] = final_df.apply(
+        lambda x: x["status_text"]
+        if x.get("status_text")
+        else ("Not on Swiggy" if x.get("not_found") else "Error"),
+        axis=1,
+    )
+    final_df = final_df.rename(
+        columns={
+            "swiggy_id": "Swiggy Restaurant ID",
+            "status_text": "Status",
+            "promos": "Promos",
+            "offer_items_formatted": "Offer Items",
+            "rating": "Rating",
+            "total_ratings": "Total Ratings",
+            "99_store_items": "99 Store Items",
+            "dineout_only": "Dineout Only",
+        }
+    )
+    cols_to_keep = [
+        "Restaurant Name",
+        "Location",
+        "Swiggy Restaurant ID",
+        "Status",
+        "Promos",
+        "Offer Items",
+        "Rating",
+        "Total Ratings",
+        "99 Store Items",
+    ]
+    return final_df[[c for c in cols_to_keep if c in final_df.columns]]
+
+
+def new_export(table):
+    return table.to_export_dataframe()
+
+
+def measure(label, export, table):
+    start = time.perf_counter()
+    df = export(table)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:9.1f} ms")
+    return df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    table = make_table(rows)
+    print(f"download_results normalization for {rows} rows")
+    old = measure("apply(axis=1) + full frame", old_export, table)
+    new = measure("to_export_dataframe()", new_export, table)
+    assert old.reset_index(drop=True).equals(new.reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,163 +1,83 @@
-import pandas as pd
-import re
+import argparse
+import csv
+import os
 import time
 import random
-import numpy as np
-from concurrent.futures import ProcessPoolExecutor
-from playwright.sync_api import sync_playwright
+import multiprocessing
+from app.services.extract_service import get_extract_service
+from app.services.fingerprint import BLOCK_STATUSES, fingerprint_rotator
+from app.services.rate_limiter import rate_limiter
 
 INPUT_CSV = "restaurants_with_ids_for_agnostic_test.csv"
 OUTPUT_CSV = "output.csv"
 MAX_WORKERS = 4  # Adjust based on your CPU cores and memory
+BATCH_SIZE = 5  # Rows a worker takes at a time; small so no worker straggles
 
+RESULT_COLUMNS = ["promo_codes", "99_store_items", "rating", "total_ratings"]
+# A resumed row is reused only if these still match the input row
+KEY_COLUMNS = ["Restaurant Name", "swiggy res id"]
 
-def is_swiggy_restaurant_url(url: str) -> bool:
-    if not isinstance(url, str):
-        return False
-    return "swiggy.com" in url and "rest" in url
+# Same extractors as the API service
+_extractor = get_extract_service()
+is_swiggy_restaurant_url = _extractor.is_swiggy_restaurant_url
+extract_offers = _extractor.extract_offers
+extract_99_items = _extractor.extract_99_items
+extract_ratings = _extractor.extract_ratings
 
 
-def extract_offers(response_data):
+def scrape_row(page, transaction_state, row, limiter):
+    swiggy_url = row.get("swiggy res id", "")
+    print(f"Scraping: {row['Restaurant Name']}")
+
+    # Reset captured data for this iteration
+    transaction_state["current_response"] = None
+    transaction_state["blocked"] = False
+
     try:
-        offers = []
-
-        def find_key_recursive(data, target):
-            results = []
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    if k == target:
-                        results.append(str(v))
-                    results.extend(find_key_recursive(v, target))
-            elif isinstance(data, list):
-                for item in data:
-                    results.extend(find_key_recursive(item, target))
-            return results
-
-        if response_data:
-            offers.extend(find_key_recursive(response_data, "offers"))
-
-        # Clean + de-duplicate
-        import ast
-
-        cleaned = []
-        for offer_str in offers:
-            try:
-                # Parse the stringified dictionary back into a Python object
-                data = ast.literal_eval(offer_str)
-                if isinstance(data, dict):
-                    info = data.get("info", {})
-                    header = info.get("header", "")
-                    code = info.get("couponCode", "")
-                    desc = info.get("description", "")
-
-                    # Combine the requested fields
-                    display_text = " | ".join(filter(None, [header, code, desc]))
-                    if display_text and display_text not in cleaned:
-                        cleaned.append(display_text)
-                elif isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            info = item.get("info", {})
-                            header = info.get("header", "")
-                            code = info.get("couponCode", "")
-                            desc = info.get("description", "")
-
-                            # Combine the requested fields
-                            display_text = " | ".join(
-                                filter(None, [header, code, desc])
-                            )
-                            if display_text and display_text not in cleaned:
-                                cleaned.append(display_text)
+        limiter.acquire_sync(swiggy_url)
+        page.goto(swiggy_url, wait_until="networkidle", timeout=60000)
 
-            except Exception:
-                continue
-        return cleaned
-    except Exception:
-        return []
+        # Extract using the captured response data
+        offers = extract_offers(transaction_state["current_response"])
+        items_99 = extract_99_items(transaction_state["current_response"])
+        ratings = extract_ratings(transaction_state["current_response"])
 
+        row["promo_codes"] = f"({', '.join(offers)})" if offers else "()"
+        row["99_store_items"] = f"({', '.join(items_99)})" if items_99 else "()"
+        row["rating"] = ratings["avgRatingString"]
+        row["total_ratings"] = ratings["totalRatingsString"]
 
-def extract_99_items(response_data):
-    try:
-        items = []
-
-        def find_99_recursive(data):
-            results = []
-            if isinstance(data, dict):
-                # Check for the specific type value
-                if (
-                    data.get("@type")
-                    == "type.googleapis.com/swiggy.presentation.food.v2.Dish"
-                ):
-                    # Check for isNinetyninestoreItem flag in info
-                    info = data.get("info", {})
-                    if info.get("isNinetyninestoreItem") is True:
-                        name = info.get("name")
-                        if name:
-                            results.append(name)
-
-                # Continue recursion
-                for k, v in data.items():
-                    results.extend(find_99_recursive(v))
-            elif isinstance(data, list):
-                for item in data:
-                    results.extend(find_99_recursive(item))
-            return results
-
-        if response_data:
-            items.extend(find_99_recursive(response_data))
-
-        # Deduplicate
-        return list(set(items))
-    except Exception:
-        return []
-
-
-def extract_ratings(response_data):
-    try:
-        ratings = {"avgRatingString": "", "totalRatingsString": ""}
-
-        def find_restaurant_recursive(data):
-            if isinstance(data, dict):
-                if (
-                    data.get("@type")
-                    == "type.googleapis.com/swiggy.presentation.food.v2.Restaurant"
-                ):
-                    info = data.get("info", {})
-                    ratings["avgRatingString"] = info.get("avgRatingString", "")
-                    ratings["totalRatingsString"] = info.get("totalRatingsString", "")
-                    return True  # Stop recursion once found
-
-                for k, v in data.items():
-                    if find_restaurant_recursive(v):
-                        return True
-            elif isinstance(data, list):
-                for item in data:
-                    if find_restaurant_recursive(item):
-                        return True
-            return False
-
-        if response_data:
-            find_restaurant_recursive(response_data)
-
-        return ratings
-    except Exception:
-        return {"avgRatingString": "", "totalRatingsString": ""}
-
-
-def process_chunk(df_chunk):
+        time.sleep(random.randint(2, 4))
+
+    except Exception as e:
+        print(f"Failed for {swiggy_url}: {e}")
+        row["promo_codes"] = "()"
+        row["99_store_items"] = "()"
+        row["rating"] = ""
+        row["total_ratings"] = ""
+
+    return row
+
+
+def worker_main(task_queue, result_queue, num_workers=1):
     """
-    Process a chunk of the dataframe with its own Playwright instance.
+    Worker process: one browser for its lifetime, pulling batches of
+    (position, row) from the shared queue until it receives None.
     """
-    # Needs to capture response per page
-    # using a Mutable container (list) because simple variable assignment in closure would fail without nonlocal
-    # Dict is also mutable, which is good.
-    transaction_state = {"current_response": None}
+    from playwright.sync_api import sync_playwright
+
+    # Each worker gets its share of the per-host budget (rate and burst), so
+    # the run as a whole stays within RATE_LIMITS
+    limiter = rate_limiter.split(num_workers)
+    transaction_state = {"current_response": None, "blocked": False}
 
     def handle_response(response):
         # Filter out noisy resources like images, fonts, and styles for cleaner output
         if response.request.resource_type in ["image", "font", "stylesheet", "media"]:
             return
 
+        if "swiggy.com" in response.url and response.status in BLOCK_STATUSES:
+            transaction_state["blocked"] = True
         # Specifically look for Swiggy DAPI calls which likely contain the data
         if "swiggy.com/dapi/" in response.url and response.status == 200:
             try:
@@ -170,114 +90,151 @@ def process_chunk(df_chunk):
             headless=False, args=["--disable-blink-features=AutomationControlled"]
         )
 
-        context = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            locale="en-IN",
-            timezone_id="Asia/Kolkata",
-            viewport={"width": 1366, "height": 768},
-        )
-
-        page = context.new_page()
-        page.on("response", handle_response)
-
-        for idx, row in df_chunk.iterrows():
-            swiggy_url = row.get("swiggy res id", "")
-
-            if not is_swiggy_restaurant_url(swiggy_url):
-                continue
-
-            print(f"Scraping: {row['Restaurant Name']}")
-
-            # Reset captured data for this iteration
-            transaction_state["current_response"] = None
-
-            try:
-                page.goto(swiggy_url, wait_until="networkidle", timeout=60000)
-
-                # Extract using the captured response data
-                offers = extract_offers(transaction_state["current_response"])
-                items_99 = extract_99_items(transaction_state["current_response"])
-                ratings = extract_ratings(transaction_state["current_response"])
-
-                if offers:
-                    df_chunk.at[idx, "promo_codes"] = f"({', '.join(offers)})"
-                else:
-                    df_chunk.at[idx, "promo_codes"] = "()"
-
-                if items_99:
-                    df_chunk.at[idx, "99_store_items"] = f"({', '.join(items_99)})"
-                else:
-                    df_chunk.at[idx, "99_store_items"] = "()"
-
-                df_chunk.at[idx, "rating"] = ratings["avgRatingString"]
-                df_chunk.at[idx, "total_ratings"] = ratings["totalRatingsString"]
-
-                time.sleep(random.randint(2, 4))
-
-            except Exception as e:
-                print(f"Failed for {swiggy_url}: {e}")
-                df_chunk.at[idx, "promo_codes"] = "()"
-                df_chunk.at[idx, "99_store_items"] = "()"
-                df_chunk.at[idx, "rating"] = ""
-                df_chunk.at[idx, "total_ratings"] = ""
+        while True:
+            batch = task_queue.get()
+            if batch is None:
+                break
+            for position, row in batch:
+                # Same user-agent/viewport/locale rotation as the API services:
+                # one context per row under the next profile, so every use is
+                # reported and profiles that get blocked are retired
+                profile = fingerprint_rotator.acquire()
+                context = browser.new_context(
+                    **fingerprint_rotator.context_options(profile)
+                )
+                page = context.new_page()
+                page.on("response", handle_response)
+                try:
+                    row = scrape_row(page, transaction_state, row, limiter)
+                finally:
+                    context.close()
+                fingerprint_rotator.report(profile, transaction_state["blocked"])
+                # Stream each row back as soon as it is done
+                result_queue.put((position, row))
 
         browser.close()
 
-    return df_chunk
+
+def read_done_rows(path, input_rows):
+    """
+    Input position -> output row for rows an interrupted run already wrote to
+    path (in input order). A row is reused only if its KEY_COLUMNS still
+    match the input row at that position, so an edited or reordered input is
+    scraped again rather than given another restaurant's results.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, mode="r", encoding="utf-8", newline="") as f:
+        for position, row in enumerate(csv.DictReader(f)):
+            if position >= len(input_rows):
+                break
+            if all(row.get(c) == input_rows[position].get(c) for c in KEY_COLUMNS):
+                done[position] = row
+    return done
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description=f"Scrape coupons, 99-store items and ratings for {INPUT_CSV}"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help=f"Scrape every row again instead of continuing {OUTPUT_CSV}.partial",
+    )
+    args = parser.parse_args()
+
     try:
-        df = pd.read_csv(INPUT_CSV)
+        f_in = open(INPUT_CSV, mode="r", encoding="utf-8", newline="")
     except FileNotFoundError:
         print(f"Error: {INPUT_CSV} not found.")
         return
 
-    if "promo_codes" not in df.columns:
-        df["promo_codes"] = ""
-    if "99_store_items" not in df.columns:
-        df["99_store_items"] = ""
-    if "rating" not in df.columns:
-        df["rating"] = ""
-    if "total_ratings" not in df.columns:
-        df["total_ratings"] = ""
-
-    # Filter valid URLs to count actual work?
-    # Keeping logic simple: split everything.
-
-    num_rows = len(df)
-    if num_rows == 0:
-        print("Empty input CSV.")
-        return
-
-    num_chunks = MAX_WORKERS
-    if num_rows < num_chunks:
-        num_chunks = num_rows  # Avoid empty chunks if fewer rows than workers
-
-    print(f"Starting scraping with {num_chunks} workers for {num_rows} rows...")
-
-    chunks = np.array_split(df, num_chunks)
+    with f_in:
+        reader = csv.DictReader(f_in)
+        fieldnames = list(reader.fieldnames or [])
+        fieldnames += [c for c in RESULT_COLUMNS if c not in fieldnames]
+        input_rows = list(reader)
+
+    # Rows go to OUTPUT_CSV.partial in input order and it replaces OUTPUT_CSV
+    # once complete; only an interrupted run's .partial is resumed, so a rerun
+    # after a complete run refreshes every row
+    partial_csv = f"{OUTPUT_CSV}.partial"
+    finished = {} if args.no_resume else read_done_rows(partial_csv, input_rows)
+    if finished:
+        print(f"Resuming: {len(finished)} rows already done")
+
+    rows = []
+    for position, row in enumerate(input_rows):
+        if position in finished:
+            continue
+        if is_swiggy_restaurant_url(row.get("swiggy res id", "")):
+            rows.append((position, row))
+        else:
+            # Rows without a restaurant URL are carried over unchanged
+            finished[position] = row
+
+    f_out = open(partial_csv, mode="w", encoding="utf-8", newline="")
+    writer = csv.DictWriter(f_out, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    next_to_write = 0
+
+    def flush_in_order():
+        nonlocal next_to_write
+        while next_to_write in finished:
+            writer.writerow(finished.pop(next_to_write))
+            next_to_write += 1
+        f_out.flush()
+
+    flush_in_order()
+
+    received = 0
+    if rows:
+        num_workers = min(MAX_WORKERS, len(rows))
+        print(f"Starting scraping with {num_workers} workers for {len(rows)} rows...")
+
+        ctx = multiprocessing.get_context("spawn")
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+
+        for start in range(0, len(rows), BATCH_SIZE):
+            task_queue.put(rows[start : start + BATCH_SIZE])
+        for _ in range(num_workers):
+            task_queue.put(None)
+
+        workers = [
+            ctx.Process(
+                target=worker_main, args=(task_queue, result_queue, num_workers)
+            )
+            for _ in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Write as rows complete (in input order) so progress survives a crash
+        while received < len(rows):
+            try:
+                position, row = result_queue.get(timeout=5)
+            except Exception:
+                if not any(worker.is_alive() for worker in workers):
+                    print("All workers exited before finishing; rerun to resume.")
+                    break
+                continue
+            finished[position] = row
+            flush_in_order()
+            received += 1
 
-    processed_chunks = []
-    # Use spawn context if on Windows/macOS mainly, but default ProcessPoolExecutor usually handles this.
-    # On Windows, all args must be picklable.
+        for worker in workers:
+            worker.join()
 
-    with ProcessPoolExecutor(max_workers=num_chunks) as executor:
-        results = executor.map(process_chunk, chunks)
-        for res in results:
-            processed_chunks.append(res)
+    f_out.close()
+    if next_to_write < len(input_rows):
+        print(f"\n{received} rows scraped; progress kept in {partial_csv}")
+        return
 
-    # Combine results
-    if processed_chunks:
-        final_df = pd.concat(processed_chunks)
-        final_df.to_csv(OUTPUT_CSV, index=False)
-        print(f"\n✅ Done. Output saved to {OUTPUT_CSV}")
-    else:
-        print("No results generated.")
+    os.replace(partial_csv, OUTPUT_CSV)
+    print(f"\n✅ Done. {received} rows scraped, {len(input_rows)} rows in {OUTPUT_CSV}")
 
 
 if __name__ == "__main__":
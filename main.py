@@ -1,219 +1,201 @@
-from playwright.sync_api import sync_playwright
-import re
+import argparse
+import asyncio
 import csv
-from concurrent.futures import ThreadPoolExecutor
+import os
 
+from app.services.search_service import get_search_service
+from app.services.circuit_breaker import search_circuit
 
-def do_search(restaurant_name, location):
-    query = f"{restaurant_name} {location} swiggy"
-    with sync_playwright() as p:
-        # Launch with stealth arguments
-        browser = p.chromium.launch(
-            headless=False, args=["--disable-blink-features=AutomationControlled"]
-        )
-        # Use a realistic User Agent
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+OUTPUT_COLUMN = "swiggy res id"
+MAX_REQUEUES = 10
 
-        # Add init script to remove webdriver property
-        context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
-
-        page = context.new_page()
-        page.goto("https://www.google.com")
-
-        # Human-like typing delay
-        import random
-        import time
-
-        page.fill('textarea[name="q"]', query)
-        time.sleep(random.uniform(0.5, 1.5))  # Random delay
-
-        page.press('textarea[name="q"]', "Enter")
-        # Using a slightly longer wait strategy to ensure results populate
-        try:
-            page.wait_for_selector("#search", timeout=5000)
-        except:
-            page.wait_for_load_state("networkidle")
-
-        # Handle "Not now" location popup if it appears
-        try:
-            not_now_btn = page.get_by_text("Not now")
-            if not_now_btn.is_visible(timeout=3000):
-                not_now_btn.click()
-                time.sleep(1)
-        except Exception:
-            pass
-
-        time.sleep(random.uniform(1.0, 2.0))
-
-        # Get all Swiggy restaurant/city links
-        links = page.locator(
-            'a[href*="swiggy.com/restaurants"], a[href*="swiggy.com/city"]'
-        ).all()
-
-        if not links:
-            print(f"No Swiggy links found for {restaurant_name} ({location})")
-            return "No Results Found"
-
-        normalized_target_location = location.lower().replace(" ", "")
-
-        candidates = []
-        for link in links:
-            try:
-                text = link.inner_text().lower().replace("\n", " ")
-                href = link.get_attribute("href")
-                # Classify as restaurant or city/collection
-                is_restaurant_link = "/restaurants/" in href
-
-                candidates.append(
-                    {
-                        "element": link,
-                        "text": text,
-                        "href": href,
-                        "is_restaurant": is_restaurant_link,
-                    }
-                )
-            except Exception:
-                continue
-
-        # Strategy Refined:
-        # 1. Restaurant Link matching Location.
-        # 2. Restaurant Link (Any - likely "nearby" fallback).
-        # 3. City Link matching Location.
-        # 4. First Link.
-
-        chosen_link = None
-        match_type = ""
-
-        # 1. Restaurant Link + Location Match
-        for c in candidates:
-            if c["is_restaurant"]:
-                if (
-                    normalized_target_location in c["text"].replace(" ", "")
-                    or normalized_target_location in c["href"].replace("-", "").lower()
-                ):
-                    chosen_link = c["element"]
-                    match_type = "Exact Restaurant Match"
-                    break
-
-        # 2. Restaurant Link (Any - likely "nearby" fallback)
-        if not chosen_link:
-            for c in candidates:
-                if c["is_restaurant"]:
-                    chosen_link = c["element"]
-                    match_type = "Fallback to Restaurant Link"
-                    break
-
-        # 3. City Link + Location Match
-        if not chosen_link:
-            for c in candidates:
-                if (
-                    normalized_target_location in c["text"].replace(" ", "")
-                    or normalized_target_location in c["href"].replace("-", "").lower()
-                ):
-                    chosen_link = c["element"]
-                    match_type = "Location Match (City Link)"
-                    break
-
-        if not chosen_link and candidates:
-            chosen_link = candidates[0]["element"]
-            match_type = "First Result Fallback"
-
-        if not chosen_link:
-            return "No Suitable Link Found"
-
-        if not chosen_link:
-            return "No Suitable Link Found"
-
-        original_href = chosen_link.get_attribute("href")
-        print(f"Selected matched link: {original_href}")
-
-        # Check for Dineout
-        final_url = original_href
-        if "dineout" in original_href.lower():
-            # Try removing dineout
-            # Common patterns: ".../dineout" at end or ".../dineout/..."
-            # Simple approach: remove '/dineout' and see
-            clean_href = (
-                original_href.lower().replace("/dineout", "").replace("dineout/", "")
-            )
-            print(f"Dineout detected. Trying clean URL: {clean_href}")
-
-            try:
-                page.goto(clean_href)
-                page.wait_for_load_state("networkidle")
-
-                # Check validation
-                title = page.title()
-                is_404 = (
-                    "Page Not Found" in title
-                    or page.get_by_text("Page Not Found", exact=False).count() > 0
-                )
-
-                if not is_404:
-                    print("Clean URL is valid. Using it.")
-                    return page.url
-                else:
-                    print("Clean URL failed (404 or Homepage). Reverting to original.")
-            except Exception as e:
-                print(f"Error checking clean URL: {e}")
+# Output values that say nothing about the restaurant (still blocked by a
+# captcha, or a transient error); resume searches these rows again
+RETRYABLE_VALUES = {"Blocked", "Error"}
+# A resumed row is reused only if these still match the input row
+KEY_COLUMNS = ["Restaurant Name", "Location"]
 
-        # If clean failed or wasn't dineout, go to original
-        try:
-            if page.url != final_url:  # Only navigate if not already there
-                page.goto(final_url)
-                page.wait_for_load_state("networkidle")
-        except Exception:
-            return "Network Error"
 
-        if (
-            "Page Not Found" in page.title()
-            or page.get_by_text("Page Not Found", exact=False).count() > 0
-        ):
-            return "Page Not Found"
+def format_search_result(result: dict) -> str:
+    """
+    Collapse a find_restaurant_url() result into the single CSV cell the
+    batch output has always used (URL, or a not-found marker).
+    """
+    if not result.get("not_found") and result.get("url"):
+        return result["url"]
 
-        print(f"Result URL: {page.url}")
-        return page.url
+    error = (result.get("error") or "").lower()
+    if result.get("retry") or "captcha" in error:
+        return "Blocked"
+    if "no search results" in error:
+        return "No Results Found"
+    if "no suitable link" in error:
+        return "No Suitable Link Found"
+    if "phase error" in error:
+        return "Error"
+    return "Page Not Found"
 
 
-def process_row(row):
-    try:
-        # Pass name and location explicitly
-        row["swiggy res id"] = do_search(row["Restaurant Name"], row["Location"])
-    except Exception as e:
-        print(f"Error processing {row['Restaurant Name']}: {e}")
-        row["swiggy res id"] = "Error"
-    return row
+def do_search(restaurant_name, location):
+    """
+    Synchronous single lookup on the shared async search engine.
+    """
+    result = asyncio.run(
+        get_search_service().find_restaurant_url(restaurant_name, location)
+    )
+    return format_search_result(result)
+
+
+def load_done_rows(*paths: str) -> dict:
+    """
+    Input position -> output row of rows finished by earlier runs (later
+    paths win). Rows with a RETRYABLE_VALUES value are left out.
+    """
+    done = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, mode="r", encoding="utf-8", newline="") as f_out:
+            for position, row in enumerate(csv.DictReader(f_out)):
+                value = row.get(OUTPUT_COLUMN)
+                if value and value not in RETRYABLE_VALUES:
+                    done[position] = row
+                else:
+                    done.pop(position, None)
+    return done
+
+
+def reusable_value(done_row, row):
+    """
+    The earlier result for an input row, if the row at that position was the
+    same restaurant; a different or reordered input is searched again.
+    """
+    if done_row and all(done_row.get(c) == row.get(c) for c in KEY_COLUMNS):
+        return done_row[OUTPUT_COLUMN]
+    return None
+
+
+async def process_file(input_file, output_file, concurrency=5, resume=True):
+    """
+    Stream rows from input_file through the search engine and write them to
+    output_file in input order. Only a bounded window of rows is held in
+    memory. With resume, rows finished by an earlier run are copied over
+    instead of searched again (when the row at that position is still the
+    same restaurant); blocked or failed rows are retried.
+
+    Rows go to output_file.partial first, which replaces output_file once
+    every row is written, so an interrupted run never loses earlier results.
+    """
+    search_service = get_search_service()
+    partial_file = f"{output_file}.partial"
+    done_rows = load_done_rows(output_file, partial_file) if resume else {}
+    if done_rows:
+        print(f"Resuming: {len(done_rows)} rows already done in {output_file}")
+
+    with open(input_file, mode="r", encoding="utf-8", newline="") as f_in:
+        reader = csv.DictReader(f_in)
+        if reader.fieldnames is None:
+            raise ValueError(f"{input_file} is empty (no header row)")
+        fieldnames = reader.fieldnames + [OUTPUT_COLUMN]
+
+        with open(partial_file, mode="w", encoding="utf-8", newline="") as f_out:
+            writer = csv.DictWriter(f_out, fieldnames=fieldnames)
+            writer.writeheader()
+
+            # Rows read but not yet written; bounds memory when one row is slow
+            window = asyncio.Semaphore(concurrency * 4)
+            rows_in = asyncio.Queue(maxsize=concurrency)
+            finished = {}
+            state = {"next_to_write": 0, "searched": 0}
+
+            def flush_in_order():
+                while state["next_to_write"] in finished:
+                    writer.writerow(finished.pop(state["next_to_write"]))
+                    f_out.flush()
+                    state["next_to_write"] += 1
+                    window.release()
+
+            async def worker():
+                while True:
+                    item = await rows_in.get()
+                    if item is None:
+                        break
+                    position, row = item
+                    try:
+                        blocked = 0
+                        while True:
+                            result = await search_service.find_restaurant_url(
+                                row["Restaurant Name"], row["Location"]
+                            )
+                            if not result.get("retry"):
+                                break
+                            # Only searches that hit a captcha use up requeues
+                            if result.get("searched", True):
+                                blocked += 1
+                            if blocked > MAX_REQUEUES:
+                                break
+                            # Search backend is throttling us; wait out the cooldown
+                            await search_circuit.wait_until_ready()
+                        row[OUTPUT_COLUMN] = format_search_result(result)
+                    except Exception as e:
+                        print(f"Error processing {row['Restaurant Name']}: {e}")
+                        row[OUTPUT_COLUMN] = "Error"
+                    print(f"{row['Restaurant Name']} -> {row[OUTPUT_COLUMN]}")
+                    state["searched"] += 1
+                    finished[position] = row
+                    flush_in_order()
+
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+
+            for position, row in enumerate(reader):
+                await window.acquire()
+                value = reusable_value(done_rows.get(position), row)
+                if value:
+                    row[OUTPUT_COLUMN] = value
+                    finished[position] = row
+                    flush_in_order()
+                else:
+                    await rows_in.put((position, row))
+
+            for _ in workers:
+                await rows_in.put(None)
+            await asyncio.gather(*workers)
+
+    os.replace(partial_file, output_file)
+    return state["searched"]
 
 
 def main():
-    input_file = "restaurants.csv"
-    output_file = "restaurants_with_ids.csv"
+    parser = argparse.ArgumentParser(
+        description="Find Swiggy restaurant URLs for a CSV of restaurants"
+    )
+    parser.add_argument(
+        "--input", "-i", type=str, default="restaurants.csv", help="Input CSV"
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default="restaurants_with_ids.csv",
+        help="Output CSV",
+    )
+    parser.add_argument(
+        "--concurrency", "-c", type=int, default=5, help="Searches run at once"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Search every row again instead of reusing the output file's results",
+    )
+    args = parser.parse_args()
 
-    rows = []
-    with open(input_file, mode="r", encoding="utf-8") as f_in:
-        reader = csv.DictReader(f_in)
-        rows = list(reader)
-        fieldnames = reader.fieldnames + ["swiggy res id"]
-
-    # Run in parallel with ThreadPoolExecutor
-    # You can adjust max_workers based on your system capabilities
-    processed_rows = []
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        processed_rows = list(executor.map(process_row, rows))
-
-    with open(output_file, mode="w", encoding="utf-8", newline="") as f_out:
-        writer = csv.DictWriter(f_out, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(processed_rows)
-
-    print(f"Done! Processed {len(processed_rows)} restaurants. Saved to {output_file}")
-    return
+    try:
+        processed = asyncio.run(
+            process_file(args.input, args.output, args.concurrency, not args.no_resume)
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Done! Processed {processed} restaurants. Saved to {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+import os
+
+# Inference backends for CPU-only boxes:
+#   torch - PyTorch fp32 (original behaviour)
+#   int8  - PyTorch with dynamic int8 quantization of Linear layers (TrOCR);
+#           YOLO stays fp32 since its convolutions are not dynamically quantized
+#   onnx  - both models exported to ONNX and run with ONNX Runtime
+BACKENDS = ("torch", "int8", "onnx")
+
+DEFAULT_EXPORT_DIR = "models/onnx"
+
+
+def set_cpu_threads(threads):
+    """
+    Cap PyTorch intra-op threads (None = library default). ONNX Runtime
+    sessions take their thread count from SessionOptions instead.
+    """
+    if not threads:
+        return
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def from_pretrained_local_first(cls, model_name, cache_dir=None, **kwargs):
+    """
+    from_pretrained() that uses the local cache without any Hub round-trip
+    when the files are already there, and downloads only on a cold cache.
+    """
+    try:
+        return cls.from_pretrained(
+            model_name, cache_dir=cache_dir, local_files_only=True, **kwargs
+        )
+    except OSError:
+        return cls.from_pretrained(model_name, cache_dir=cache_dir, **kwargs)
+
+
+def load_trocr(
+    model_name,
+    backend="torch",
+    device="cpu",
+    threads=None,
+    export_dir=None,
+    cache_dir=None,
+):
+    """
+    Load the TrOCR processor and a generate()-capable model for the backend.
+
+    Returns:
+        tuple: (processor, model)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'")
+
+    from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+    processor = from_pretrained_local_first(TrOCRProcessor, model_name, cache_dir)
+
+    if backend == "onnx":
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForVision2Seq
+        except ImportError:
+            raise ImportError(
+                "The onnx backend requires 'optimum[onnxruntime]' (pip install optimum[onnxruntime])"
+            )
+
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+        session_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+
+        # Export once, then load the cached ONNX graphs
+        if export_dir is None:
+            export_dir = (
+                os.path.join(cache_dir, "onnx") if cache_dir else DEFAULT_EXPORT_DIR
+            )
+        export_path = os.path.join(export_dir, model_name.replace("/", "--"))
+        if os.path.isdir(export_path):
+            model = ORTModelForVision2Seq.from_pretrained(
+                export_path, session_options=session_options
+            )
+        else:
+            print(f"Exporting {model_name} to ONNX ({export_path})...")
+            model = ORTModelForVision2Seq.from_pretrained(
+                model_name,
+                export=True,
+                session_options=session_options,
+                cache_dir=cache_dir,
+            )
+            model.save_pretrained(export_path)
+        return processor, model
+
+    set_cpu_threads(threads)
+    model = from_pretrained_local_first(
+        VisionEncoderDecoderModel, model_name, cache_dir
+    )
+    if backend == "int8":
+        import torch
+
+        # Dynamic quantization is CPU-only
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        return processor, model.eval()
+    return processor, model.to(device).eval()
+
+
+def yolo_weights_for_backend(model_path, backend="torch", imgsz=640):
+    """
+    Weights file to load with YOLO() for the backend. For onnx, the .pt
+    weights are exported once next to the original (model.onnx) and reused.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'")
+    if backend != "onnx" or model_path.endswith(".onnx"):
+        return model_path
+
+    onnx_path = os.path.splitext(model_path)[0] + ".onnx"
+    stale = os.path.exists(onnx_path) and os.path.exists(model_path) and (
+        os.path.getmtime(onnx_path) < os.path.getmtime(model_path)
+    )
+    if stale or not os.path.exists(onnx_path):
+        from ultralytics import YOLO
+
+        print(f"Exporting {model_path} to ONNX...")
+        onnx_path = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+    return onnx_path
+
+
+def load_yolo(model_path, backend="torch", threads=None):
+    """
+    Load YOLO weights for the backend (exporting to ONNX first if needed).
+    """
+    from ultralytics import YOLO
+
+    weights = yolo_weights_for_backend(model_path, backend)
+    model = YOLO(weights, task="detect")
+    if threads:
+        _cap_yolo_threads(model, weights, threads)
+    return model
+
+
+def _cap_yolo_threads(model, weights, threads):
+    """
+    Ultralytics resets torch's thread count when it sets up its predictor, and
+    creates ONNX Runtime sessions with default options (one thread per core).
+    Set the predictor up with a blank image, then reapply the cap to torch
+    and, for ONNX weights, swap in a session capped at threads.
+    """
+    import numpy as np
+
+    model.predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+    set_cpu_threads(threads)
+    if not weights.endswith(".onnx"):
+        return
+
+    import onnxruntime
+
+    autobackend = getattr(model.predictor, "model", None)
+    session = getattr(autobackend, "session", None)
+    # Static-shape graphs run through an IO binding tied to the old session
+    if session is None or not getattr(autobackend, "dynamic", True):
+        print("Warning: could not cap ONNX Runtime threads for YOLO")
+        return
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.intra_op_num_threads = threads
+    autobackend.session = onnxruntime.InferenceSession(
+        weights, session_options, providers=session.get_providers()
+    )
@@ -0,0 +1,120 @@
+"""
+Measure the accuracy/latency trade-off of the crop preprocessing modes.
+
+Runs every mode in preprocessing.PREPROCESS_MODES over a sample set of field
+crops, timing preprocessing alone and (with --recognize) preprocessing plus
+TrOCR. Accuracy is the character error rate against a labels CSV
+(filename,text); without labels it is measured against the 'nlmeans' output.
+
+    python bench_preprocess.py --crops data/crops [--labels labels.csv] [--recognize]
+"""
+
+import argparse
+import csv
+import glob
+import os
+import time
+
+import cv2
+
+from preprocessing import DEFAULT_NOISE_THRESHOLD, PREPROCESS_MODES, preprocess_batch
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        previous = current
+    return previous[-1]
+
+
+def char_error_rate(predictions, references):
+    errors = sum(edit_distance(p, r) for p, r in zip(predictions, references))
+    total = sum(len(r) for r in references)
+    return errors / total if total else 0.0
+
+
+def load_crops(crops_dir):
+    paths = sorted(
+        p
+        for ext in ("png", "jpg", "jpeg")
+        for p in glob.glob(os.path.join(crops_dir, f"*.{ext}"))
+    )
+    names, crops = [], []
+    for path in paths:
+        crop = cv2.imread(path)
+        if crop is not None:
+            names.append(os.path.basename(path))
+            crops.append(crop)
+    return names, crops
+
+
+def load_labels(labels_path):
+    with open(labels_path, newline="", encoding="utf-8") as f:
+        return {row["filename"]: row["text"] for row in csv.DictReader(f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--crops", required=True, help="Directory of crop images")
+    parser.add_argument("--labels", help="CSV with filename,text columns")
+    parser.add_argument(
+        "--recognize", action="store_true", help="Also run TrOCR on each mode"
+    )
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument(
+        "--noise-threshold", type=float, default=DEFAULT_NOISE_THRESHOLD
+    )
+    args = parser.parse_args()
+
+    names, crops = load_crops(args.crops)
+    if not crops:
+        parser.error(f"No crop images found in {args.crops}")
+    labels = load_labels(args.labels) if args.labels else None
+    print(f"{len(crops)} crops from {args.crops}")
+
+    recognizer = None
+    if args.recognize:
+        from recognizer import TextRecognizer
+
+        recognizer = TextRecognizer(use_gpu=False)
+
+    baseline = None
+    rows = []
+    for mode in PREPROCESS_MODES:
+        start = time.perf_counter()
+        preprocess_batch(crops, mode, args.noise_threshold)
+        prep_ms = (time.perf_counter() - start) * 1000 / len(crops)
+
+        row = {"mode": mode, "prep_ms": prep_ms}
+        if recognizer:
+            recognizer.preprocessing = mode
+            recognizer.noise_threshold = args.noise_threshold
+            start = time.perf_counter()
+            texts = recognizer.recognize_batch(crops, batch_size=args.batch_size)
+            row["total_ms"] = (time.perf_counter() - start) * 1000 / len(crops)
+            if labels:
+                refs = [labels.get(name, "") for name in names]
+                row["cer"] = char_error_rate(texts, refs)
+            else:
+                if mode == "nlmeans":
+                    baseline = texts
+                row["cer"] = char_error_rate(texts, baseline)
+        rows.append(row)
+
+    reference = "labels" if labels else "nlmeans output"
+    print(f"{'mode':<10} {'prep ms/crop':>13} {'total ms/crop':>14} {'CER':>8}")
+    for row in rows:
+        total = f"{row['total_ms']:14.1f}" if "total_ms" in row else f"{'-':>14}"
+        cer = f"{row['cer']:8.3f}" if "cer" in row else f"{'-':>8}"
+        print(f"{row['mode']:<10} {row['prep_ms']:13.2f} {total} {cer}")
+    if recognizer:
+        print(f"(CER vs {reference})")
+
+
+if __name__ == "__main__":
+    main()
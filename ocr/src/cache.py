@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+
+
+def array_digest(array):
+    """
+    Hex digest of an image array's exact contents (shape, dtype and pixels).
+    Rasterizing the same PDF at the same DPI gives identical bytes, so a page
+    hashes the same on every run.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{array.shape}{array.dtype}".encode())
+    # Crops are views into the page; copy only when not contiguous
+    h.update(np.ascontiguousarray(array).data)
+    return h.hexdigest()
+
+
+def path_version(path):
+    """
+    Version string for a weights file or model directory: its content hash
+    for a file, the latest mtime for a directory, or the name itself when it
+    is not a local path (e.g. a Hub model id or a stock ultralytics model).
+    """
+    if os.path.isfile(path):
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    if os.path.isdir(path):
+        mtimes = [
+            os.path.getmtime(os.path.join(root, name))
+            for root, _, files in os.walk(path)
+            for name in files
+        ]
+        return f"{path}@{max(mtimes, default=0)}"
+    return path
+
+
+def hub_revision(repo_id, cache_dir=None):
+    """
+    Commit hash of the locally cached snapshot of a Hugging Face Hub model
+    (the one from_pretrained() would load), or None when it is not cached.
+    A model republished under the same id resolves to a new commit.
+    """
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return None
+    try:
+        path = try_to_load_from_cache(repo_id, "config.json", cache_dir=cache_dir)
+    except Exception:
+        # Not a valid repo id (e.g. a missing local path)
+        return None
+    if not isinstance(path, str):
+        return None
+    # <cache>/models--org--name/snapshots/<commit>/config.json
+    return os.path.basename(os.path.dirname(path))
+
+
+class StageCache:
+    """
+    Content-addressed results of one pipeline stage (page detections or crop
+    text), so re-OCRing the same scans skips the stages whose input and model
+    are unchanged - e.g. after retraining only the recognizer, detection is
+    served from the cache and only recognition runs again.
+
+    Keys combine the input's content hash with a version string for the
+    model and settings that produced the result, so a new model version
+    misses instead of returning stale results. One small JSON file per key,
+    written atomically.
+    """
+
+    def __init__(self, cache_dir, stage, version):
+        self.cache_dir = os.path.join(cache_dir, stage)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, array, *settings):
+        """
+        Key for an input array under this version and any per-call settings.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((self.version,) + settings).encode())
+        h.update(array_digest(array).encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Cached result for key, or None.
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            value = None
+        except Exception as e:
+            print(f"Error reading cache entry {key}: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving cache entry {key}: {e}")
+
+    def summary(self):
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} cached"
@@ -0,0 +1,223 @@
+"""
+Parity check of an optimized inference backend against PyTorch fp32.
+
+Runs the reference (torch) and candidate (int8 / onnx) backends on the same
+sample crops and pages, reports speedup and output agreement, and exits
+non-zero if the candidate drifts past the thresholds:
+
+  - recognition: character error rate of candidate text vs reference text
+  - detection: share of reference boxes matched (same class, IoU >= 0.9)
+
+    python check_parity.py --backend onnx --crops data/crops --pages data/pages -m best.pt
+
+Without sample data, --synthetic generates a few tiny printed-text crops and
+pages, which is enough to smoke-test a backend end to end in seconds:
+
+    python check_parity.py --backend int8 --synthetic 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS
+from bench_preprocess import char_error_rate, load_crops
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def matched_share(reference, candidate, iou_threshold=0.9):
+    """
+    Share of reference detections with a same-class candidate box above the IoU.
+    """
+    if not reference:
+        return 1.0 if not candidate else 0.0
+    unmatched = list(candidate)
+    matched = 0
+    for ref in reference:
+        for i, cand in enumerate(unmatched):
+            if cand["class_id"] == ref["class_id"] and (
+                box_iou(ref["bbox"], cand["bbox"]) >= iou_threshold
+            ):
+                matched += 1
+                del unmatched[i]
+                break
+    return matched / len(reference)
+
+
+SYNTHETIC_TEXTS = ("1234", "Name", "42 MG Road", "Pune", "07/2024", "Total 560")
+
+
+def synthetic_crops(count):
+    """
+    Small white field crops with one line of printed text each.
+    """
+    crops = []
+    for i in range(count):
+        crop = np.full((48, 256, 3), 255, dtype=np.uint8)
+        text = SYNTHETIC_TEXTS[i % len(SYNTHETIC_TEXTS)]
+        cv2.putText(crop, text, (8, 34), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+        crops.append(crop)
+    return crops
+
+
+def synthetic_pages(count):
+    """
+    Form-like pages: boxed fields filled with synthetic crops.
+    """
+    pages = []
+    for i in range(count):
+        page = np.full((640, 480, 3), 255, dtype=np.uint8)
+        # Offset the texts so every page differs
+        for row, crop in enumerate(synthetic_crops(i + 6)[i:]):
+            y = 40 + row * 96
+            page[y : y + 48, 100 : 100 + 256] = crop
+            cv2.rectangle(page, (96, y - 4), (360, y + 52), (0, 0, 0), 2)
+        pages.append(page)
+    return pages
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def check_recognition(crops, backend, threads, batch_size, max_cer, **kwargs):
+    from recognizer import TextRecognizer
+
+    reference = TextRecognizer(use_gpu=False, backend="torch", threads=threads, **kwargs)
+    candidate = TextRecognizer(use_gpu=False, backend=backend, threads=threads, **kwargs)
+
+    # Warm-up so one-time graph/kernel setup is not timed
+    reference.recognize_batch(crops[:1])
+    candidate.recognize_batch(crops[:1])
+
+    ref_texts, ref_time = timed(reference.recognize_batch, crops, batch_size=batch_size)
+    cand_texts, cand_time = timed(candidate.recognize_batch, crops, batch_size=batch_size)
+
+    cer = char_error_rate(cand_texts, ref_texts)
+    exact = np.mean([a == b for a, b in zip(cand_texts, ref_texts)])
+    print(
+        f"Recognition: torch {ref_time * 1000 / len(crops):.1f} ms/crop, "
+        f"{backend} {cand_time * 1000 / len(crops):.1f} ms/crop "
+        f"({ref_time / cand_time:.2f}x), exact match {exact:.1%}, CER {cer:.4f}"
+    )
+    return cer <= max_cer
+
+
+def check_detection(pages, model_path, backend, threads, min_match):
+    from detector import FieldDetector
+
+    reference = FieldDetector(model_path, backend="torch", threads=threads)
+    candidate = FieldDetector(model_path, backend=backend, threads=threads)
+    reference.detect(pages[0])
+    candidate.detect(pages[0])
+
+    shares, ref_time, cand_time = [], 0.0, 0.0
+    for page in pages:
+        ref, elapsed = timed(reference.detect, page)
+        ref_time += elapsed
+        cand, elapsed = timed(candidate.detect, page)
+        cand_time += elapsed
+        shares.append(matched_share(ref, cand))
+
+    share = float(np.mean(shares))
+    print(
+        f"Detection: torch {ref_time * 1000 / len(pages):.1f} ms/page, "
+        f"{backend} {cand_time * 1000 / len(pages):.1f} ms/page "
+        f"({ref_time / cand_time:.2f}x), boxes matched {share:.1%}"
+    )
+    return share >= min_match
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend", choices=[b for b in BACKENDS if b != "torch"], default="onnx"
+    )
+    parser.add_argument("--crops", help="Directory of field crop images")
+    parser.add_argument("--pages", help="Directory of page images")
+    parser.add_argument("--model", "-m", default=None, help="YOLO weights (.pt)")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        help="Generate this many synthetic crops (and pages) instead of samples",
+    )
+    parser.add_argument(
+        "--trocr-model", default=None, help="TrOCR model id or local checkpoint"
+    )
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-cer", type=float, default=0.02)
+    parser.add_argument("--min-box-match", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if not args.crops and not args.pages and not args.synthetic:
+        parser.error("Give --crops and/or --pages sample directories, or --synthetic")
+
+    recognizer_kwargs = {"model_name": args.trocr_model} if args.trocr_model else {}
+
+    ok = True
+    if args.synthetic:
+        print(f"Using {args.synthetic} synthetic crops and 2 synthetic pages")
+        ok &= check_recognition(
+            synthetic_crops(args.synthetic),
+            args.backend,
+            args.threads,
+            args.batch_size,
+            args.max_cer,
+            **recognizer_kwargs,
+        )
+        ok &= check_detection(
+            synthetic_pages(2),
+            args.model,
+            args.backend,
+            args.threads,
+            args.min_box_match,
+        )
+
+    if args.crops:
+        _, crops = load_crops(args.crops)
+        if not crops:
+            parser.error(f"No crop images found in {args.crops}")
+        ok &= check_recognition(
+            crops,
+            args.backend,
+            args.threads,
+            args.batch_size,
+            args.max_cer,
+            **recognizer_kwargs,
+        )
+
+    if args.pages:
+        pages = [
+            cv2.imread(p)
+            for p in sorted(glob.glob(os.path.join(args.pages, "*")))
+            if p.lower().endswith((".png", ".jpg", ".jpeg"))
+        ]
+        pages = [p for p in pages if p is not None]
+        if not pages:
+            parser.error(f"No page images found in {args.pages}")
+        ok &= check_detection(
+            pages, args.model, args.backend, args.threads, args.min_box_match
+        )
+
+    print("PARITY OK" if ok else "PARITY FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
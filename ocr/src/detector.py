@@ -1,66 +1,163 @@
-from ultralytics import YOLO
 import cv2
 import numpy as np
+from registry import model_registry
+from cache import StageCache, path_version
 
 
 class FieldDetector:
-    def __init__(self, model_path=None):
+    def __init__(
+        self, model_path=None, backend="torch", threads=None, replica=0, cache_dir=None
+    ):
         """
         Initialize the YOLO field detector.
 
         Args:
             model_path (str): Path to the trained YOLOv8 model (.pt file).
                               If None, loads a pre-trained generic model (not useful for custom fields).
+            backend (str): "torch" or "onnx" (exported once, run with ONNX
+                           Runtime); "int8" runs the fp32 PyTorch model.
+            threads (int): CPU inference threads (None = library default);
+                           set once per process, see ModelRegistry.set_threads().
+            replica (int): Separate resident copy of the model, for detectors
+                           used from different threads at the same time.
+            cache_dir (str): Reuse detections of previously seen pages (keyed
+                             by page content and model version) from here.
         """
-        if model_path:
-            self.model = YOLO(model_path)
-        else:
+        if not model_path:
             # Load a standard model just for structure (will detect 'person', 'car', etc. until retrained)
             print("Warning: Loading generic YOLOv8n model. Please train on your data.")
-            self.model = YOLO("yolov8n.pt")
+            model_path = "yolov8n.pt"
 
-    def detect(self, image_path, conf_threshold=0.5):
+        # Weights are loaded on first detection, shared through the model registry
+        self.model_path = model_path
+        self.backend = backend
+        self.threads = threads
+        self.replica = replica
+        self.cache_dir = cache_dir
+        self._cache = None
+
+    @property
+    def model(self):
+        model_registry.set_threads(self.threads)
+        return model_registry.yolo(self.model_path, self.backend, self.replica)
+
+    @property
+    def cache(self):
+        if self._cache is None and self.cache_dir:
+            # Weights are hashed once, so retrained weights never hit old entries
+            version = f"{path_version(self.model_path)}:{self.backend}"
+            self._cache = StageCache(self.cache_dir, "detections", version)
+        return self._cache
+
+    def detect(self, image, conf_threshold=0.5):
         """
         Detect fields in a document image.
 
         Args:
-            image_path (str): Path to the image file.
+            image (str | numpy.ndarray): Path to the image file, or an already
+                                         decoded BGR page array.
             conf_threshold (float): Confidence threshold for detections.
 
         Returns:
             list: List of dictionaries containing detection info:
                   {'class_id': int, 'class_name': str, 'confidence': float, 'bbox': [x1, y1, x2, y2], 'crop': numpy_array}
         """
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"Error: Could not read image at {image_path}")
-            return []
+        return self.detect_batch([image], conf_threshold)[0]
 
-        results = self.model.predict(
-            image_path, conf=conf_threshold, save=False, verbose=False
-        )
-        result = results[0]  # We process one image at a time
+    def detect_batch(self, images, conf_threshold=0.5, batch_size=8):
+        """
+        Detect fields in several document images with batched YOLO calls.
 
-        detections = []
-        for box in result.boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-            conf = float(box.conf[0].cpu().numpy())
-            cls_id = int(box.cls[0].cpu().numpy())
-            cls_name = result.names[cls_id]
+        Args:
+            images (list): Image paths and/or decoded BGR page arrays.
+            conf_threshold (float): Confidence threshold for detections.
+            batch_size (int): Pages per YOLO forward pass.
+
+        Returns:
+            list: One detection list per input image (see detect()). Crops
+                  are views into the page arrays, not copies.
+        """
+        arrays = []
+        for image in images:
+            if isinstance(image, str):
+                image_path = image
+                image = cv2.imread(image_path)
+                if image is None:
+                    print(f"Error: Could not read image at {image_path}")
+            arrays.append(image)
 
-            # Crop the detected region
-            crop = image[y1:y2, x1:x2]
+        all_detections = [[] for _ in arrays]
+        valid = [i for i, image in enumerate(arrays) if image is not None]
 
+        # Pages seen before with the same weights skip the model
+        keys = {}
+        if self.cache:
+            misses = []
+            for i in valid:
+                keys[i] = self.cache.key(arrays[i], conf_threshold)
+                cached = self.cache.get(keys[i])
+                if cached is None:
+                    misses.append(i)
+                else:
+                    all_detections[i] = self._with_crops(arrays[i], cached)
+            valid = misses
+
+        for start in range(0, len(valid), batch_size):
+            indices = valid[start : start + batch_size]
+            # Predict on the decoded arrays so pages are not decoded twice
+            results = self.model.predict(
+                [arrays[i] for i in indices],
+                conf=conf_threshold,
+                save=False,
+                verbose=False,
+            )
+            for i, result in zip(indices, results):
+                all_detections[i] = self._to_detections(arrays[i], result)
+                if self.cache:
+                    self.cache.put(
+                        keys[i],
+                        [
+                            {k: v for k, v in d.items() if k != "crop"}
+                            for d in all_detections[i]
+                        ],
+                    )
+
+        return all_detections
+
+    @staticmethod
+    def _with_crops(image, detections):
+        # Cached entries hold boxes only; crops are re-sliced from the page
+        for d in detections:
+            x1, y1, x2, y2 = d["bbox"]
+            d["crop"] = image[y1:y2, x1:x2]
+        return detections
+
+    @staticmethod
+    def _to_detections(image, result):
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        # One device->host transfer per tensor for all boxes on the page
+        height, width = image.shape[:2]
+        xyxy = boxes.xyxy.cpu().numpy().astype(int)
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+        confidences = boxes.conf.cpu().numpy().tolist()
+        class_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+
+        detections = []
+        for (x1, y1, x2, y2), conf, cls_id in zip(xyxy.tolist(), confidences, class_ids):
             detections.append(
                 {
                     "class_id": cls_id,
-                    "class_name": cls_name,
+                    "class_name": result.names[cls_id],
                     "confidence": conf,
                     "bbox": [x1, y1, x2, y2],
-                    "crop": crop,
+                    # Crop the detected region (a view into the page)
+                    "crop": image[y1:y2, x1:x2],
                 }
             )
-
         return detections
 
 
@@ -1,4 +1,6 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import os
 from pathlib import Path
 
@@ -45,6 +47,147 @@ def convert_pdf_to_images(pdf_path, output_dir="data/images"):
     return saved_paths
 
 
+class RenderError(Exception):
+    """
+    A PDF (or some of its pages) could not be rasterized.
+    """
+
+
+def pil_to_bgr(image):
+    """
+    Convert a PIL page to the BGR uint8 array layout OpenCV and YOLO expect.
+    """
+    rgb = np.asarray(image.convert("RGB"))
+    return np.ascontiguousarray(rgb[:, :, ::-1])
+
+
+def page_windows(pdf_path, window=2):
+    """
+    Split a PDF into (first_page, last_page) ranges of at most `window` pages.
+
+    Returns:
+        list: Page ranges (1-based, inclusive).
+
+    Raises:
+        RenderError: If the PDF is missing, can't be read or has no pages.
+    """
+    if not os.path.exists(pdf_path):
+        raise RenderError(f"PDF file '{pdf_path}' not found")
+
+    try:
+        page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception as e:
+        # 'pdf2image' requires Poppler to be installed and in your PATH
+        raise RenderError(f"Error reading PDF '{pdf_path}': {e}") from e
+    if page_count < 1:
+        raise RenderError(f"PDF '{pdf_path}' has no pages")
+
+    window = max(1, window)
+    return [
+        (first_page, min(first_page + window - 1, page_count))
+        for first_page in range(1, page_count + 1, window)
+    ]
+
+
+def render_pages(pdf_path, first_page, last_page, dpi=300, output_dir=None):
+    """
+    Rasterize one page range to BGR arrays. Safe to run in a worker process.
+
+    Args:
+        pdf_path (str): Path to the source PDF file.
+        first_page (int): First page to render (1-based).
+        last_page (int): Last page to render (inclusive).
+        dpi (int): Rasterization resolution.
+        output_dir (str): If set, also save each page there as a JPEG.
+
+    Returns:
+        list: List of (page_name, BGR numpy array) tuples.
+    """
+    images = convert_from_path(
+        pdf_path, dpi=dpi, first_page=first_page, last_page=last_page
+    )
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    pages = []
+    pdf_name = Path(pdf_path).stem
+    for offset, image in enumerate(images):
+        # Same page names (and saved files) as convert_pdf_to_images()
+        page_name = f"{pdf_name}_page_{first_page + offset}.jpg"
+        if output_dir:
+            output_path = os.path.join(output_dir, page_name)
+            image.save(output_path, "JPEG")
+            print(f"Saved: {output_path}")
+        pages.append((page_name, pil_to_bgr(image)))
+        image.close()
+    return pages
+
+
+def iter_pdf_pages(pdf_path, dpi=300, output_dir=None, window=2, prefetch=True):
+    """
+    Rasterize a PDF lazily, a few pages at a time.
+
+    Pages are rendered in windows of `window` pages with first_page/last_page,
+    so peak memory depends on the window size, not on the page count. With
+    prefetch, the next window is rendered on a background thread (Poppler
+    runs as a subprocess) while the caller processes the current one.
+
+    Args:
+        pdf_path (str): Path to the source PDF file.
+        dpi (int): Rasterization resolution.
+        output_dir (str): If set, also save each page there as a JPEG.
+        window (int): Pages rendered per Poppler call.
+        prefetch (bool): Render the next window while the current one is used.
+
+    Yields:
+        tuple: (page_name, BGR numpy array) per page, in order.
+
+    Raises:
+        RenderError: If the PDF can't be read or a window fails to render
+                     (after the pages before it have been yielded).
+    """
+    windows = page_windows(pdf_path, window)
+
+    print(f"Converting '{pdf_path}' ({windows[-1][1]} pages)...")
+
+    def render(page_range):
+        return render_pages(pdf_path, *page_range, dpi=dpi, output_dir=output_dir)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        upcoming = executor.submit(render, windows[0]) if executor else None
+        for n, page_range in enumerate(windows):
+            try:
+                if executor:
+                    current = upcoming
+                    if n + 1 < len(windows):
+                        upcoming = executor.submit(render, windows[n + 1])
+                    pages = current.result()
+                else:
+                    pages = render(page_range)
+            except Exception as e:
+                raise RenderError(
+                    f"Error converting pages {page_range[0]}-{page_range[1]}: {e}"
+                ) from e
+
+            yield from pages
+            del pages
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def convert_pdf_to_arrays(pdf_path, dpi=300, output_dir=None):
+    """
+    Convert a PDF file to in-memory page arrays, skipping the JPEG round-trip.
+    Holds every page at once; prefer iter_pdf_pages() for long documents.
+
+    Returns:
+        list: List of (page_name, BGR numpy array) tuples.
+    """
+    return list(iter_pdf_pages(pdf_path, dpi=dpi, output_dir=output_dir))
+
+
 if __name__ == "__main__":
     # Example usage
     # Ensure you have a 'data/pdfs' directory with a file
@@ -1,65 +1,37 @@
 import os
+import sys
 import argparse
+import glob
 import json
-from ingestion import convert_pdf_to_images
-from detector import FieldDetector
-from recognizer import TextRecognizer
+from pipeline import collect_inputs, input_root, process_batch, process_document
+from ingestion import RenderError
+from backends import BACKENDS
 
 
-def process_document(pdf_path, detector, recognizer, output_dir):
-    """
-    Full pipeline to process a single PDF document.
-    """
-    print(f"Processing: {pdf_path}")
-
-    # 1. Convert PDF to Images
-    image_paths = convert_pdf_to_images(
-        pdf_path, output_dir=os.path.join(output_dir, "images")
-    )
-
-    document_results = []
-
-    for img_path in image_paths:
-        print(f"  Analyzing page: {os.path.basename(img_path)}")
-        page_data = {"page": os.path.basename(img_path), "fields": []}
-
-        # 2. Detect Fields
-        detections = detector.detect(img_path)
-
-        if not detections:
-            print("    No fields detected (Did you train the model yet?)")
-
-        for d in detections:
-            field_name = d["class_name"]
-            conf = d["confidence"]
-            crop = d["crop"]
-
-            print(f"    Detected '{field_name}' ({conf:.2f})")
-
-            # 3. Recognize Text
-            text = recognizer.recognize(crop)
-            print(f"      -> Text: {text}")
-
-            page_data["fields"].append(
-                {
-                    "field": field_name,
-                    "text": text,
-                    "confidence": conf,
-                    "bbox": d["bbox"],
-                }
-            )
-
-        document_results.append(page_data)
-
-    return document_results
+def print_cache_summary(detector, recognizer):
+    if detector.cache and recognizer.cache:
+        print(
+            f"Cache: pages {detector.cache.summary()}, "
+            f"crops {recognizer.cache.summary()}"
+        )
 
 
 def main():
+    # Imported here rather than at module level: spawned rasterization workers
+    # re-import this module as __mp_main__ and must not pay for torch/cv2
+    from detector import FieldDetector
+    from recognizer import TextRecognizer
+    from preprocessing import DEFAULT_NOISE_THRESHOLD, PREPROCESS_MODES
+
     parser = argparse.ArgumentParser(
         description="OCR Pipeline for Handwritten Documents"
     )
     parser.add_argument(
-        "--input", "-i", type=str, required=True, help="Path to input PDF file"
+        "--input",
+        "-i",
+        type=str,
+        required=True,
+        help="Input PDF file, directory of PDFs, or glob (e.g. 'scans/*.pdf')",
     )
     parser.add_argument(
         "--model", "-m", type=str, default=None, help="Path to trained YOLO model (.pt)"
@@ -67,16 +39,121 @@ def main():
     parser.add_argument(
         "--output", "-o", type=str, default="results", help="Output directory"
     )
+    parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=16,
+        help="Field crops recognized per TrOCR generate() call",
+    )
+    parser.add_argument(
+        "--preprocess",
+        type=str,
+        default="nlmeans",
+        choices=PREPROCESS_MODES,
+        help="Crop denoising before recognition; compare the faster modes with "
+        "bench_preprocess.py before switching",
+    )
+    parser.add_argument(
+        "--noise-threshold",
+        type=float,
+        default=DEFAULT_NOISE_THRESHOLD,
+        help="Noise sigma above which --preprocess auto denoises a crop",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="torch",
+        choices=BACKENDS,
+        help="Inference backend: torch (fp32), int8 (quantized TrOCR) or onnx",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="CPU threads for model inference",
+    )
+    parser.add_argument(
+        "--save-pages",
+        action="store_true",
+        help="Also write rasterized pages to <output>/images",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=2,
+        help="Rasterization processes in batch mode",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=os.environ.get("OCR_CACHE_DIR"),
+        help="Reuse detections and text of pages/crops seen in earlier runs "
+        "(default: $OCR_CACHE_DIR; off if unset)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Batch mode: redo documents that already have a result file",
+    )
 
     args = parser.parse_args()
 
+    pdf_paths = collect_inputs(args.input)
+    batch_mode = os.path.isdir(args.input) or glob.has_magic(args.input)
+    if not pdf_paths:
+        parser.error(f"No PDF files found for '{args.input}'")
+
     # Initialize Models
     print("Initializing Pipeline...")
-    detector = FieldDetector(model_path=args.model)
-    recognizer = TextRecognizer()  # Downloads model on first run
+    detector = FieldDetector(
+        model_path=args.model,
+        backend=args.backend,
+        threads=args.threads,
+        cache_dir=args.cache_dir,
+    )
+    recognizer = TextRecognizer(  # Downloads model on first run
+        preprocessing=args.preprocess,
+        noise_threshold=args.noise_threshold,
+        backend=args.backend,
+        threads=args.threads,
+        cache_dir=args.cache_dir,
+    )
+
+    if batch_mode:
+        done, failed = process_batch(
+            pdf_paths,
+            detector,
+            recognizer,
+            args.output,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            save_pages=args.save_pages,
+            resume=not args.no_resume,
+            root=input_root(args.input),
+        )
+        print(f"Done. {done} documents processed, results in {args.output}")
+        if failed:
+            print(f"{failed} documents failed to render; rerun to retry them")
+        print_cache_summary(detector, recognizer)
+        if failed:
+            sys.exit(1)
+        return
 
     # Run
-    results = process_document(args.input, detector, recognizer, args.output)
+    try:
+        results = process_document(
+            args.input,
+            detector,
+            recognizer,
+            args.output,
+            args.batch_size,
+            args.save_pages,
+        )
+    except RenderError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
     # Save Results
     os.makedirs(args.output, exist_ok=True)
@@ -85,6 +162,7 @@ def main():
         json.dump(results, f, indent=4)
 
     print(f"Done. Results saved to {result_path}")
+    print_cache_summary(detector, recognizer)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,280 @@
+import os
+import glob
+import json
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from ingestion import RenderError, iter_pdf_pages, page_windows, render_pages
+
+
+def recognize_pending(pending, recognizer, batch_size):
+    """
+    Run batched recognition for queued fields and fill in their text.
+    """
+    texts = recognizer.recognize_batch(
+        [crop for _, crop in pending], batch_size=batch_size
+    )
+    for (field, _), text in zip(pending, texts):
+        field["text"] = text
+        print(f"      -> '{field['field']}': {text}")
+    pending.clear()
+
+
+def analyze_pages(
+    pages, detector, recognizer, batch_size=16, detect_batch_size=4, on_page=None
+):
+    """
+    Detect and recognize fields on a stream of (page_name, page_image) pairs.
+
+    Pages are detected detect_batch_size at a time; crops are queued across
+    pages and recognized batch_size at a time. on_page(page_data), if given,
+    is called for each page, in order, as soon as all its text is recognized;
+    to keep pages streaming, the crops queued by each detection batch are
+    then recognized right away, even when they are fewer than batch_size.
+    """
+    document_results = []
+    pending = []  # (field entry, crop) waiting for recognition
+    emitted = 0  # pages already passed to on_page
+    pages = iter(pages)
+
+    def emit_finished():
+        nonlocal emitted
+        if on_page:
+            for page_data in document_results[emitted:]:
+                on_page(page_data)
+        emitted = len(document_results)
+
+    while True:
+        page_batch = list(islice(pages, detect_batch_size))
+        if not page_batch:
+            break
+
+        # 2. Detect Fields
+        batch_detections = detector.detect_batch(
+            [page_image for _, page_image in page_batch], batch_size=detect_batch_size
+        )
+
+        for (page_name, _), detections in zip(page_batch, batch_detections):
+            print(f"  Analyzing page: {page_name}")
+            page_data = {"page": page_name, "fields": []}
+
+            if not detections:
+                print("    No fields detected (Did you train the model yet?)")
+
+            for d in detections:
+                field_name = d["class_name"]
+                conf = d["confidence"]
+
+                print(f"    Detected '{field_name}' ({conf:.2f})")
+
+                field = {
+                    "field": field_name,
+                    "text": "",
+                    "confidence": conf,
+                    "bbox": d["bbox"],
+                }
+                page_data["fields"].append(field)
+                # Copy: a view would keep the whole page alive until recognized
+                pending.append((field, d["crop"].copy()))
+
+            document_results.append(page_data)
+
+        # 3. Recognize Text once a full batch is queued (or per detection
+        # batch when streaming pages)
+        if len(pending) >= batch_size or (on_page and pending):
+            recognize_pending(pending, recognizer, batch_size)
+        if not pending:
+            emit_finished()
+
+    if pending:
+        recognize_pending(pending, recognizer, batch_size)
+    emit_finished()
+
+    return document_results
+
+
+def process_document(
+    pdf_path,
+    detector,
+    recognizer,
+    output_dir,
+    batch_size=16,
+    save_pages=False,
+    on_page=None,
+):
+    """
+    Full pipeline to process a single PDF document.
+
+    Pages are rasterized lazily and go to detection as in-memory arrays
+    (written to output_dir/images only with save_pages), so memory stays flat
+    regardless of page count.
+    """
+    print(f"Processing: {pdf_path}")
+
+    # 1. Stream page arrays from the PDF
+    pages = iter_pdf_pages(
+        pdf_path,
+        output_dir=os.path.join(output_dir, "images") if save_pages else None,
+    )
+    return analyze_pages(pages, detector, recognizer, batch_size, on_page=on_page)
+
+
+def collect_inputs(input_spec):
+    """
+    Expand --input into PDF paths: a file, a directory of PDFs, or a glob.
+    """
+    if os.path.isdir(input_spec):
+        paths = glob.glob(os.path.join(input_spec, "*.pdf"))
+        paths += glob.glob(os.path.join(input_spec, "*.PDF"))
+    elif glob.has_magic(input_spec):
+        paths = glob.glob(input_spec, recursive=True)
+    else:
+        paths = [input_spec]
+    return sorted(set(paths))
+
+
+def input_root(input_spec):
+    """
+    Directory the inputs of --input are relative to: the directory itself,
+    or the part of a glob before its first wildcard.
+    """
+    if os.path.isdir(input_spec):
+        return input_spec
+    if glob.has_magic(input_spec):
+        parts = []
+        for part in input_spec.replace(os.sep, "/").split("/"):
+            if glob.has_magic(part):
+                break
+            parts.append(part)
+        return "/".join(parts) or "."
+    return os.path.dirname(input_spec) or "."
+
+
+def result_path_for(pdf_path, output_dir, root=None):
+    """
+    output_dir/<path of the PDF relative to root, as .json>, so PDFs with the
+    same name in different subdirectories don't share a result file. With a
+    flat input directory this is just output_dir/<stem>.json.
+    """
+    root = root or os.path.dirname(pdf_path) or "."
+    relative = os.path.relpath(os.path.abspath(pdf_path), os.path.abspath(root))
+    if relative.startswith(os.pardir):
+        # Outside the root (shouldn't happen for collected inputs)
+        relative = os.path.basename(pdf_path)
+    return os.path.join(output_dir, f"{os.path.splitext(relative)[0]}.json")
+
+
+def save_results(results, result_path):
+    os.makedirs(os.path.dirname(result_path) or ".", exist_ok=True)
+    # Write-then-rename so an interrupted run never leaves a "done" file
+    tmp_path = f"{result_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=4)
+    os.replace(tmp_path, result_path)
+
+
+def process_batch(
+    pdf_paths,
+    detector,
+    recognizer,
+    output_dir,
+    batch_size=16,
+    workers=2,
+    window=2,
+    save_pages=False,
+    resume=True,
+    root=None,
+):
+    """
+    Process many PDFs with the models loaded once.
+
+    Page windows of all documents are rasterized ahead in a process pool (at
+    most 2 * workers windows in flight, so memory stays bounded) while this
+    process runs detection and batched recognition on the pages already
+    rendered. Each document's JSON is written as soon as it finishes; with
+    resume, documents that already have a result file are skipped. Result
+    files mirror the PDFs' paths below root (see result_path_for()).
+
+    A document whose PDF can't be read, or with any page window that fails
+    to render, gets no result file (so a resumed run retries it).
+
+    Returns:
+        tuple: (documents saved, documents failed)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if root is None and pdf_paths:
+        root = os.path.commonpath(
+            [os.path.dirname(os.path.abspath(p)) for p in pdf_paths]
+        )
+    if resume:
+        todo = [
+            p for p in pdf_paths if not os.path.exists(result_path_for(p, output_dir, root))
+        ]
+        if len(todo) < len(pdf_paths):
+            print(f"Resuming: {len(pdf_paths) - len(todo)} documents already done")
+    else:
+        todo = list(pdf_paths)
+
+    images_dir = os.path.join(output_dir, "images") if save_pages else None
+    errors = {}  # pdf_path -> first render error
+
+    def document_tasks():
+        for pdf_path in todo:
+            try:
+                windows = page_windows(pdf_path, window)
+            except RenderError as e:
+                errors[pdf_path] = str(e)
+                continue
+            for first_page, last_page in windows:
+                yield pdf_path, first_page, last_page
+
+    tasks = document_tasks()
+    in_flight = deque()
+    done = failed = 0
+
+    # Spawn so workers don't inherit the loaded models
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+
+        def fill():
+            while len(in_flight) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    return
+                future = pool.submit(render_pages, *task, 300, images_dir)
+                in_flight.append((task, future))
+
+        def document_pages(pdf_path):
+            while True:
+                fill()
+                if not in_flight or in_flight[0][0][0] != pdf_path:
+                    return
+                (_, first_page, last_page), future = in_flight.popleft()
+                try:
+                    pages = future.result()
+                except Exception as e:
+                    # Keep draining this document's windows; it won't be saved
+                    errors.setdefault(
+                        pdf_path, f"Error converting pages {first_page}-{last_page}: {e}"
+                    )
+                    continue
+                yield from pages
+
+        for pdf_path in todo:
+            print(f"Processing: {pdf_path}")
+            results = analyze_pages(
+                document_pages(pdf_path), detector, recognizer, batch_size
+            )
+            if pdf_path in errors:
+                # Leave it without a result so a resumed run retries it
+                failed += 1
+                print(f"Failed {pdf_path}: {errors[pdf_path]}")
+                continue
+            result_path = result_path_for(pdf_path, output_dir, root)
+            save_results(results, result_path)
+            done += 1
+            print(f"[{done}/{len(todo)}] Saved {result_path}")
+
+    return done, failed
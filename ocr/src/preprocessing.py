@@ -0,0 +1,98 @@
+import math
+import cv2
+import numpy as np
+
+# Preprocessing modes for text crops, cheapest last:
+#   nlmeans   - fastNlMeansDenoising (original behaviour and default, slowest)
+#   bilateral - edge-preserving bilateral filter
+#   median    - 3x3 median filter
+#   auto      - bilateral filter only on crops whose noise estimate is high
+#   none      - grayscale only
+PREPROCESS_MODES = ("nlmeans", "bilateral", "median", "auto", "none")
+
+# Noise sigma (0-255 scale) above which "auto" denoises a crop
+DEFAULT_NOISE_THRESHOLD = 5.0
+
+# Immerkaer's noise estimation kernel (Laplacian difference)
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def to_gray(image):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def estimate_noise(gray):
+    """
+    Estimate the Gaussian noise sigma of a grayscale crop (Immerkaer, 1996).
+    """
+    h, w = gray.shape[:2]
+    if h < 3 or w < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, _NOISE_KERNEL)
+    total = np.abs(response[1:-1, 1:-1]).sum()
+    return float(total * math.sqrt(0.5 * math.pi) / (6 * (w - 2) * (h - 2)))
+
+
+def denoise(gray, mode):
+    if mode == "nlmeans":
+        return cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    if mode in ("bilateral", "auto"):
+        return cv2.bilateralFilter(gray, 5, 50, 50)
+    if mode == "median":
+        return cv2.medianBlur(gray, 3)
+    return gray
+
+
+def preprocess_crop(image, mode="nlmeans", noise_threshold=DEFAULT_NOISE_THRESHOLD):
+    """
+    Grayscale + denoise one BGR/gray crop; returns an RGB uint8 array.
+    """
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"Unknown preprocessing mode '{mode}'")
+
+    gray = to_gray(image)
+    if mode != "auto" or estimate_noise(gray) > noise_threshold:
+        gray = denoise(gray, mode)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+
+
+def preprocess_batch(
+    images, mode="nlmeans", noise_threshold=DEFAULT_NOISE_THRESHOLD, size=(384, 384)
+):
+    """
+    Batched preprocess_crop(). Each crop is denoised (and, for "auto", noise
+    estimated) at its native resolution exactly as preprocess_crop() does,
+    then resized to the model input size here (area averaging / bilinear,
+    instead of the TrOCR processor's own PIL resize, which becomes a no-op)
+    so the result is one (N, H, W, 3) stack.
+
+    Args:
+        images (list): BGR or grayscale crops (numpy arrays).
+        mode (str): One of PREPROCESS_MODES.
+        noise_threshold (float): Sigma above which "auto" denoises a crop.
+        size (tuple): (width, height) the crops are resized to.
+
+    Returns:
+        numpy.ndarray: (N, height, width, 3) RGB uint8 stack.
+    """
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"Unknown preprocessing mode '{mode}'")
+
+    width, height = size
+    grays = np.empty((len(images), height, width), dtype=np.uint8)
+    for i, image in enumerate(images):
+        gray = to_gray(image)
+        if mode != "none" and (
+            mode != "auto" or estimate_noise(gray) > noise_threshold
+        ):
+            gray = denoise(gray, mode)
+        h, w = gray.shape[:2]
+        # Area averaging when shrinking, bilinear when enlarging small crops
+        interpolation = (
+            cv2.INTER_AREA if w >= width and h >= height else cv2.INTER_LINEAR
+        )
+        grays[i] = cv2.resize(gray, (width, height), interpolation=interpolation)
+
+    return np.repeat(grays[..., None], 3, axis=-1)
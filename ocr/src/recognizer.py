@@ -1,76 +1,194 @@
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-from PIL import Image
 import torch
-import cv2
-import numpy as np
+from registry import model_registry
+from cache import StageCache, hub_revision, path_version
+from preprocessing import (
+    DEFAULT_NOISE_THRESHOLD,
+    PREPROCESS_MODES,
+    preprocess_batch,
+)
 
 
 class TextRecognizer:
-    def __init__(self, use_gpu=True):
+    def __init__(
+        self,
+        use_gpu=True,
+        preprocessing="nlmeans",
+        noise_threshold=DEFAULT_NOISE_THRESHOLD,
+        backend="torch",
+        threads=None,
+        model_name="microsoft/trocr-base-handwritten",
+        cache_dir=None,
+    ):
         """
         Initialize TrOCR for handwriting recognition.
         Using 'microsoft/trocr-base-handwritten' by default.
+
+        Args:
+            use_gpu (bool): Use CUDA when available.
+            preprocessing (str): Crop denoising mode, one of
+                                 preprocessing.PREPROCESS_MODES.
+            noise_threshold (float): Noise sigma above which "auto" denoises.
+            backend (str): "torch", "int8" (dynamic quantization) or "onnx"
+                           (ONNX Runtime); see backends.BACKENDS.
+            threads (int): CPU inference threads (None = library default);
+                           set once per process, see ModelRegistry.set_threads().
+            model_name (str): Hugging Face model id.
+            cache_dir (str): Reuse text of previously seen crops (keyed by crop
+                             content and recognizer version) from here.
         """
+        if preprocessing not in PREPROCESS_MODES:
+            raise ValueError(f"Unknown preprocessing mode '{preprocessing}'")
+        self.preprocessing = preprocessing
+        self.noise_threshold = noise_threshold
+
+        self.backend = backend
+        self.threads = threads
+        self.model_name = model_name
         self.device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
-        print(f"Loading TrOCR model on {self.device}...")
+        if backend != "torch":
+            # int8 and ONNX Runtime paths are CPU inference
+            self.device = "cpu"
+
+        self.cache_dir = cache_dir
+        self._cache = None
+
+        # Loaded on first recognition, shared through the model registry
+        self._loaded = False
+        self._processor = None
+        self._model = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        print(f"Loading TrOCR model ({self.backend}) on {self.device}...")
 
         try:
-            self.processor = TrOCRProcessor.from_pretrained(
-                "microsoft/trocr-base-handwritten"
+            model_registry.set_threads(self.threads)
+            self._processor, self._model = model_registry.trocr(
+                self.model_name, backend=self.backend, device=self.device
             )
-            self.model = VisionEncoderDecoderModel.from_pretrained(
-                "microsoft/trocr-base-handwritten"
-            ).to(self.device)
             print("Model loaded successfully.")
         except Exception as e:
             print(f"Error loading TrOCR: {e}")
             print("Ensure you have internet access to download the model.")
-            self.model = None
+            self._model = None
 
-    def preprocess(self, cv2_image):
+    @property
+    def processor(self):
+        self._load()
+        return self._processor
+
+    @property
+    def model(self):
+        self._load()
+        return self._model
+
+    @property
+    def cache(self):
+        if self._cache is None and self.cache_dir:
+            version = f"{self._model_version()}:{self.backend}"
+            self._cache = StageCache(self.cache_dir, "text", version)
+        return self._cache
+
+    def _model_version(self):
         """
-        Preprocess text crop for better recognition (binarization, denoising).
+        Version of the recognizer weights for cache keys: the content version
+        of a local checkpoint, or the Hub model id at its cached commit.
         """
-        # Convert to grayscale
-        if len(cv2_image.shape) == 3:
-            gray = cv2.cvtColor(cv2_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = cv2_image
-
-        # Simple denoising
-        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+        version = path_version(self.model_name)
+        if version != self.model_name:
+            return version
 
-        # Adaptive thresholding to handle uneven lighting/shadows (common in scans)
-        # binary = cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        revision = hub_revision(self.model_name, model_registry.cache_dir)
+        if revision is None:
+            # Cold cache: download the model first, then read its snapshot
+            self._load()
+            revision = hub_revision(self.model_name, model_registry.cache_dir)
+        return f"{self.model_name}@{revision}" if revision else self.model_name
 
-        # For TrOCR, pure binary might be too harsh, denoised grayscale is often good.
-        # We'll convert back to RGB for the model input
-        rgb = cv2.cvtColor(denoised, cv2.COLOR_GRAY2RGB)
-        return Image.fromarray(rgb)
+    def _input_size(self):
+        size = getattr(self.processor.image_processor, "size", None) or {}
+        return (size.get("width", 384), size.get("height", 384))
 
     def recognize(self, image_crop):
         """
         Recognize text from an image crop (numpy array).
         """
+        return self.recognize_batch([image_crop], batch_size=1)[0]
+
+    def recognize_batch(self, image_crops, batch_size=16):
+        """
+        Recognize text from a list of image crops (numpy arrays).
+
+        Crops are denoised at their native size and resized to the model
+        input size by preprocessing.preprocess_batch() (area averaging when
+        shrinking, bilinear when enlarging) before the processor sees them,
+        so they are stacked into batches of batch_size and decoded with one
+        generate() call per batch instead of one per crop.
+
+        Returns:
+            list: Recognized text per crop, in input order ("" for empty crops).
+        """
+        if not image_crops:
+            return []  # Nothing detected; don't load the model for nothing
+
+        texts = [""] * len(image_crops)
+        valid = [
+            i
+            for i, crop in enumerate(image_crops)
+            if crop is not None and crop.size > 0
+        ]
+
+        # Crops seen before with the same recognizer skip the model
+        keys = {}
+        if self.cache:
+            misses = []
+            for i in valid:
+                # Preprocessing changes the text too (and may be changed later)
+                keys[i] = self.cache.key(
+                    image_crops[i], self.preprocessing, self.noise_threshold
+                )
+                cached = self.cache.get(keys[i])
+                if cached is None:
+                    misses.append(i)
+                else:
+                    texts[i] = cached
+            valid = misses
+            if not valid:
+                return texts
+
         if self.model is None:
-            return "Model not loaded"
+            # Keep the texts already served from the cache
+            for i in valid:
+                texts[i] = "Model not loaded"
+            return texts
 
-        if image_crop is None or image_crop.size == 0:
-            return ""
+        for start in range(0, len(valid), batch_size):
+            indices = valid[start : start + batch_size]
+            images = preprocess_batch(
+                [image_crops[i] for i in indices],
+                self.preprocessing,
+                self.noise_threshold,
+                self._input_size(),
+            )
 
-        pil_image = self.preprocess(image_crop)
+            pixel_values = self.processor(
+                images=list(images), return_tensors="pt"
+            ).pixel_values.to(self.device)
 
-        pixel_values = self.processor(
-            images=pil_image, return_tensors="pt"
-        ).pixel_values.to(self.device)
+            with torch.no_grad():
+                generated_ids = self.model.generate(pixel_values)
+                generated_texts = self.processor.batch_decode(
+                    generated_ids, skip_special_tokens=True
+                )
 
-        with torch.no_grad():
-            generated_ids = self.model.generate(pixel_values)
-            generated_text = self.processor.batch_decode(
-                generated_ids, skip_special_tokens=True
-            )[0]
+            for i, text in zip(indices, generated_texts):
+                texts[i] = text
+                if self.cache:
+                    self.cache.put(keys[i], text)
 
-        return generated_text
+        return texts
 
 
 if __name__ == "__main__":
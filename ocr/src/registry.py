@@ -0,0 +1,93 @@
+import os
+import threading
+from backends import load_trocr, load_yolo, set_cpu_threads
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded OCR models.
+
+    Each model is loaded on first use and then stays resident, so every
+    FieldDetector / TextRecognizer with the same configuration shares one
+    copy (e.g. across documents in a long-running OCR service). Hugging Face
+    files are read from cache_dir (OCR_MODEL_CACHE) without a Hub round-trip
+    once downloaded.
+
+    CPU inference threads are a per-process setting (see set_threads()), not
+    part of a model's configuration.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.threads = None
+        self._models = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def set_threads(self, threads):
+        """
+        Set CPU inference threads for the process (None = library default).
+        torch's thread count is process-global, so the first value wins; a
+        different value later is ignored with a warning rather than silently
+        retuning the models already resident.
+        """
+        if not threads or threads == self.threads:
+            return
+        with self._lock:
+            if self.threads is None:
+                self.threads = threads
+                set_cpu_threads(threads)
+            elif threads != self.threads:
+                print(
+                    f"Warning: CPU threads already set to {self.threads} "
+                    f"for this process; ignoring {threads}"
+                )
+
+    def get(self, key, loader):
+        """
+        Return the model for key, calling loader() only the first time.
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = loader()
+                self.loads += 1
+            return self._models[key]
+
+    def trocr(self, model_name, backend="torch", device="cpu"):
+        """
+        (processor, model) for a TrOCR checkpoint; see backends.load_trocr().
+        """
+        return self.get(
+            ("trocr", model_name, backend, device),
+            lambda: load_trocr(
+                model_name,
+                backend=backend,
+                device=device,
+                threads=self.threads,
+                cache_dir=self.cache_dir,
+            ),
+        )
+
+    def yolo(self, model_path, backend="torch", replica=0):
+        """
+        YOLO model for the weights. Ultralytics predictors are not thread-safe,
+        so concurrent callers should use different replica numbers.
+        """
+        return self.get(
+            ("yolo", model_path, backend, replica),
+            lambda: load_yolo(model_path, backend=backend, threads=self.threads),
+        )
+
+    def loaded(self):
+        return list(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+# Shared by every detector/recognizer in the process
+model_registry = ModelRegistry(cache_dir=os.environ.get("OCR_MODEL_CACHE") or None)
@@ -0,0 +1,152 @@
+import time
+from app.services.extract_service import SwiggyExtractService
+
+# Fixture DAPI menu payloads captured from restaurant pages
+delivery_payload = {
+    "statusCode": 0,
+    "data": {
+        "cards": [
+            {
+                "card": {
+                    "card": {
+                        "@type": "type.googleapis.com/swiggy.presentation.food.v2.Restaurant",
+                        "info": {
+                            "id": "20170",
+                            "name": "The Plush",
+                            "avgRatingString": "4.4",
+                        },
+                    }
+                }
+            }
+        ],
+    },
+}
+
+closed_outlet_payload = {
+    "statusCode": 0,
+    "data": {
+        "cards": [
+            {
+                "card": {
+                    "card": {
+                        "@type": "type.googleapis.com/swiggy.gandalf.widgets.v2.TextBoxV2",
+                        "text": "Uh-oh! Outlet is not accepting orders at the moment.",
+                    }
+                }
+            },
+            {
+                "card": {
+                    "card": {
+                        "@type": "type.googleapis.com/swiggy.presentation.food.v2.Restaurant",
+                        "info": {"id": "375316", "name": "Javaphile"},
+                    }
+                }
+            },
+        ],
+    },
+}
+
+not_found_payload = {
+    "statusCode": 1,
+    "statusMessage": "Uh-oh! Sorry! This should not have happened.",
+    "data": {},
+}
+
+empty_menu_payload = {"statusCode": 0, "data": {"cards": []}}
+
+# Fixture dineout pages (server-rendered HTML)
+dineout_page = "<html><head><title>Javaphile, Pali Hill | Dineout</title></head><body>Book a table</body></html>"
+dineout_not_found_page = "<html><head><title>Page Not Found</title></head><body></body></html>"
+dineout_error_page = "<html><head><title>Swiggy</title></head><body>Uh-oh! Sorry! This should not have happened</body></html>"
+
+# App shell of a missing restaurant: HTTP 200, no not-found markers in the HTML
+dineout_shell_page = "<html><head><title>Swiggy</title></head><body><div id=\"root\"></div></body></html>"
+dineout_state_page = '<html><head><title>Swiggy</title></head><body><script>window.___INITIAL_STATE___ = {"restaurantId":"375316"}</script></body></html>'
+
+payload_cases = [
+    (delivery_payload, True),
+    (closed_outlet_payload, True),
+    (not_found_payload, False),
+    (empty_menu_payload, False),
+    (None, False),
+]
+
+html_cases = [
+    (dineout_page, False),
+    (dineout_not_found_page, True),
+    (dineout_error_page, True),
+    ("", True),
+]
+
+
+def test_delivery_availability():
+    print("Testing SwiggyExtractService.extract_availability...")
+    service = SwiggyExtractService()
+
+    correct = 0
+    start = time.perf_counter()
+    for payload, expected in payload_cases:
+        result = service.extract_availability(payload)["restaurant_found"]
+        if result == expected:
+            correct += 1
+        else:
+            print(f"❌ FAILURE: Expected {expected}, got {result}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"Accuracy: {correct}/{len(payload_cases)} in {elapsed_ms:.2f} ms "
+        "(previously a networkidle load + 3 s sleep per check)"
+    )
+    assert correct == len(payload_cases)
+
+
+def test_dineout_not_found_html():
+    print("\nTesting SwiggyExtractService.is_not_found_html...")
+    service = SwiggyExtractService()
+
+    correct = 0
+    for html, expected in html_cases:
+        result = service.is_not_found_html(html)
+        if result == expected:
+            correct += 1
+        else:
+            print(f"❌ FAILURE: Expected {expected}, got {result}")
+
+    print(f"Accuracy: {correct}/{len(html_cases)}")
+    assert correct == len(html_cases)
+
+
+dineout_status_cases = [
+    (dineout_page, True),  # Name in the title
+    (dineout_state_page, True),  # ID in the embedded state
+    (dineout_shell_page, None),  # Soft 404 shell: must be rendered
+    (dineout_not_found_page, False),
+    (dineout_error_page, False),
+]
+
+
+def test_dineout_html_status():
+    print("\nTesting SwiggyExtractService.dineout_html_status...")
+    service = SwiggyExtractService()
+
+    for html, expected in dineout_status_cases:
+        result = service.dineout_html_status(html, "375316", "Javaphile")
+        assert result == expected, f"Expected {expected}, got {result}"
+
+    # Generic name words also appear in Swiggy's own shell title
+    generic_shell = (
+        "<html><head><title>Order Food Online from India's Best Food Delivery "
+        "Service | Swiggy</title></head><body><div id=\"root\"></div></body></html>"
+    )
+    for name in ["The Food Court", "Best Biryani", "Swiggy Kitchen"]:
+        result = service.dineout_html_status(generic_shell, "", name)
+        assert result is None, f"{name}: expected None, got {result}"
+    partial = "<html><head><title>Javaphile, Pali Hill | Dineout</title></head></html>"
+    assert service.dineout_html_status(partial, "", "Javaphile Bandra") is None
+    print("✅ SUCCESS: The app shell is not mistaken for a dineout page.")
+
+
+if __name__ == "__main__":
+    test_delivery_availability()
+    test_dineout_not_found_html()
+    test_dineout_html_status()
@@ -0,0 +1,101 @@
+import asyncio
+import csv
+import os
+import tempfile
+
+import main
+
+
+class FakeSearchService:
+    def __init__(self, blocked):
+        self.blocked = set(blocked)
+        self.searched = []
+
+    async def find_restaurant_url(self, name, location):
+        self.searched.append(name)
+        if name in self.blocked:
+            return {"not_found": True, "retry": True, "error": "Captcha detected"}
+        return {"url": f"https://www.swiggy.com/restaurants/{name}-1", "retry": False}
+
+
+def run_file(input_file, output_file, service):
+    original = main.get_search_service, main.MAX_REQUEUES
+    main.get_search_service, main.MAX_REQUEUES = (lambda: service), 0
+    try:
+        return asyncio.run(main.process_file(input_file, output_file, concurrency=2))
+    finally:
+        main.get_search_service, main.MAX_REQUEUES = original
+
+
+def read_values(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return [row[main.OUTPUT_COLUMN] for row in csv.DictReader(f)]
+
+
+def test_resume_retries_blocked_rows():
+    print("Testing that resume re-searches rows blocked by a captcha...")
+    tmp = tempfile.mkdtemp()
+    input_file = os.path.join(tmp, "in.csv")
+    output_file = os.path.join(tmp, "out.csv")
+    with open(input_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Restaurant Name", "Location"])
+        for name in ["a", "b", "c"]:
+            writer.writerow([name, "Pune"])
+
+    first = FakeSearchService(blocked=["b"])
+    assert run_file(input_file, output_file, first) == 3
+    values = read_values(output_file)
+    assert values[1] == "Blocked", values
+
+    second = FakeSearchService(blocked=[])
+    assert run_file(input_file, output_file, second) == 1
+    assert second.searched == ["b"]
+    values = read_values(output_file)
+    assert values == [f"https://www.swiggy.com/restaurants/{n}-1" for n in "abc"]
+    assert not os.path.exists(f"{output_file}.partial")
+    print("✅ SUCCESS: Only the blocked row was searched again.")
+
+
+def test_resume_checks_the_restaurant():
+    print("\nTesting that resume ignores rows of a different input...")
+    tmp = tempfile.mkdtemp()
+    input_file = os.path.join(tmp, "in.csv")
+    output_file = os.path.join(tmp, "out.csv")
+
+    def write_input(names):
+        with open(input_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Restaurant Name", "Location"])
+            for name in names:
+                writer.writerow([name, "Pune"])
+
+    write_input(["a", "b", "c"])
+    run_file(input_file, output_file, FakeSearchService(blocked=[]))
+
+    # Reordered and edited: only "a", still at position 0, is reused
+    write_input(["a", "c", "d"])
+    second = FakeSearchService(blocked=[])
+    assert run_file(input_file, output_file, second) == 2
+    assert sorted(second.searched) == ["c", "d"]
+    values = read_values(output_file)
+    assert values == [f"https://www.swiggy.com/restaurants/{n}-1" for n in "acd"]
+    print("✅ SUCCESS: Rows are reused only for the same restaurant.")
+
+
+def test_empty_input_file():
+    tmp = tempfile.mkdtemp()
+    input_file = os.path.join(tmp, "empty.csv")
+    open(input_file, "w").close()
+    try:
+        run_file(input_file, os.path.join(tmp, "out.csv"), FakeSearchService([]))
+    except ValueError as e:
+        assert "empty" in str(e)
+    else:
+        raise AssertionError("expected ValueError for an empty input file")
+
+
+if __name__ == "__main__":
+    test_resume_retries_blocked_rows()
+    test_resume_checks_the_restaurant()
+    test_empty_input_file()
@@ -0,0 +1,112 @@
+import asyncio
+import time
+from app.services.circuit_breaker import CircuitBreaker
+from app.api.routes import bulk
+from app.services.bulk_results import RowResult
+
+
+def test_opens_after_captchas_and_recovers():
+    print("Testing CircuitBreaker open -> half-open -> closed...")
+    breaker = CircuitBreaker("test", failure_threshold=3, cooldown_seconds=0.2)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() > 0
+
+    # Rows waiting for the cooldown wake up once a probe may go out
+    start = time.monotonic()
+    asyncio.run(breaker.wait_until_ready(poll_interval=0.01))
+    assert time.monotonic() - start >= 0.15
+
+    # Exactly one probe in half-open state
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    print(f"Stats: {breaker.stats()}")
+    print("✅ SUCCESS: Circuit opened on captchas and closed after a good probe.")
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_failures_outside_window_are_forgotten():
+    breaker = CircuitBreaker("test", failure_threshold=2, window_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_trip_relays_between_breakers():
+    # Two workers' breakers, relayed the way BulkWorkerPool does it
+    first = CircuitBreaker("test", failure_threshold=1, cooldown_seconds=0.2)
+    second = CircuitBreaker("test", failure_threshold=1, cooldown_seconds=0.2)
+    relayed = []
+    first.on_open = lambda breaker: relayed.append(breaker.retry_after())
+    second.on_open = lambda breaker: relayed.append("echo")
+
+    first.record_failure()
+    assert len(relayed) == 1 and relayed[0] > 0.1
+    second.trip(relayed[0])
+    assert relayed == relayed[:1]  # A relayed trip is not sent back
+    assert second.state == CircuitBreaker.OPEN and not second.allow()
+    assert 0.1 < second.retry_after() <= 0.2
+
+    # A shorter relayed cooldown does not cut an open circuit short
+    second.trip(0.01)
+    assert second.retry_after() > 0.1
+    time.sleep(0.21)
+    assert second.allow()  # Half-open probe, as after a local trip
+
+
+def test_rejected_attempts_do_not_use_up_requeues():
+    print("\nTesting that only searched attempts count towards MAX_REQUEUES...")
+    attempts = []
+
+    async def fake_process_row(result, job_id):
+        # Open circuit (no search) for a long outage, then captchas
+        result.reset()
+        attempts.append(len(attempts))
+        result.requeue = True
+        if len(attempts) > 3 * bulk.MAX_REQUEUES:
+            result.requeues += 1
+
+    async def ready():
+        pass
+
+    original = bulk.process_row, bulk.search_circuit.wait_until_ready
+    bulk.process_row, bulk.search_circuit.wait_until_ready = fake_process_row, ready
+    try:
+        semaphore = asyncio.Semaphore(1)
+        row = asyncio.run(
+            bulk.process_row_with_requeue(RowResult("0"), "job", semaphore)
+        )
+    finally:
+        bulk.process_row, bulk.search_circuit.wait_until_ready = original
+
+    assert len(attempts) == 3 * bulk.MAX_REQUEUES + bulk.MAX_REQUEUES + 1
+    assert row.not_found and not row.requeue
+    assert not semaphore.locked()  # Slot handed back after every attempt
+    print("✅ SUCCESS: Rejected attempts were free; searched ones were counted.")
+
+
+if __name__ == "__main__":
+    test_opens_after_captchas_and_recovers()
+    test_failed_probe_reopens()
+    test_failures_outside_window_are_forgotten()
+    test_trip_relays_between_breakers()
+    test_rejected_attempts_do_not_use_up_requeues()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from app.services.fingerprint import FingerprintRotator, DEFAULT_USER_AGENT
+
+user_agents = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
+]
+
+
+def make_rotator(tmp_dir, **kwargs):
+    path = os.path.join(tmp_dir, "user_agents.tsv")
+    with open(path, "w") as f:
+        f.write("User Agents\n" + "\n".join(user_agents) + "\n")
+    return FingerprintRotator(data_path=path, **kwargs)
+
+
+def test_consistent_profiles():
+    print("Testing FingerprintRotator profile consistency...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first = make_rotator(tmp_dir)
+        second = make_rotator(tmp_dir)
+
+        # Same UA always maps to the same viewport/locale
+        for a, b in zip(first.profiles, second.profiles):
+            assert first.context_options(a) == second.context_options(b)
+
+        # Mobile UAs are skipped; the scrapers' selectors target desktop layouts
+        desktop = user_agents[:2]
+        assert [p["user_agent"] for p in first.profiles] == desktop
+        assert all(p["viewport"]["width"] >= 1366 for p in first.profiles)
+        assert "is_mobile" not in first.context_options(first.profiles[0])
+
+        used = {first.acquire()["user_agent"] for _ in range(len(desktop))}
+        assert used == set(desktop)
+        print("✅ SUCCESS: Profiles are stable and rotated evenly.")
+
+
+def test_retire_blocked_profile():
+    print("\nTesting FingerprintRotator block tracking...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rotator = make_rotator(tmp_dir, min_samples=3, max_block_rate=0.5)
+
+        for _ in range(6):
+            profile = rotator.acquire()
+            rotator.report(profile, blocked="Macintosh" in profile["user_agent"])
+
+        retired = [s["user_agent"] for s in rotator.stats() if s["retired"]]
+        print(f"Retired: {retired}")
+        assert retired == [user_agents[1]]
+        print("✅ SUCCESS: Blocked profile retired.")
+
+
+def test_missing_file_fallback():
+    rotator = FingerprintRotator(data_path="/nonexistent/user_agents.tsv")
+    assert rotator.acquire()["user_agent"] == DEFAULT_USER_AGENT
+
+
+if __name__ == "__main__":
+    test_consistent_profiles()
+    test_retire_blocked_profile()
+    test_missing_file_fallback()
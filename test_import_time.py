@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+# Modules that must only be imported when a job/search actually runs
+LAZY_MODULES = ["pandas", "playwright", "playwright_stealth"]
+
+# Budget for the app's own modules (sum of self import time), in microseconds
+APP_IMPORT_BUDGET_US = 100_000
+
+
+def measure_imports(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def test_app_import_budget():
+    print("Measuring `python -X importtime -c 'import app.main'`...")
+    timings = measure_imports("app.main")
+
+    eager = [m for m in LAZY_MODULES if m in timings]
+    app_self_us = sum(t[0] for name, t in timings.items() if name.startswith("app"))
+    total_us = timings["app.main"][1]
+
+    print(f"app.main cumulative: {total_us / 1000:.1f} ms")
+    print(f"app modules (self):  {app_self_us / 1000:.1f} ms")
+    print(f"Eagerly imported heavy modules: {eager or 'none'}")
+
+    assert not eager
+    assert app_self_us < APP_IMPORT_BUDGET_US
+
+
+if __name__ == "__main__":
+    test_app_import_budget()
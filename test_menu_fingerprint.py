@@ -0,0 +1,102 @@
+import copy
+import tempfile
+from app.services import extract_service
+from app.services.extract_service import SwiggyExtractService
+from app.services.menu_fingerprints import MenuFingerprintStore
+
+DISH = "type.googleapis.com/swiggy.presentation.food.v2.Dish"
+RESTAURANT = "type.googleapis.com/swiggy.presentation.food.v2.Restaurant"
+
+payload = {
+    "statusCode": 0,
+    "data": {
+        "cards": [
+            {
+                "card": {
+                    "card": {
+                        "@type": RESTAURANT,
+                        "info": {
+                            "id": "20170",
+                            "avgRatingString": "4.4",
+                            "totalRatingsString": "1K+ ratings",
+                        },
+                    }
+                }
+            },
+            {"card": {"card": {"offers": [{"info": {"header": "50% OFF"}}]}}},
+            {
+                "card": {
+                    "card": {
+                        "itemCards": [
+                            {"card": {"@type": DISH, "info": {"name": "Pizza", "price": 9900}}},
+                            {"card": {"@type": DISH, "info": {"name": "Pasta", "price": 14900}}},
+                        ]
+                    }
+                }
+            },
+        ],
+        "trackingId": "abc",
+    },
+}
+
+
+def test_payload_fingerprint():
+    print("Testing DAPI payload fingerprint...")
+    service = SwiggyExtractService()
+    base = service.payload_fingerprint(payload)
+
+    # Volatile fields and dish order do not count as a change
+    noisy = copy.deepcopy(payload)
+    noisy["data"]["trackingId"] = "xyz"
+    items = noisy["data"]["cards"][2]["card"]["card"]["itemCards"]
+    items.reverse()
+    assert service.payload_fingerprint(noisy) == base
+
+    # Dish, offer and rating changes do
+    for path, value in [
+        (lambda p: p["data"]["cards"][2]["card"]["card"]["itemCards"][0]["card"]["info"], {"name": "Pizza", "price": 8900}),
+        (lambda p: p["data"]["cards"][1]["card"]["card"], {"offers": []}),
+        (lambda p: p["data"]["cards"][0]["card"]["card"]["info"], {"avgRatingString": "4.5"}),
+    ]:
+        changed = copy.deepcopy(payload)
+        path(changed).update(value)
+        assert service.payload_fingerprint(changed) != base
+
+    assert service.payload_fingerprint(None) == ""
+
+    # New extractor code never matches fingerprints taken by the old code
+    original = extract_service.EXTRACTOR_VERSION
+    extract_service.EXTRACTOR_VERSION = original + 1
+    try:
+        assert service.payload_fingerprint(payload) != base
+    finally:
+        extract_service.EXTRACTOR_VERSION = original
+    print("✅ SUCCESS: Fingerprint tracks dishes, offers and ratings only.")
+
+
+def test_fingerprint_store():
+    print("\nTesting MenuFingerprintStore...")
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = MenuFingerprintStore(store_dir=store_dir)
+        assert store.get("20170", 1) is None
+
+        store.put("20170", "f1", {"promo_codes": ["50% OFF"]}, 1)
+        record = store.get("20170", 1)
+        assert record["fingerprint"] == "f1"
+        assert record["extraction"] == {"promo_codes": ["50% OFF"]}
+
+        # Records from another extractor version (or none) are misses
+        assert store.get("20170", 2) is None
+        with open(store._path("20170"), "w", encoding="utf-8") as f:
+            f.write('{"fingerprint": "f1", "extraction": {"gone_field": 1}}')
+        assert store.get("20170", 1) is None
+
+        # Non-ID keys are never written
+        store.put("../x", "f2", {}, 1)
+        assert store.get("../x", 1) is None
+    print("✅ SUCCESS: Fingerprints persisted per restaurant.")
+
+
+if __name__ == "__main__":
+    test_payload_fingerprint()
+    test_fingerprint_store()
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+# The OCR pipeline lives in ocr/src and imports its modules as siblings
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr/src"))
+
+from cache import StageCache, array_digest, hub_revision  # noqa: E402
+
+
+def test_array_digest():
+    print("Testing array_digest stability...")
+    page = np.arange(60, dtype=np.uint8).reshape(5, 4, 3)
+    assert array_digest(page) == array_digest(page.copy())
+    # A non-contiguous crop hashes like its contiguous copy
+    crop = page[1:4, 1:3]
+    assert not crop.flags["C_CONTIGUOUS"]
+    assert array_digest(crop) == array_digest(np.ascontiguousarray(crop))
+    # Same bytes under a different shape or dtype are different inputs
+    assert array_digest(page) != array_digest(page.reshape(4, 5, 3))
+    assert array_digest(page) != array_digest(page.view(np.int8))
+    changed = page.copy()
+    changed[0, 0, 0] += 1
+    assert array_digest(page) != array_digest(changed)
+    print("✅ SUCCESS: Digests depend on content, shape and dtype only.")
+
+
+def test_stage_cache():
+    print("\nTesting StageCache keys, versions and round-trip...")
+    cache_dir = tempfile.mkdtemp()
+    crop = np.full((8, 16, 3), 200, dtype=np.uint8)
+
+    cache = StageCache(cache_dir, "text", "trocr@abc:torch")
+    key = cache.key(crop, "nlmeans", 5.0)
+    assert key == StageCache(cache_dir, "text", "trocr@abc:torch").key(
+        crop.copy(), "nlmeans", 5.0
+    )
+    assert key != cache.key(crop, "auto", 5.0)  # Settings are part of the key
+
+    assert cache.get(key) is None
+    cache.put(key, "Pune")
+    assert cache.get(key) == "Pune"
+    detections = [{"class_id": 1, "bbox": [1.5, 2.0, 3.0, 4.0]}]
+    cache.put(key, detections)
+    assert cache.get(key) == detections  # Overwritten atomically
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.summary() == "2/3 cached"
+    assert not [n for _, _, files in os.walk(cache_dir) for n in files if n.endswith(".tmp")]
+
+    # A new model version misses instead of returning stale results
+    retrained = StageCache(cache_dir, "text", "trocr@def:torch")
+    assert retrained.get(retrained.key(crop, "nlmeans", 5.0)) is None
+    # Stages are kept apart
+    detections_cache = StageCache(cache_dir, "detections", "trocr@abc:torch")
+    assert detections_cache.get(key) is None
+    print("✅ SUCCESS: Round-trip works and a version change misses.")
+
+
+def test_hub_revision():
+    try:
+        import huggingface_hub  # noqa: F401
+    except ImportError:
+        print("\nSkipping hub_revision test (huggingface_hub not installed).")
+        return
+
+    print("\nTesting hub_revision against a local Hub cache layout...")
+    cache_dir = tempfile.mkdtemp()
+    repo = os.path.join(cache_dir, "models--org--trocr")
+    os.makedirs(os.path.join(repo, "refs"))
+    os.makedirs(os.path.join(repo, "snapshots", "c0ffee"))
+    with open(os.path.join(repo, "refs", "main"), "w") as f:
+        f.write("c0ffee")
+    open(os.path.join(repo, "snapshots", "c0ffee", "config.json"), "w").close()
+
+    assert hub_revision("org/trocr", cache_dir) == "c0ffee"
+    assert hub_revision("org/missing", cache_dir) is None
+    print("✅ SUCCESS: The cached snapshot commit is resolved.")
+
+
+if __name__ == "__main__":
+    test_array_digest()
+    test_stage_cache()
+    test_hub_revision()
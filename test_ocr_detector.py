@@ -0,0 +1,176 @@
+import os
+import sys
+import tempfile
+import numpy as np
+
+# The OCR pipeline lives in ocr/src and imports its modules as siblings
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr/src"))
+
+try:
+    from detector import FieldDetector
+except ImportError:  # opencv is only installed with the OCR extras
+    FieldDetector = None
+
+
+class StubTensor:
+    """
+    Just enough of a torch tensor for .cpu().numpy().
+    """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class StubBoxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = StubTensor(np.reshape(xyxy, (-1, 4)))
+        self.conf = StubTensor(conf)
+        self.cls = StubTensor(cls)
+
+    def __len__(self):
+        return len(self.conf.values)
+
+
+class StubModel:
+    """
+    YOLO stand-in: fixed raw boxes per page, filtered by conf like predict().
+    """
+
+    names = {0: "name", 1: "phone"}
+
+    def __init__(self, boxes):
+        # [(x1, y1, x2, y2, confidence, class_id), ...]
+        self.boxes = boxes
+        self.batches = []
+
+    def predict(self, pages, conf=0.25, save=False, verbose=True):
+        self.batches.append(len(pages))
+        results = []
+        for _ in pages:
+            kept = [b for b in self.boxes if b[4] >= conf]
+            boxes = StubBoxes(
+                [b[:4] for b in kept], [b[4] for b in kept], [b[5] for b in kept]
+            )
+            results.append(type("Result", (), {"boxes": boxes, "names": self.names}))
+        return results
+
+
+def stub_detector(boxes, **kwargs):
+    model = StubModel(boxes)
+    detector = type("StubDetector", (FieldDetector,), {"model": model})(
+        model_path="stub.pt", **kwargs
+    )
+    return detector, model
+
+
+def old_detections(image, result):
+    # The per-box loop detect() used before batching, for comparison
+    detections = []
+    for n in range(len(result.boxes)):
+        x1, y1, x2, y2 = result.boxes.xyxy.numpy()[n].astype(int)
+        cls_id = int(result.boxes.cls.numpy()[n])
+        detections.append(
+            {
+                "class_id": cls_id,
+                "class_name": result.names[cls_id],
+                "confidence": float(result.boxes.conf.numpy()[n]),
+                "bbox": [x1, y1, x2, y2],
+                "crop": image[y1:y2, x1:x2],
+            }
+        )
+    return detections
+
+
+def page(seed):
+    return np.random.default_rng(seed).integers(0, 255, (60, 80, 3), dtype=np.uint8)
+
+
+BOXES = [
+    (5.2, 4.9, 30.7, 20.1, 0.91, 0),
+    (40.0, 10.0, 79.0, 59.0, 0.62, 1),
+    (10.0, 30.0, 20.0, 50.0, 0.30, 1),  # Below the default threshold
+]
+
+
+def test_detect_batch_matches_per_box_loop():
+    if FieldDetector is None:
+        print("Skipping detect_batch test (opencv not installed).")
+        return
+
+    print("Testing detect_batch boxes, confidence filter and crops...")
+    detector, model = stub_detector(BOXES)
+    pages = [page(1), None, page(2), page(3)]
+    all_detections = detector.detect_batch(pages, conf_threshold=0.5, batch_size=2)
+    assert model.batches == [2, 1]  # Unreadable pages are skipped
+    assert all_detections[1] == []
+
+    for image, detections in zip(pages, all_detections):
+        if image is None:
+            continue
+        expected = old_detections(image, model.predict([image], conf=0.5)[0])
+        assert [d["bbox"] for d in detections] == [[5, 4, 30, 20], [40, 10, 79, 59]]
+        assert [d["class_name"] for d in detections] == ["name", "phone"]
+        for d, e in zip(detections, expected):
+            assert (d["class_id"], d["bbox"]) == (e["class_id"], e["bbox"])
+            assert abs(d["confidence"] - e["confidence"]) < 1e-6
+            assert np.array_equal(d["crop"], e["crop"])
+            assert np.shares_memory(d["crop"], image)  # A view, not a copy
+
+    detector, _ = stub_detector(BOXES)
+    assert len(detector.detect(page(1), conf_threshold=0.25)) == 3
+    print("✅ SUCCESS: Detections match the per-box loop.")
+
+
+def test_detect_batch_clips_boxes():
+    if FieldDetector is None:
+        print("\nSkipping box clipping test (opencv not installed).")
+        return
+
+    print("\nTesting boxes running off the page are clipped...")
+    detector, _ = stub_detector([(-3.0, 50.0, 90.0, 70.0, 0.8, 0)])
+    image = page(4)
+    (detection,) = detector.detect(image)
+    assert detection["bbox"] == [0, 50, 80, 60]
+    assert np.array_equal(detection["crop"], image[50:60, 0:80])
+    print("✅ SUCCESS: Boxes are clipped to the page.")
+
+
+def test_detection_cache_round_trip():
+    if FieldDetector is None:
+        print("\nSkipping detection cache test (opencv not installed).")
+        return
+
+    print("\nTesting cached detections are re-cropped from the page...")
+    cache_dir = tempfile.mkdtemp()
+    pages = [page(1), page(2)]
+    detector, model = stub_detector(BOXES, cache_dir=cache_dir)
+    first = detector.detect_batch(pages)
+
+    cached, model = stub_detector(BOXES, cache_dir=cache_dir)
+    second = cached.detect_batch([page(1), page(2)])
+    assert model.batches == []  # Served from the cache
+    assert (cached.cache.hits, cached.cache.misses) == (2, 0)
+    for a, b, image in zip(first, second, pages):
+        assert [{k: v for k, v in d.items() if k != "crop"} for d in a] == [
+            {k: v for k, v in d.items() if k != "crop"} for d in b
+        ]
+        for d in b:
+            x1, y1, x2, y2 = d["bbox"]
+            assert np.array_equal(d["crop"], image[y1:y2, x1:x2])
+
+    # The threshold is part of the key: a different one runs the model
+    cached.detect_batch([page(1)], conf_threshold=0.25)
+    assert model.batches == [1]
+    print("✅ SUCCESS: Cached boxes round-trip with fresh crops.")
+
+
+if __name__ == "__main__":
+    test_detect_batch_matches_per_box_loop()
+    test_detect_batch_clips_boxes()
+    test_detection_cache_round_trip()
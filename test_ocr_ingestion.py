@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+
+# The OCR pipeline lives in ocr/src and imports its modules as siblings
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr/src"))
+
+try:
+    from PIL import Image
+    import ingestion
+except ImportError:  # pdf2image / Pillow are only installed with the OCR extras
+    ingestion = None
+
+
+class StubPoppler:
+    """
+    Stands in for pdf2image: page n renders as a solid gray image of level n.
+    """
+
+    def __init__(self, pages, fail_window=None):
+        self.pages = pages
+        self.fail_window = fail_window
+        self.calls = []
+
+    def pdfinfo_from_path(self, pdf_path):
+        if self.pages is None:
+            raise OSError("Syntax Error: Couldn't read xref table")
+        return {"Pages": self.pages}
+
+    def convert_from_path(self, pdf_path, dpi=200, first_page=None, last_page=None):
+        self.calls.append((first_page, last_page))
+        if (first_page, last_page) == self.fail_window:
+            raise RuntimeError("poppler crashed")
+        return [
+            Image.new("RGB", (4, 3), (n, n, n))
+            for n in range(first_page, last_page + 1)
+        ]
+
+
+def with_poppler(poppler, fn):
+    originals = ingestion.convert_from_path, ingestion.pdfinfo_from_path
+    ingestion.convert_from_path = poppler.convert_from_path
+    ingestion.pdfinfo_from_path = poppler.pdfinfo_from_path
+    try:
+        return fn()
+    finally:
+        ingestion.convert_from_path, ingestion.pdfinfo_from_path = originals
+
+
+def stub_pdf():
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="scan")
+    os.close(fd)
+    return path
+
+
+def test_pages_in_order_across_windows():
+    if ingestion is None:
+        print("Skipping iter_pdf_pages test (pdf2image not installed).")
+        return
+
+    print("Testing iter_pdf_pages order and numbering across windows...")
+    pdf_path = stub_pdf()
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    for prefetch in (True, False):
+        poppler = StubPoppler(pages=5)
+        pages = with_poppler(
+            poppler,
+            lambda: list(ingestion.iter_pdf_pages(pdf_path, window=2, prefetch=prefetch)),
+        )
+        assert poppler.calls == [(1, 2), (3, 4), (5, 5)]
+        assert [name for name, _ in pages] == [f"{stem}_page_{n}.jpg" for n in range(1, 6)]
+        # Each array is the page it is named after, in BGR layout
+        assert [int(array[0, 0, 0]) for _, array in pages] == [1, 2, 3, 4, 5]
+        assert all(array.shape == (3, 4, 3) for _, array in pages)
+    print("✅ SUCCESS: Pages come out in order with their own numbers.")
+
+
+def test_failed_window_raises_after_earlier_pages():
+    if ingestion is None:
+        print("\nSkipping render failure test (pdf2image not installed).")
+        return
+
+    print("\nTesting a failed window raises RenderError after the pages before it...")
+    pdf_path = stub_pdf()
+    for prefetch in (True, False):
+        yielded = []
+
+        def render():
+            for name, _ in ingestion.iter_pdf_pages(pdf_path, window=2, prefetch=prefetch):
+                yielded.append(name)
+
+        try:
+            with_poppler(StubPoppler(pages=5, fail_window=(3, 4)), render)
+        except ingestion.RenderError as e:
+            assert str(e) == "Error converting pages 3-4: poppler crashed", e
+        else:
+            raise AssertionError("expected RenderError for the failed window")
+        assert [name.rsplit("_", 1)[1] for name in yielded] == ["1.jpg", "2.jpg"]
+    print("✅ SUCCESS: Pages before the failure are kept, the rest raise.")
+
+
+def test_unreadable_pdf_raises():
+    if ingestion is None:
+        print("\nSkipping page_windows test (pdf2image not installed).")
+        return
+
+    print("\nTesting page_windows on missing, unreadable and empty PDFs...")
+    pdf_path = stub_pdf()
+    assert with_poppler(StubPoppler(pages=5), lambda: ingestion.page_windows(pdf_path, 2)) == [
+        (1, 2),
+        (3, 4),
+        (5, 5),
+    ]
+    cases = [
+        (pdf_path + ".missing", StubPoppler(pages=5), "not found"),
+        (pdf_path, StubPoppler(pages=None), "Error reading PDF"),
+        (pdf_path, StubPoppler(pages=0), "has no pages"),
+    ]
+    for path, poppler, message in cases:
+        try:
+            with_poppler(poppler, lambda: list(ingestion.iter_pdf_pages(path)))
+        except ingestion.RenderError as e:
+            assert message in str(e), e
+        else:
+            raise AssertionError(f"expected RenderError ({message})")
+    print("✅ SUCCESS: Unreadable PDFs raise RenderError.")
+
+
+if __name__ == "__main__":
+    test_pages_in_order_across_windows()
+    test_failed_window_raises_after_earlier_pages()
+    test_unreadable_pdf_raises()
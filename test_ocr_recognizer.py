@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+
+# The OCR pipeline lives in ocr/src and imports its modules as siblings
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr/src"))
+
+try:
+    import torch
+    from recognizer import TextRecognizer
+except ImportError:  # torch / opencv are only installed with the OCR extras
+    TextRecognizer = None
+
+
+class StubProcessor:
+    """
+    TrOCR processor stand-in: pixel values are the preprocessed crops as-is.
+    """
+
+    image_processor = SimpleNamespace(size={"height": 8, "width": 16})
+
+    def __call__(self, images, return_tensors="pt"):
+        assert all(image.shape == (8, 16, 3) for image in images)
+        return SimpleNamespace(pixel_values=torch.tensor(np.stack(images)))
+
+    def batch_decode(self, generated_ids, skip_special_tokens=True):
+        return [str(int(i)) for i in generated_ids]
+
+
+class StubModel:
+    """
+    Reads each crop back as its (uniform) gray level, one batch per call.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def generate(self, pixel_values):
+        self.batches.append(len(pixel_values))
+        return pixel_values.float().mean(dim=(1, 2, 3)).round()
+
+
+def crop(level, shape=(12, 30, 3)):
+    return np.full(shape, level, dtype=np.uint8)
+
+
+def stub_recognizer(**kwargs):
+    recognizer = TextRecognizer(use_gpu=False, preprocessing="none", **kwargs)
+    recognizer._loaded = True
+    recognizer._processor = StubProcessor()
+    recognizer._model = StubModel()
+    return recognizer
+
+
+def unloadable_recognizer(**kwargs):
+    recognizer = TextRecognizer(use_gpu=False, preprocessing="none", **kwargs)
+
+    def load():
+        raise AssertionError("model loaded for cached crops")
+
+    recognizer._load = load
+    return recognizer
+
+
+def test_recognize_batch_order():
+    if TextRecognizer is None:
+        print("Skipping recognize_batch test (torch/opencv not installed).")
+        return
+
+    print("Testing recognize_batch order, empty crops and batching...")
+    recognizer = stub_recognizer()
+    crops = [crop(10), None, crop(20, (40, 5, 3)), crop(30), np.empty((0, 4, 3)), crop(40)]
+    texts = recognizer.recognize_batch(crops, batch_size=2)
+    assert texts == ["10", "", "20", "30", "", "40"], texts
+    assert recognizer.model.batches == [2, 2]  # Empty crops never reach the model
+    assert recognizer.recognize(crop(50)) == "50"
+    assert unloadable_recognizer().recognize_batch([]) == []
+    print("✅ SUCCESS: Texts come back in input order, empty crops as ''.")
+
+
+def test_recognize_batch_cache():
+    if TextRecognizer is None:
+        print("\nSkipping recognizer cache test (torch/opencv not installed).")
+        return
+
+    print("\nTesting recognizer cache hits without loading the model...")
+    cache_dir = tempfile.mkdtemp()
+    # A local checkpoint directory: versioned by content, no Hub lookup
+    model_dir = tempfile.mkdtemp()
+    open(os.path.join(model_dir, "config.json"), "w").close()
+    options = {"model_name": model_dir, "cache_dir": cache_dir}
+
+    crops = [crop(10), None, crop(20)]
+    first = stub_recognizer(**options)
+    assert first.recognize_batch(crops) == ["10", "", "20"]
+
+    cached = unloadable_recognizer(**options)
+    assert cached.recognize_batch(crops) == ["10", "", "20"]
+    assert (cached.cache.hits, cached.cache.misses) == (2, 0)
+
+    # Only the new crop goes to the model; hits keep their positions
+    mixed = stub_recognizer(**options)
+    assert mixed.recognize_batch([crop(30), crop(20)]) == ["30", "20"]
+    assert mixed.model.batches == [1]
+    print("✅ SUCCESS: Cached crops are served without the model.")
+
+
+if __name__ == "__main__":
+    test_recognize_batch_order()
+    test_recognize_batch_cache()
@@ -0,0 +1,172 @@
+import asyncio
+import io
+import os
+import threading
+from fastapi import HTTPException, UploadFile
+from app.api.routes import ocr
+from app.services.ocr_service import OCRService
+
+
+class StubDetector:
+    def detect(self, page):
+        return [{"class_name": "name", "confidence": 0.9, "bbox": [0, 0, 1, 1]}]
+
+
+class StubRecognizer:
+    def recognize_batch(self, crops, batch_size=16):
+        return ["text"] * len(crops)
+
+
+def stub_process_document(
+    pdf_path,
+    detector,
+    recognizer,
+    output_dir,
+    batch_size=16,
+    on_page=None,
+    gate=None,
+    pages=2,
+    fail_after=None,
+):
+    """
+    Stand-in for pipeline.process_document: `pages` pages streamed via
+    on_page, raising like a failed render window after `fail_after` pages.
+    """
+    if gate:
+        gate.wait()
+    assert os.path.exists(pdf_path)
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    results = []
+    for page_number in range(1, pages + 1):
+        if page_number - 1 == fail_after:
+            raise RuntimeError(f"Error converting pages {page_number}-{page_number}: boom")
+        detections = detector.detect(page_number)
+        texts = recognizer.recognize_batch(detections)
+        page_data = {
+            "page": f"{stem}_page_{page_number}.jpg",
+            "fields": [
+                {"field": d["class_name"], "text": text}
+                for d, text in zip(detections, texts)
+            ],
+        }
+        results.append(page_data)
+        on_page(page_data)
+    return results
+
+
+def stub_service(max_queued=16, gate=None, **document):
+    service = OCRService(workers=1, max_queued=max_queued)
+
+    def process_document(*args, **kwargs):
+        return stub_process_document(*args, gate=gate, **document, **kwargs)
+
+    service._pipelines = [(process_document, StubDetector(), StubRecognizer())]
+    return service
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def upload(name="scan.pdf"):
+    return UploadFile(file=io.BytesIO(b"%PDF-1.4 stub"), filename=name)
+
+
+async def run_upload_to_complete():
+    result = await ocr.upload_pdf(upload())
+    job_id = result["job_id"]
+    assert result["status"] == "queued"
+
+    websocket = FakeWebSocket()
+    await asyncio.wait_for(ocr.websocket_endpoint(websocket, job_id), timeout=5)
+
+    types = [m["type"] for m in websocket.sent]
+    assert types == ["status", "page", "page", "complete"], types
+    pages = [m["data"]["page"] for m in websocket.sent if m["type"] == "page"]
+    assert pages == ["scan_page_1.jpg", "scan_page_2.jpg"]
+
+    results = await ocr.get_results(job_id)
+    assert results["status"] == "completed"
+    assert [p["fields"][0]["text"] for p in results["pages"]] == ["text", "text"]
+    return ocr.ocr_jobs[job_id]
+
+
+async def run_until_done():
+    job_id = (await ocr.upload_pdf(upload()))["job_id"]
+    websocket = FakeWebSocket()
+    await asyncio.wait_for(ocr.websocket_endpoint(websocket, job_id), timeout=5)
+    return ocr.ocr_jobs[job_id], websocket.sent
+
+
+async def run_queue_full(service, gate):
+    # One document in the worker (held at the gate), one waiting: queue full
+    await ocr.upload_pdf(upload("a.pdf"))
+    await asyncio.sleep(0.1)
+    await ocr.upload_pdf(upload("b.pdf"))
+
+    spooled = set(os.listdir(ocr.tempfile.gettempdir()))
+    try:
+        await ocr.upload_pdf(upload("c.pdf"))
+    except HTTPException as e:
+        assert e.status_code == 503
+        assert e.headers["Retry-After"] == "30"
+    else:
+        raise AssertionError("expected 503 with a full OCR queue")
+    # The rejected upload's spooled copy is removed
+    assert set(os.listdir(ocr.tempfile.gettempdir())) == spooled
+
+    gate.set()
+    await asyncio.wait_for(service._pending.join(), timeout=5)
+
+
+def with_service(service, coroutine_fn, *args):
+    original = ocr.get_ocr_service
+    ocr.get_ocr_service = lambda: service
+    try:
+        return asyncio.run(coroutine_fn(*args))
+    finally:
+        ocr.get_ocr_service = original
+
+
+def test_upload_streams_pages():
+    print("Testing OCR upload -> page messages -> complete...")
+    job = with_service(stub_service(), run_upload_to_complete)
+    assert job["error"] is None
+    print("✅ SUCCESS: Pages were streamed and the job completed.")
+
+
+def test_render_failure_reports_error():
+    print("\nTesting that a failed render is an error, not a short completion...")
+    job, sent = with_service(stub_service(pages=3, fail_after=1), run_until_done)
+    assert [m["type"] for m in sent] == ["status", "page", "error"], sent
+    assert job["status"] == "error" and "Error converting pages 2-2" in job["error"]
+    assert len(job["pages"]) == 1  # Pages before the failure are kept
+
+    job, sent = with_service(stub_service(pages=0), run_until_done)
+    assert [m["type"] for m in sent] == ["status", "error"]
+    assert job["status"] == "error" and "No pages" in job["error"]
+    print("✅ SUCCESS: Render failures are reported with their error.")
+
+
+def test_queue_full_returns_503():
+    print("\nTesting 503 when the OCR queue is full...")
+    gate = threading.Event()
+    service = stub_service(max_queued=1, gate=gate)
+    with_service(service, run_queue_full, service, gate)
+    print("✅ SUCCESS: The third upload was rejected with 503.")
+
+
+if __name__ == "__main__":
+    test_upload_streams_pages()
+    test_render_failure_reports_error()
+    test_queue_full_returns_503()
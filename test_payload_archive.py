@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+import tempfile
+from app.services.payload_archive import PayloadArchive
+from app.replay_payloads import replay
+
+RESTAURANT = "type.googleapis.com/swiggy.presentation.food.v2.Restaurant"
+
+
+def make_payload(rating):
+    return {
+        "statusCode": 0,
+        "data": {
+            "cards": [
+                {
+                    "card": {
+                        "card": {
+                            "@type": RESTAURANT,
+                            "info": {"id": "714", "avgRatingString": rating},
+                        }
+                    }
+                }
+            ]
+        },
+    }
+
+
+def test_archive_roundtrip():
+    print("Testing PayloadArchive write/read...")
+    with tempfile.TemporaryDirectory() as archive_dir:
+        assert not PayloadArchive(None).write("https://x", make_payload("4.1"))
+
+        archive = PayloadArchive(archive_dir)
+        url = "https://www.swiggy.com/restaurants/pizza-hut-lower-parel-mumbai-714"
+        assert archive.write(url, make_payload("4.1"))
+        assert archive.write(url, make_payload("4.2"))
+        assert not archive.write(url, None)
+
+        records = list(archive.records())
+        print(f"Files: {[os.path.basename(p) for p in archive.archive_files()]}")
+        assert [r["payload"]["data"]["cards"][0]["card"]["card"]["info"]["avgRatingString"] for r in records] == ["4.1", "4.2"]
+        assert records[0]["restaurant_id"] == "714"
+    print("✅ SUCCESS: Payloads appended as compressed frames and read back.")
+
+
+def test_replay():
+    print("\nTesting offline replay...")
+    with tempfile.TemporaryDirectory() as archive_dir:
+        archive = PayloadArchive(archive_dir)
+        url = "https://www.swiggy.com/restaurants/pizza-hut-lower-parel-mumbai-714"
+        archive.write(url, make_payload("4.1"))
+        archive.write(url, make_payload("4.3"))
+
+        output = os.path.join(archive_dir, "replayed.csv")
+        assert replay(archive, output) == 2
+        assert replay(archive, output, latest_only=True) == 1
+        with open(output, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["rating"] == "4.3"
+        assert json.loads(rows[0]["promo_codes"]) == []
+    print("✅ SUCCESS: Extractors re-run over the archive without network.")
+
+
+if __name__ == "__main__":
+    test_archive_roundtrip()
+    test_replay()
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from app.services.rate_limiter import HostRateLimiter
+
+
+async def burst_of_requests(limiter, url, count):
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire(url) for _ in range(count)))
+    return time.monotonic() - start
+
+
+def test_token_bucket_smooths_bursts():
+    print("Testing HostRateLimiter per-host token buckets...")
+    limiter = HostRateLimiter({"duckduckgo.com": (20.0, 2), "swiggy.com": (100.0, 10)})
+
+    # 2 go through on the burst, the other 4 are spaced 50 ms apart
+    elapsed = asyncio.run(burst_of_requests(limiter, "https://duckduckgo.com/", 6))
+    print(f"6 DDG requests took {elapsed:.3f}s")
+    assert 0.18 <= elapsed < 0.5
+
+    # Other hosts have their own budget; unknown hosts are not limited
+    elapsed = asyncio.run(
+        burst_of_requests(limiter, "https://www.swiggy.com/restaurants/x-rest1", 5)
+    )
+    assert elapsed < 0.05
+    assert limiter.bucket_for("https://example.com/") is None
+
+    stats = limiter.stats()
+    print(f"Stats: {stats}")
+    assert stats["duckduckgo.com"]["requests"] == 6
+    assert stats["duckduckgo.com"]["throttled"] == 4
+    print("✅ SUCCESS: Requests were spread out at the configured rate.")
+
+
+def test_parse_limits():
+    limits = HostRateLimiter._parse_limits("duckduckgo.com=0.2:1, swiggy.com=1:3,bad")
+    assert limits == {"duckduckgo.com": (0.2, 1), "swiggy.com": (1.0, 3)}
+
+    # Non-positive rates/bursts are ignored like malformed entries
+    limits = HostRateLimiter._parse_limits(
+        "a.com=0:2,b.com=-1:2,c.com=1:0,d.com=nan:1,e.com=1:1"
+    )
+    assert limits == {"e.com": (1.0, 1)}
+
+
+def test_acquire_sync():
+    limiter = HostRateLimiter({"swiggy.com": (20.0, 1)})
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire_sync("https://www.swiggy.com/")
+    assert 0.08 <= time.monotonic() - start < 0.3
+    assert limiter.acquire_sync("https://example.com/") == 0.0
+
+
+def test_split():
+    limiter = HostRateLimiter({"duckduckgo.com": (0.5, 2), "swiggy.com": (2.0, 5)})
+    share = limiter.split(4)
+    assert share.buckets["duckduckgo.com"].rate == 0.125
+    assert share.buckets["duckduckgo.com"].burst == 1.0  # Never below 1
+    assert share.buckets["swiggy.com"].rate == 0.5
+    assert share.buckets["swiggy.com"].burst == 1.25
+    assert limiter.buckets["swiggy.com"].rate == 2.0  # Original untouched
+
+
+if __name__ == "__main__":
+    test_token_bucket_smooths_bursts()
+    test_parse_limits()
+    test_acquire_sync()
+    test_split()
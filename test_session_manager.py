@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from app.services.session_manager import BrowserSessionManager
+
+
+def write_state(state_dir, name, expires, session_cookie=True):
+    path = os.path.join(state_dir, name)
+    cookies = [
+        {"name": "_device_id", "value": "x", "domain": ".swiggy.com", "expires": expires},
+    ]
+    if session_cookie:
+        cookies.append(
+            {"name": "_sid", "value": "abc", "domain": ".swiggy.com", "expires": -1}
+        )
+    state = {"cookies": cookies, "origins": []}
+    with open(path, "w") as f:
+        json.dump(state, f)
+    return path
+
+
+def test_freshness_and_rotation():
+    print("Testing BrowserSessionManager freshness + rotation...")
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = BrowserSessionManager(state_dir=state_dir)
+
+        fresh_a = write_state(state_dir, "a.json", time.time() + 86400)
+        fresh_b = write_state(state_dir, "b.json", time.time() + 86400)
+        expiring = write_state(
+            state_dir, "c.json", time.time() + 60, session_cookie=False
+        )
+
+        picked = [manager.next_state() for _ in range(4)]
+        print(f"Rotation: {[os.path.basename(p) for p in picked]}")
+
+        assert set(picked) == {fresh_a, fresh_b}
+        assert picked[0] != picked[1]
+        # State with nothing but expiring cookies is dropped to be re-warmed
+        assert not os.path.exists(expiring)
+        print("✅ SUCCESS: Stale state dropped, fresh states rotated.")
+
+
+def test_expiring_cookies_are_dropped_not_the_state():
+    print("\nTesting that short-lived cookies don't invalidate a state...")
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = BrowserSessionManager(state_dir=state_dir)
+        path = write_state(state_dir, "a.json", time.time() + 60)
+
+        assert manager.next_state() == path
+        state = manager.load_state(path)
+        assert [c["name"] for c in state["cookies"]] == ["_sid"]
+        print("✅ SUCCESS: Expiring cookie left out, session cookie kept.")
+
+
+def test_save_respects_max_sessions_under_concurrency():
+    print("\nTesting concurrent cold saves against max_sessions...")
+
+    class FakeContext:
+        async def storage_state(self):
+            await asyncio.sleep(0)
+            return {"cookies": [{"name": "_sid", "expires": -1}], "origins": []}
+
+    async def save_many(manager):
+        await asyncio.gather(*(manager.save(FakeContext()) for _ in range(10)))
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = BrowserSessionManager(state_dir=state_dir, max_sessions=2)
+        asyncio.run(save_many(manager))
+        assert len(manager._state_paths()) == 2
+        print("✅ SUCCESS: Only max_sessions states were written.")
+
+
+def test_states_are_kept_per_profile():
+    print("\nTesting that states are only handed to the profile that saved them...")
+
+    class FakeContext:
+        async def storage_state(self):
+            return {"cookies": [{"name": "_sid", "expires": -1}], "origins": []}
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = BrowserSessionManager(state_dir=state_dir)
+        asyncio.run(manager.save(FakeContext(), profile_id="desktop-a"))
+
+        assert manager.next_state("desktop-b") is None
+        saved = manager.next_state("desktop-a")
+        assert saved and os.path.dirname(saved).endswith("desktop-a")
+        print("✅ SUCCESS: Other profiles start cold.")
+
+
+def test_cold_start():
+    print("\nTesting BrowserSessionManager cold start...")
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = BrowserSessionManager(state_dir=os.path.join(state_dir, "missing"))
+        assert manager.next_state() is None
+        print("✅ SUCCESS: No warmed state available on cold start.")
+
+
+if __name__ == "__main__":
+    test_freshness_and_rotation()
+    test_expiring_cookies_are_dropped_not_the_state()
+    test_save_respects_max_sessions_under_concurrency()
+    test_states_are_kept_per_profile()
+    test_cold_start()